@@ -1,8 +1,19 @@
-from .dbconfig import get_db_config,get_role_permissions
-from .schema import init_neo4j_graph, get_schema
+from .dbconfig import get_db_config,get_role_permissions,get_pool_config,get_target_names
+from .pool import MySQLConnectionPool, get_pool
+from .executor import get_executor, run_blocking
+from .schema import init_neo4j_graph, init_schema_graphs, start_schema_sync, stop_schema_sync, get_schema
 __all__ = [
     "get_db_config",
+    "get_target_names",
     "get_role_permissions",
+    "get_pool_config",
+    "MySQLConnectionPool",
+    "get_pool",
+    "get_executor",
+    "run_blocking",
     "init_neo4j_graph",
+    "init_schema_graphs",
+    "start_schema_sync",
+    "stop_schema_sync",
     "get_schema"
 ]
\ No newline at end of file
@@ -0,0 +1,263 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from mysql.connector import Error
+
+from .dbconfig import get_cost_guard_config
+from .logger import log_event
+from .sql_lexer import has_top_level_into, is_locking_read, statement_digest, top_level_limit
+
+# 成本检查的动作
+GUARD_OFF = "off"
+GUARD_REJECT = "reject"
+GUARD_LIMIT = "limit"
+
+
+class PlanSummary(NamedTuple):
+    """EXPLAIN FORMAT=JSON 执行计划的摘要"""
+    rows_examined: float   # 预估扫描的行数（嵌套循环连接按前序表产生的行数放大）
+    cost: float            # 优化器预估的成本（query_cost），MySQL 5.6 没有成本信息时为 None
+    full_scans: tuple      # 全表扫描（access_type 为 ALL）的表
+    tables: tuple          # 计划中的表，按访问顺序
+    materializes: bool = False  # 是否需要先读完全部行再返回（文件排序或临时表），此时 LIMIT 不能减少扫描
+
+    def describe(self) -> str:
+        parts = [f"预估扫描 {self.rows_examined:.0f} 行"]
+        if self.cost is not None:
+            parts.append(f"成本 {self.cost:.1f}")
+        if self.full_scans:
+            parts.append(f"全表扫描: {', '.join(self.full_scans)}")
+        if self.tables:
+            parts.append(f"访问顺序: {' -> '.join(self.tables)}")
+        return "，".join(parts)
+
+
+def plan_number(value, default=0.0) -> float:
+    """执行计划中的数值（MySQL 8.0 以字符串输出，如 "1.50"），缺失或无法解析时返回 default"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class PlanWalker:
+    """遍历执行计划，累计各表的扫描行数"""
+
+    def __init__(self):
+        self.rows_examined = 0.0
+        self.full_scans = []
+        self.tables = []
+        self.scans = []  # (表节点, 扫描次数)，按访问顺序
+
+    def walk(self, node):
+        if isinstance(node, list):
+            for item in node:
+                self.walk(item)
+        elif isinstance(node, dict):
+            if "nested_loop" in node:
+                self.walk_loop([item.get("table", item) for item in node["nested_loop"]])
+            elif "table" in node:
+                self.walk_loop([node["table"]])
+            for key, value in node.items():
+                if key not in ("nested_loop", "table"):
+                    self.walk(value)
+
+    def walk_loop(self, tables):
+        """嵌套循环连接：每张表的扫描次数等于前序表产生的行数"""
+        prefix_rows = 1.0
+        for table in tables:
+            if "table_name" not in table:
+                self.walk(table)
+                continue
+            # MySQL 5.7+ 为 rows_examined_per_scan，5.6 为 rows
+            per_scan = plan_number(table.get("rows_examined_per_scan", table.get("rows")), 1.0)
+            self.rows_examined += per_scan * prefix_rows
+            self.scans.append((table, prefix_rows))
+            if "rows_produced_per_join" in table:
+                prefix_rows = plan_number(table["rows_produced_per_join"], prefix_rows)
+            else:
+                prefix_rows *= per_scan * plan_number(table.get("filtered"), 100.0) / 100
+            self.tables.append(table["table_name"])
+            if table.get("access_type") == "ALL":
+                self.full_scans.append(table["table_name"])
+            # 表上挂载的子查询、派生表
+            for key, value in table.items():
+                if isinstance(value, (dict, list)):
+                    self.walk(value)
+
+
+def summarize_plan(plan: dict) -> PlanSummary:
+    """从 EXPLAIN FORMAT=JSON 的结果中提取预估扫描行数、成本与全表扫描的表"""
+    walker = PlanWalker()
+    walker.walk(plan)
+    query_block = plan.get("query_block", {})
+    cost = query_block.get("cost_info", {}).get("query_cost")
+    return PlanSummary(walker.rows_examined, None if cost is None else plan_number(cost),
+                       tuple(dict.fromkeys(walker.full_scans)), tuple(walker.tables), _materializes(plan))
+
+
+def _materializes(node) -> bool:
+    """执行计划中是否有文件排序或临时表"""
+    if isinstance(node, list):
+        return any(_materializes(item) for item in node)
+    if isinstance(node, dict):
+        if node.get("using_filesort") is True or node.get("using_temporary_table") is True:
+            return True
+        return any(_materializes(value) for value in node.values() if isinstance(value, (dict, list)))
+    return False
+
+
+class GuardResult(NamedTuple):
+    """成本检查的结果"""
+    statement: str   # 要执行的语句，自动添加 LIMIT 时为改写后的语句
+    message: str     # 拒绝执行的说明，或自动添加 LIMIT 的提示；未超出阈值时为空
+    rejected: bool
+
+
+class PlanCache:
+    """执行计划摘要缓存（LRU + TTL），键为 (数据库目标, 库名, 语句摘要)，同一形态的语句只需 EXPLAIN 一次"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (PlanSummary, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and entry[1] < time.monotonic()):
+                self._entries.pop(key, None)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, summary: PlanSummary):
+        with self._lock:
+            self._entries[key] = (summary, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries, ttl=self.ttl)
+
+
+class CostGuard:
+    """
+    执行 SELECT 前以 EXPLAIN FORMAT=JSON 预估扫描行数与成本，超过阈值时拒绝执行，
+    或（limit 模式下，且语句最外层没有 LIMIT、不是加锁读或 SELECT ... INTO 时）自动添加 LIMIT 后执行，
+    并返回执行计划摘要供改写语句。EXPLAIN 失败时不拦截，语句照常执行。
+
+    EXPLAIN 的预估不考虑 LIMIT：最外层 LIMIT 的行数加偏移量不超过 auto_limit、且执行计划不需要文件排序或临时表
+    （读到足够的行即可停止）的语句不拦截。
+    """
+
+    def __init__(self, mode: str, max_rows: float, max_cost: float, auto_limit: int, plan_cache: PlanCache):
+        self.mode = mode
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.auto_limit = auto_limit
+        self.plan_cache = plan_cache
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != GUARD_OFF
+
+    def explain(self, conn, statement: str, cache_key: tuple) -> PlanSummary:
+        """读取（或从缓存获取）语句的执行计划摘要
+
+        摘要文本中 LIMIT 的数值被替换为 ?，缓存键另外包含最外层 LIMIT 的行数与偏移量
+        """
+        key = cache_key + (statement_digest(statement), top_level_limit(statement))
+        summary = self.plan_cache.get(key)
+        if summary is None:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN FORMAT=JSON {statement}")
+                row = cursor.fetchone()
+                cursor.fetchall()
+            summary = summarize_plan(json.loads(row[0]))
+            self.plan_cache.put(key, summary)
+        return summary
+
+    def exceeded(self, summary: PlanSummary) -> list:
+        """超出的阈值说明，未超出时为空列表"""
+        reasons = []
+        if self.max_rows and summary.rows_examined > self.max_rows:
+            reasons.append(f"预估扫描行数超过 {self.max_rows:.0f}")
+        if self.max_cost and summary.cost is not None and summary.cost > self.max_cost:
+            reasons.append(f"预估成本超过 {self.max_cost:g}")
+        return reasons
+
+    def limited(self, statement: str, summary: PlanSummary) -> bool:
+        """语句最外层的 LIMIT 是否足以限制扫描：行数加偏移量不超过 auto_limit，且不需要先排序或分组全部行"""
+        limit = top_level_limit(statement)
+        if limit is None or limit[0] is None or limit[1] is None or summary.materializes:
+            return False
+        return limit[0] + limit[1] <= self.auto_limit
+
+    def check(self, conn, statement, cache_key: tuple, allow_limit: bool = True) -> GuardResult:
+        """检查一条语句
+
+        参数:
+            conn: 用于执行 EXPLAIN 的连接（与执行语句的连接相同）
+            statement: sql_lexer.Statement，只检查 SELECT
+            cache_key (tuple): 执行计划缓存键的前缀 (数据库目标, 库名)
+            allow_limit (bool): 是否允许自动添加 LIMIT（流式读取时不添加）
+        """
+        text = statement.text
+        if not self.enabled or statement.operation != "SELECT":
+            return GuardResult(text, "", False)
+        try:
+            summary = self.explain(conn, text, cache_key)
+        except (Error, ValueError, TypeError, IndexError) as e:
+            log_event("cost_guard_explain_failed", level=logging.WARNING, sampled=True, statement=text, error=str(e))
+            return GuardResult(text, "", False)
+
+        reasons = self.exceeded(summary)
+        if not reasons or self.limited(text, summary):
+            return GuardResult(text, "", False)
+
+        log_event("cost_guard_hit", sampled=True, statement=text, mode=self.mode,
+                  rows_examined=summary.rows_examined, cost=summary.cost)
+        # 已有 LIMIT、加锁读（LIMIT 需在 FOR UPDATE 之前）与 SELECT ... INTO 无法在末尾追加 LIMIT
+        if (self.mode == GUARD_LIMIT and allow_limit and top_level_limit(text) is None
+                and not is_locking_read(text) and not has_top_level_into(text)):
+            return GuardResult(f"{text} LIMIT {self.auto_limit}",
+                               f"执行计划{'，'.join(reasons)}（{summary.describe()}），已自动添加 LIMIT {self.auto_limit}",
+                               False)
+        return GuardResult(text, f"成本检查未通过，语句 '{text}' 未执行：执行计划{'，'.join(reasons)}"
+                                 f"（{summary.describe()}）。请添加过滤条件、使用索引列或缩小连接范围后重试", True)
+
+
+_plan_cache = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache:
+    """获取进程级共享的执行计划摘要缓存"""
+    global _plan_cache
+    if _plan_cache is None:
+        with _plan_cache_lock:
+            if _plan_cache is None:
+                config = get_cost_guard_config()
+                _plan_cache = PlanCache(config["cache_size"], config["cache_ttl"])
+    return _plan_cache
+
+
+def get_cost_guard(target: str = None) -> CostGuard:
+    """按数据库目标的配置创建成本检查（执行计划缓存由全部目标共享，键中包含目标名称）"""
+    config = get_cost_guard_config(target)
+    return CostGuard(config["mode"], config["max_rows"], config["max_cost"], config["auto_limit"], get_plan_cache())
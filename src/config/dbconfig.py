@@ -1,9 +1,86 @@
 import os
+import re
+from functools import lru_cache
+
 from dotenv import load_dotenv
 
-def get_db_config():
+
+@lru_cache(maxsize=1)
+def load_env():
+    """加载.env文件（进程内只加载一次）"""
+    load_dotenv()
+
+
+def getenv_bool(name: str, default: bool = False) -> bool:
+    """读取布尔型环境变量，支持 1/true/yes/on"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# 默认数据库目标的名称，使用 MYSQL_HOST、MYSQL_DATABASE 等配置
+DEFAULT_TARGET = "default"
+
+
+def target_env_key(target: str) -> str:
+    """数据库目标在环境变量名中的写法：大写，非字母数字替换为下划线"""
+    return re.sub(r"[^0-9A-Za-z]", "_", target).upper()
+
+
+def getenv_target(target: str, name: str, default=None):
+    """读取数据库目标专属的环境变量 MYSQL_<目标名>_<name>，默认目标或未设置时返回 default"""
+    if target and target != DEFAULT_TARGET:
+        value = os.getenv(f"MYSQL_{target_env_key(target)}_{name}")
+        if value is not None:
+            return value
+    return default
+
+
+def target_path(path: str, target: str) -> str:
+    """为非默认目标派生独立的文件路径，如 schema.db -> schema.orders.db"""
+    if not path or not target or target == DEFAULT_TARGET:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{target}{ext}"
+
+
+def get_target_names() -> list:
+    """获取全部数据库目标的名称
+
+    默认目标 default 使用 MYSQL_* 配置；MYSQL_TARGETS 以逗号分隔列出其他目标，
+    每个目标使用 MYSQL_<目标名>_HOST 等配置，未设置的项沿用默认目标的配置（数据库名默认为目标名）。
+    """
+    load_env()
+
+    names = [DEFAULT_TARGET]
+    for name in os.getenv("MYSQL_TARGETS", "").split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def resolve_target(target: str = None) -> str:
+    """校验数据库目标名称，未指定时返回默认目标
+
+    异常:
+        ValueError: 目标不存在时抛出
+    """
+    if not target:
+        return DEFAULT_TARGET
+    names = get_target_names()
+    if target not in names:
+        raise ValueError(f"未知的数据库目标: {target}，可选: {', '.join(names)}")
+    return target
+
+
+def get_db_config(target: str = None):
     """从环境变量获取数据库配置信息
 
+    参数:
+        target (str): 数据库目标名称，默认为 default（MYSQL_* 配置）
+
     返回:
         dict: 包含数据库连接所需的配置信息
         - host: 数据库主机地址
@@ -12,20 +89,24 @@ def get_db_config():
         - password: 数据库密码
         - database: 数据库名称
         - role: 数据库角色权限
+        - target: 数据库目标名称
 
     异常:
-        ValueError: 当必需的配置信息缺失时抛出
+        ValueError: 当必需的配置信息缺失或目标不存在时抛出
     """
     # 加载.env文件
-    load_dotenv()
+    load_env()
+    target = resolve_target(target)
 
     config = {
-        "host": os.getenv("MYSQL_HOST", "localhost"),
-        "port": int(os.getenv("MYSQL_PORT", "3306")),
-        "user": os.getenv("MYSQL_USER"),
-        "password": os.getenv("MYSQL_PASSWORD"),
-        "database": os.getenv("MYSQL_DATABASE"),
-        "role": os.getenv("MYSQL_ROLE", "readonly")  # 默认为只读角色
+        "host": getenv_target(target, "HOST", os.getenv("MYSQL_HOST", "localhost")),
+        "port": int(getenv_target(target, "PORT", os.getenv("MYSQL_PORT", "3306"))),
+        "user": getenv_target(target, "USER", os.getenv("MYSQL_USER")),
+        "password": getenv_target(target, "PASSWORD", os.getenv("MYSQL_PASSWORD")),
+        "database": getenv_target(target, "DATABASE",
+                                  os.getenv("MYSQL_DATABASE") if target == DEFAULT_TARGET else target),
+        "role": getenv_target(target, "ROLE", os.getenv("MYSQL_ROLE", "readonly")),  # 默认为只读角色
+        "target": target,
     }
     
     if not all([config["user"], config["password"], config["database"]]):
@@ -34,6 +115,63 @@ def get_db_config():
     return config
 
 
+def get_replica_config(target: str = None):
+    """从环境变量获取数据库目标的只读副本（从库）配置
+
+    MYSQL_REPLICAS 以逗号分隔列出从库地址（host 或 host:port），非默认目标使用 MYSQL_<目标名>_REPLICAS；
+    从库的用户名、密码与库名默认与主库相同。
+
+    参数:
+        target (str): 数据库目标名称
+
+    返回:
+        dict: 包含从库路由的配置信息
+        - replicas: 从库连接配置列表，每项包含 name/host/port/user/password/database，为空时全部语句发往主库
+        - policy: 从库负载均衡策略（round_robin/random/least_connections）
+        - max_lag: 复制延迟（Seconds_Behind_Source）超过该秒数的从库被跳过
+        - check_interval: 检查复制延迟的间隔（秒）
+        - check_timeout: 检查复制延迟时连接从库的超时（秒），只尝试一次
+        - read_your_writes: 会话写入后的 max_lag 秒内，该会话的读语句也发往主库，保证读到自己的写入
+
+    异常:
+        ValueError: 当配置不合法时抛出
+    """
+    db_config = get_db_config(target)
+    target = db_config["target"]
+
+    def value(name: str, default: str = None):
+        return getenv_target(target, name, os.getenv(f"MYSQL_{name}", default))
+
+    replicas = []
+    for address in (value("REPLICAS") or "").split(","):
+        address = address.strip()
+        if not address:
+            continue
+        host, _, port = address.partition(":")
+        replicas.append({
+            "name": address,
+            "host": host,
+            "port": int(port or db_config["port"]),
+            "user": value("REPLICA_USER", db_config["user"]),
+            "password": value("REPLICA_PASSWORD", db_config["password"]),
+            "database": db_config["database"],
+        })
+
+    config = {
+        "replicas": replicas,
+        "policy": value("REPLICA_POLICY", "round_robin").lower(),
+        "max_lag": float(value("REPLICA_MAX_LAG", "30")),
+        "check_interval": float(value("REPLICA_CHECK_INTERVAL", "5")),
+        "check_timeout": float(value("REPLICA_CHECK_TIMEOUT", "2")),
+        "read_your_writes": value("READ_YOUR_WRITES", "true").strip().lower() in ("1", "true", "yes", "on"),
+    }
+
+    if config["max_lag"] < 0 or config["check_interval"] < 0 or config["check_timeout"] <= 0:
+        raise ValueError("从库配置不合法")
+
+    return config
+
+
 def get_neo4j_config():
     """从环境变量获取图数据库配置信息
 
@@ -47,7 +185,7 @@ def get_neo4j_config():
         ValueError: 当必需的配置信息缺失时抛出
     """
     # 加载.env文件
-    load_dotenv()
+    load_env()
 
     config = {
         "neo4j_uri": os.getenv("NEO4J_URI", "bolt://localhost:7687"),
@@ -60,6 +198,328 @@ def get_neo4j_config():
 
     return config
 
+
+def get_import_config():
+    """从环境变量获取 schema 导入 Neo4j 的配置
+
+    返回:
+        dict: 包含导入配置信息
+        - batch_size: 每条 UNWIND 语句写入的行数
+        - sync_mode: 同步方式，incremental（按表指纹增量同步，默认）或 full（全量 MERGE）
+        - sync_interval: 后台周期性增量同步的间隔（秒），0 表示不启用
+    """
+    load_env()
+
+    config = {
+        "batch_size": int(os.getenv("NEO4J_IMPORT_BATCH_SIZE", "1000")),
+        "sync_mode": os.getenv("SCHEMA_SYNC_MODE", "incremental").lower(),
+        "sync_interval": float(os.getenv("SCHEMA_SYNC_INTERVAL", "0")),
+    }
+
+    if config["batch_size"] < 1:
+        raise ValueError("NEO4J_IMPORT_BATCH_SIZE 必须大于0")
+    if config["sync_mode"] not in ("incremental", "full"):
+        raise ValueError("SCHEMA_SYNC_MODE 只能为 incremental 或 full")
+
+    return config
+
+
+def get_snapshot_config(target: str = None):
+    """从环境变量获取 schema 快照配置
+
+    参数:
+        target (str): 数据库目标名称，非默认目标的注释向量文件默认由 EMBEDDING_CACHE_PATH 派生
+
+    返回:
+        dict: 包含 schema 快照的配置信息
+        - ttl: 快照的有效期（秒），过期后检查图数据库中的 schema 版本，有变化才重新加载；0 表示只在显式失效时刷新
+        - embedding_cache: 注释向量的缓存文件路径（.npz），多个工作进程共享；为空时不使用
+    """
+    load_env()
+
+    return {
+        "ttl": float(os.getenv("SCHEMA_SNAPSHOT_TTL", "300")),
+        "embedding_cache": getenv_target(target, "EMBEDDING_CACHE_PATH",
+                                         target_path(os.getenv("EMBEDDING_CACHE_PATH", ""), target)),
+    }
+
+def get_schema_store_config(target: str = None):
+    """从环境变量获取 schema 图存储配置
+
+    参数:
+        target (str): 数据库目标名称，每个目标的 schema 保存在独立的存储中
+
+    返回:
+        dict: 包含 schema 图存储的配置信息
+        - backend: 存储后端，neo4j 使用 Neo4j 服务，embedded 使用进程内存储（不需要 Neo4j）
+        - path: embedded 存储持久化的 SQLite 文件路径，为空时只保存在内存中；非默认目标默认由 SCHEMA_STORE_PATH 派生
+        - neo4j_database: neo4j 存储使用的 Neo4j 数据库（NEO4J_DATABASE，为空时使用服务端的默认数据库），
+          全部目标共用并以节点的 target 属性区分；MYSQL_<目标名>_NEO4J_DATABASE 可为目标单独指定（需要 Neo4j Enterprise 版）
+        - neo4j_dedicated: 是否为该目标单独指定了 Neo4j 数据库
+    """
+    load_env()
+
+    dedicated_database = getenv_target(target, "NEO4J_DATABASE")
+    return {
+        "backend": getenv_target(target, "SCHEMA_STORE", os.getenv("SCHEMA_STORE", "neo4j")).lower(),
+        "path": getenv_target(target, "SCHEMA_STORE_PATH", target_path(os.getenv("SCHEMA_STORE_PATH", ""), target)),
+        "neo4j_database": dedicated_database or os.getenv("NEO4J_DATABASE") or None,
+        "neo4j_dedicated": bool(dedicated_database),
+    }
+
+def get_warmup_config():
+    """从环境变量获取启动预热配置
+
+    返回:
+        dict: 包含启动预热的配置信息
+        - enabled: 是否在服务启动后于后台预热（加载分词词典、WordNet、语义模型并同步 schema），
+          关闭时各子系统在第一次使用时才加载
+        - wait_timeout: 预热未完成时 get_schema 最多等待的秒数，超时返回提示信息
+        - sync: 预热时是否将 MySQL schema 同步到 schema 图存储；多进程模式下由主进程同步，工作进程只加载
+    """
+    load_env()
+
+    return {
+        "enabled": getenv_bool("SCHEMA_WARMUP", True),
+        "wait_timeout": float(os.getenv("SCHEMA_WARMUP_WAIT_TIMEOUT", "30")),
+        "sync": getenv_bool("SCHEMA_WARMUP_SYNC", True),
+    }
+
+def get_http_config():
+    """从环境变量获取 Streamable HTTP 模式的配置
+
+    返回:
+        dict: 包含 HTTP 服务的配置信息
+        - host: 监听地址
+        - port: 监听端口
+        - workers: 工作进程数，大于 1 时各进程互不共享内存状态（无状态模式，可以部署在负载均衡之后）
+        - json_response: 是否以 JSON 而不是 SSE 流返回响应
+        - healthcheck_timeout: 主进程检查工作进程存活的超时（秒），工作进程启动时加载分词词典和模型会短暂占满 CPU
+        - debug: 是否开启 Starlette 调试模式（SSE 与 Streamable HTTP 方式），出错时在响应中返回异常堆栈，只应在本地调试时开启
+
+    异常:
+        ValueError: 当配置不合法时抛出
+    """
+    load_env()
+
+    config = {
+        "host": os.getenv("HTTP_HOST", "0.0.0.0"),
+        "port": int(os.getenv("HTTP_PORT", "9000")),
+        "workers": int(os.getenv("HTTP_WORKERS", "1")),
+        "json_response": getenv_bool("HTTP_JSON_RESPONSE", False),
+        "healthcheck_timeout": int(os.getenv("HTTP_WORKER_HEALTHCHECK_TIMEOUT", "30")),
+        "debug": getenv_bool("HTTP_DEBUG", False),
+    }
+
+    if config["workers"] < 1:
+        raise ValueError("HTTP_WORKERS 必须大于0")
+
+    return config
+
+def get_pool_config(target: str = None):
+    """从环境变量获取MySQL连接池配置信息
+
+    每个数据库目标使用独立的连接池，可以通过 MYSQL_<目标名>_POOL_MAX_SIZE 等单独配置。
+
+    参数:
+        target (str): 数据库目标名称
+
+    返回:
+        dict: 包含连接池所需的配置信息
+        - min_size: 连接池保留的最小空闲连接数
+        - max_size: 连接池允许的最大连接数
+        - idle_timeout: 空闲连接的最大存活时间（秒），超时后关闭
+        - acquire_timeout: 获取连接的最长等待时间（秒）
+        - health_check: 借出连接前是否进行健康检查（ping）
+        - reconnect_attempts: 建立或恢复连接失败时的重试次数
+        - reconnect_delay: 每次重试之间的间隔（秒）
+
+    异常:
+        ValueError: 当配置不合法时抛出
+    """
+    load_env()
+
+    def value(name: str, default: str) -> str:
+        return getenv_target(target, name, os.getenv(f"MYSQL_{name}", default))
+
+    config = {
+        "min_size": int(value("POOL_MIN_SIZE", "1")),
+        "max_size": int(value("POOL_MAX_SIZE", "10")),
+        "idle_timeout": float(value("POOL_IDLE_TIMEOUT", "300")),
+        "acquire_timeout": float(value("POOL_ACQUIRE_TIMEOUT", "10")),
+        "health_check": value("POOL_HEALTH_CHECK", "true").strip().lower() in ("1", "true", "yes", "on"),
+        "reconnect_attempts": int(value("POOL_RECONNECT_ATTEMPTS", "3")),
+        "reconnect_delay": float(value("POOL_RECONNECT_DELAY", "1")),
+    }
+
+    if config["max_size"] < 1 or not 0 <= config["min_size"] <= config["max_size"]:
+        raise ValueError("连接池大小配置不合法")
+
+    return config
+
+def get_result_config():
+    """从环境变量获取查询结果的输出配置
+
+    返回:
+        dict: 包含结果格式与流式（分页）结果集的配置信息
+        - format: 默认的结果格式（csv/jsonl/columnar/markdown）
+        - page_rows: 每页最多返回的行数
+        - page_bytes: 每页最多返回的字节数
+        - ttl: 未读完的结果集空闲多久（秒）后自动关闭
+        - max_open: 同时保持打开的结果集数量上限（每个结果集占用一个连接）
+    """
+    load_env()
+
+    return {
+        "format": os.getenv("RESULT_FORMAT", "csv"),
+        "page_rows": int(os.getenv("RESULT_PAGE_ROWS", "1000")),
+        "page_bytes": int(os.getenv("RESULT_PAGE_BYTES", str(1024 * 1024))),
+        "ttl": float(os.getenv("RESULT_STREAM_TTL", "300")),
+        "max_open": int(os.getenv("RESULT_STREAM_MAX_OPEN", "4")),
+    }
+
+def get_query_cache_config():
+    """从环境变量获取只读语句结果缓存配置
+
+    返回:
+        dict: 包含结果缓存的配置信息
+        - enabled: 是否启用结果缓存（默认关闭）
+        - ttl: 缓存条目的有效期（秒）
+        - max_bytes: 缓存占用的最大字节数，超出时按最近最少使用淘汰
+        - max_entry_bytes: 单条结果超过该字节数时不缓存
+    """
+    load_env()
+
+    return {
+        "enabled": getenv_bool("QUERY_CACHE_ENABLED", False),
+        "ttl": float(os.getenv("QUERY_CACHE_TTL", "60")),
+        "max_bytes": int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        "max_entry_bytes": int(os.getenv("QUERY_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024))),
+    }
+
+def get_bulk_insert_config():
+    """从环境变量获取批量插入配置
+
+    返回:
+        dict: 包含批量插入的配置信息
+        - chunk_size: 每个事务插入的行数（每批执行一次 executemany 并提交一次）
+        - max_rows: 单次调用允许插入的最大行数
+
+    异常:
+        ValueError: 当配置不合法时抛出
+    """
+    load_env()
+
+    config = {
+        "chunk_size": int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000")),
+        "max_rows": int(os.getenv("BULK_INSERT_MAX_ROWS", "100000")),
+    }
+
+    if config["chunk_size"] < 1 or config["max_rows"] < 1:
+        raise ValueError("批量插入配置不合法")
+
+    return config
+
+def get_query_limits(role: str, target: str = None):
+    """从环境变量获取指定角色与数据库目标的查询资源限制，0 表示不限制
+
+    每项限制可以按数据库目标或角色单独配置，优先级为 MYSQL_<目标名>_QUERY_TIMEOUT、
+    QUERY_TIMEOUT_READONLY、QUERY_TIMEOUT。
+
+    参数:
+        role (str): 角色名称
+        target (str): 数据库目标名称
+
+    返回:
+        dict: 包含资源限制的配置信息
+        - timeout: 单次调用的执行超时（秒），超时后在独立连接上 KILL QUERY
+        - max_rows: 每个结果集最多返回的行数
+        - max_bytes: 单次调用最多返回的字节数
+        - max_concurrent: 同一会话在该目标上同时执行的查询数上限
+        - max_running: 该目标上所有会话同时执行的查询数上限，避免一个繁忙的数据库占满共享的线程池
+    """
+    load_env()
+
+    def value(name: str) -> str:
+        return getenv_target(target, name, os.getenv(f"{name}_{role.upper()}", os.getenv(name, "0")))
+
+    return {
+        "timeout": float(value("QUERY_TIMEOUT")),
+        "max_rows": int(value("QUERY_MAX_ROWS")),
+        "max_bytes": int(value("QUERY_MAX_BYTES")),
+        "max_concurrent": int(value("QUERY_MAX_CONCURRENT")),
+        "max_running": int(value("QUERY_MAX_RUNNING")),
+    }
+
+def get_cost_guard_config(target: str = None):
+    """从环境变量获取执行前成本检查（EXPLAIN）的配置，可以按数据库目标单独配置，如 MYSQL_<目标名>_COST_GUARD
+
+    参数:
+        target (str): 数据库目标名称
+
+    返回:
+        dict: 包含成本检查的配置信息
+        - mode: off 不检查（默认）；reject 超过阈值时拒绝执行；limit 超过阈值时自动添加 LIMIT，无法添加时拒绝
+        - max_rows: 预估扫描行数的阈值，0 表示不限制
+        - max_cost: 优化器预估成本（query_cost）的阈值，0 表示不限制
+        - auto_limit: limit 模式下添加的 LIMIT 行数
+        - cache_size: 执行计划摘要缓存的条目数
+        - cache_ttl: 执行计划摘要的有效期（秒），表数据量变化后重新 EXPLAIN
+
+    异常:
+        ValueError: 当配置不合法时抛出
+    """
+    load_env()
+
+    def value(name: str, default: str) -> str:
+        return getenv_target(target, name, os.getenv(name, default))
+
+    config = {
+        "mode": value("COST_GUARD", "off").lower(),
+        "max_rows": float(value("COST_GUARD_MAX_ROWS", "1000000")),
+        "max_cost": float(value("COST_GUARD_MAX_COST", "0")),
+        "auto_limit": int(value("COST_GUARD_AUTO_LIMIT", "1000")),
+        "cache_size": int(os.getenv("COST_GUARD_CACHE_SIZE", "1024")),
+        "cache_ttl": float(os.getenv("COST_GUARD_CACHE_TTL", "600")),
+    }
+
+    if config["mode"] not in ("off", "reject", "limit"):
+        raise ValueError("COST_GUARD 只能为 off、reject 或 limit")
+    if config["auto_limit"] < 1 or config["cache_size"] < 1:
+        raise ValueError("成本检查配置不合法")
+
+    return config
+
+def get_workload_config():
+    """从环境变量获取工作负载记录与索引建议的配置
+
+    返回:
+        dict: 包含工作负载记录的配置信息
+        - log_size: 工作负载记录保留的语句形态（摘要）数，超出时淘汰最久未执行的；0 表示不记录
+        - advisor_statements: 索引建议每次按总耗时分析的语句形态数（每条执行一次 EXPLAIN）
+    """
+    load_env()
+
+    return {
+        "log_size": int(os.getenv("WORKLOAD_LOG_SIZE", "1000")),
+        "advisor_statements": int(os.getenv("INDEX_ADVISOR_STATEMENTS", "50")),
+    }
+
+def get_logging_config():
+    """从环境变量获取日志配置
+
+    返回:
+        dict: 包含日志的配置信息
+        - level: 日志级别（DEBUG/INFO/WARNING/ERROR）
+        - sample_rate: 每次请求都会产生的日志（SQL 文本、分词结果等）的采样率，0~1；警告及错误不采样
+    """
+    load_env()
+
+    return {
+        "level": os.getenv("LOG_LEVEL", "INFO").upper(),
+        "sample_rate": float(os.getenv("LOG_SAMPLE_RATE", "1")),
+    }
+
 # 定义角色权限
 ROLE_PERMISSIONS = {
     "readonly": ["SELECT", "SHOW", "DESCRIBE", "EXPLAIN"],  # 只读权限
@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+from typing import ClassVar, Dict, Iterable, Type
+
+# 大结果集按批编码，每批的行数
+ENCODE_BATCH_SIZE = 1000
+
+
+def to_text(value) -> str:
+    """将单元格的值转换为文本，None 输出为 NULL，二进制优先按 UTF-8 解码"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            return value.decode("utf-8")
+        except UnicodeDecodeError:
+            return "0x" + value.hex()
+    return str(value)
+
+
+def to_json_value(value):
+    """将单元格的值转换为 JSON 可序列化的值，数字和布尔值保持原类型"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return to_text(value)
+
+
+def unique_columns(columns: list) -> list:
+    """列名去重：重复的列名依次加上 _2、_3 等后缀（如 SELECT a.id, b.id 的两个 id），已被占用的后缀跳过"""
+    seen = set(columns)
+    result, counts = [], {}
+    for column in columns:
+        if column in counts:
+            number = counts[column] + 1
+            while f"{column}_{number}" in seen:
+                number += 1
+            counts[column] = number
+            column = f"{column}_{number}"
+            seen.add(column)
+        else:
+            counts[column] = 1
+        result.append(column)
+    return result
+
+
+def batched(rows: list, size: int = ENCODE_BATCH_SIZE):
+    """将行列表切分为批"""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class EncoderRegistry:
+    """结果编码器注册表，按格式名称管理所有编码器"""
+    _encoders: ClassVar[Dict[str, Type['ResultEncoder']]] = {}
+
+    @classmethod
+    def register(cls, encoder_class: Type['ResultEncoder']) -> Type['ResultEncoder']:
+        cls._encoders[encoder_class.name] = encoder_class
+        return encoder_class
+
+    @classmethod
+    def get_encoder(cls, name: str) -> 'ResultEncoder':
+        """获取编码器实例
+
+        异常:
+            ValueError: 当格式不存在时抛出
+        """
+        if name not in cls._encoders:
+            raise ValueError(f"未知的结果格式: {name}，可选: {', '.join(cls.get_formats())}")
+        return cls._encoders[name]()
+
+    @classmethod
+    def get_formats(cls) -> list:
+        return list(cls._encoders)
+
+
+class ResultEncoder:
+    """结果编码器基类，子类按批编码行数据"""
+    name: str = ""
+
+    def __init_subclass__(cls, **kwargs):
+        """子类初始化时自动注册到编码器注册表"""
+        super().__init_subclass__(**kwargs)
+        if cls.name:
+            EncoderRegistry.register(cls)
+
+    def begin(self, columns: list) -> str:
+        """编码表头"""
+        return ""
+
+    def encode_batch(self, rows: list) -> str:
+        """编码一批行数据"""
+        raise NotImplementedError
+
+    def end(self) -> str:
+        """编码结尾（按列编码的格式在此输出全部内容）"""
+        return ""
+
+    def encode(self, columns: list, row_batches: Iterable[list]) -> str:
+        """编码完整结果集
+
+        参数:
+            columns (list): 列名
+            row_batches (Iterable[list]): 按批提供的行数据，可以是游标 fetchmany 的迭代器
+
+        返回:
+            str: 编码后的文本
+        """
+        parts = [self.begin(columns)]
+        for rows in row_batches:
+            if rows:
+                parts.append(self.encode_batch(rows))
+        parts.append(self.end())
+        return "\n".join(part for part in parts if part)
+
+
+class CsvEncoder(ResultEncoder):
+    """RFC 4180 CSV，包含逗号、引号、换行的值会被正确加引号转义"""
+    name = "csv"
+
+    def begin(self, columns: list) -> str:
+        return self._write([columns])
+
+    def encode_batch(self, rows: list) -> str:
+        return self._write([[to_text(value) for value in row] for row in rows])
+
+    def _write(self, rows: list) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().rstrip("\n")
+
+
+class JsonLinesEncoder(ResultEncoder):
+    """每行一个 JSON 对象，键为列名（重复的列名加后缀区分，见 unique_columns）"""
+    name = "jsonl"
+
+    def begin(self, columns: list) -> str:
+        self.columns = unique_columns(columns)
+        return ""
+
+    def encode_batch(self, rows: list) -> str:
+        columns = self.columns
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=to_text).encode
+        return "\n".join(dumps(dict(zip(columns, row))) for row in rows)
+
+
+class ColumnarEncoder(ResultEncoder):
+    """按列输出的紧凑 JSON，重复值较多的列使用字典编码（dict + codes）
+
+    输出格式:
+        {"columns": [...], "rows": N, "data": [列1, 列2, ...]}
+        普通列为值数组；字典编码列为 {"dict": [去重后的值], "codes": [每行在 dict 中的下标]}
+    """
+    name = "columnar"
+
+    # 去重后的值数量不超过总行数的该比例时使用字典编码
+    DICT_RATIO = 0.5
+
+    def begin(self, columns: list) -> str:
+        self.columns = columns
+        self.data = [[] for _ in columns]
+        self.row_count = 0
+        return ""
+
+    def encode_batch(self, rows: list) -> str:
+        for index, values in enumerate(zip(*rows)):
+            self.data[index].extend(values)
+        self.row_count += len(rows)
+        return ""
+
+    def end(self) -> str:
+        data = [self._encode_column(values) for values in self.data]
+        return json.dumps({"columns": self.columns, "rows": self.row_count, "data": data},
+                          ensure_ascii=False, separators=(",", ":"), default=to_text)
+
+    def _encode_column(self, values: list):
+        values = [to_json_value(value) for value in values]
+        if len(values) < 4:
+            return values
+        dictionary = {}
+        codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+        if len(dictionary) > len(values) * self.DICT_RATIO:
+            return values
+        return {"dict": list(dictionary), "codes": codes}
+
+
+class MarkdownEncoder(ResultEncoder):
+    """Markdown 表格，竖线与换行会被转义"""
+    name = "markdown"
+
+    def begin(self, columns: list) -> str:
+        header = "| " + " | ".join(self._escape(column) for column in columns) + " |"
+        return header + "\n|" + " --- |" * len(columns)
+
+    def encode_batch(self, rows: list) -> str:
+        escape = self._escape
+        return "\n".join("| " + " | ".join(escape(to_text(value)) for value in row) + " |" for row in rows)
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        if "|" in text or "\n" in text or "\r" in text:
+            text = text.replace("|", "\\|").replace("\r\n", "<br>").replace("\n", "<br>").replace("\r", "<br>")
+        return text
+
+
+def get_encoder(name: str) -> ResultEncoder:
+    """根据格式名称获取编码器实例"""
+    return EncoderRegistry.get_encoder(name)
+
+
+def encode_result(columns: list, rows: list, fmt: str = "csv") -> str:
+    """按指定格式编码结果集，大结果集按批编码"""
+    return get_encoder(fmt).encode(columns, batched(rows))
@@ -0,0 +1,60 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .dbconfig import load_env
+
+# 各类阻塞任务使用独立的线程池，避免慢 SQL 占满模型推理或图查询所需的线程
+_EXECUTOR_ENV = {
+    "db": ("DB_EXECUTOR_MAX_WORKERS", "16"),
+    "schema": ("SCHEMA_EXECUTOR_MAX_WORKERS", "4"),
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str = "db") -> ThreadPoolExecutor:
+    """获取指定名称的有界线程池（首次调用时按环境变量创建）
+
+    参数:
+        name (str): 线程池名称，db 用于 MySQL 操作，schema 用于图数据库与模型计算
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                load_env()
+                env_name, default = _EXECUTOR_ENV.get(name, ("", "4"))
+                max_workers = int(os.getenv(env_name, default)) if env_name else int(default)
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+                _executors[name] = executor
+    return executor
+
+
+async def run_blocking(func, *args, executor: str = "db", on_cancel=None, **kwargs):
+    """在线程池中执行阻塞函数，不阻塞事件循环
+
+    参数:
+        func: 要执行的同步函数
+        executor (str): 使用的线程池名称
+        on_cancel: 调用被取消（如客户端断开）时执行的回调，用于中止仍在运行的阻塞操作
+
+    返回:
+        func 的返回值
+
+    异常:
+        asyncio.CancelledError: 调用被取消时在执行 on_cancel 后重新抛出
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_executor(executor), functools.partial(func, *args, **kwargs))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        if on_cancel is not None:
+            # 回调本身也可能阻塞（例如建立连接发送 KILL），线程池可能已满，使用独立线程执行
+            threading.Thread(target=on_cancel, name=f"{executor}-cancel", daemon=True).start()
+        raise
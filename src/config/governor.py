@@ -0,0 +1,150 @@
+import threading
+from contextvars import ContextVar
+
+from .dbconfig import get_query_limits
+from .encoders import ENCODE_BATCH_SIZE
+from .result_stream import estimate_row_bytes
+
+# 当前 MCP 会话的标识，由 server.call_tool 设置，用于按会话限制并发查询数
+current_session: ContextVar[str] = ContextVar("current_session", default="")
+
+
+class QueryGovernor:
+    """
+    单次工具调用的资源限制（按角色配置，0 表示不限制）。
+
+    - timeout: 执行超时（秒），由 QueryHandle 的看门狗在独立连接上发送 KILL QUERY 中止
+    - max_rows: 每个结果集最多返回的行数，超出部分在客户端丢弃
+    - max_bytes: 整个响应最多返回的字节数，多条语句共享该预算
+    - max_concurrent: 同一会话在该目标上同时执行的查询数上限
+    - max_running: 该数据库目标上所有会话同时执行的查询数上限
+
+    触发的限制记录在 limits_hit 中，由工具追加到返回结果里。
+    """
+
+    def __init__(self, limits: dict = None, target: str = ""):
+        limits = limits or {}
+        self.target = target
+        self.timeout = limits.get("timeout", 0)
+        self.max_rows = limits.get("max_rows", 0)
+        self.max_bytes = limits.get("max_bytes", 0)
+        self.max_concurrent = limits.get("max_concurrent", 0)
+        self.max_running = limits.get("max_running", 0)
+        self.bytes_used = 0
+        self.limits_hit = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_role(cls, role: str, target: str = None) -> "QueryGovernor":
+        return cls(get_query_limits(role, target), target or "")
+
+    def hit(self, message: str):
+        """记录一次触发的限制，相同的提示只记录一次"""
+        with self._lock:
+            if message not in self.limits_hit:
+                self.limits_hit.append(message)
+
+    def report(self) -> str:
+        """触发限制的说明，没有触发时返回空字符串"""
+        return "已达到资源限制: " + "；".join(self.limits_hit) if self.limits_hit else ""
+
+    def clamp_page(self, page_rows: int, page_bytes: int) -> tuple:
+        """流式分页的行数和字节数不超过限制"""
+        if self.max_rows:
+            page_rows = min(page_rows, self.max_rows)
+        if self.max_bytes:
+            page_bytes = min(page_bytes, self.max_bytes)
+        return page_rows, page_bytes
+
+    def read_result(self, cursor, encode) -> tuple:
+        """按批读取当前结果集并编码，超出行数或字节预算的行被丢弃
+
+        参数:
+            cursor: 已执行语句、带有结果集的游标
+            encode: 编码函数，参数为按批提供的行数据，返回结果文本
+
+        返回:
+            tuple: (结果文本, 是否因限制被截断)
+        """
+        state = {"rows": 0, "truncated": False}
+        bytes_before = self.bytes_used
+        text = encode(self._limited_batches(cursor, state))
+        if state["truncated"]:
+            # 丢弃剩余的行，否则无法读取下一个结果集
+            while cursor.fetchmany(ENCODE_BATCH_SIZE):
+                pass
+        # 读取时按估算值扣减预算，编码后以实际字节数为准
+        self.bytes_used = bytes_before + len(text.encode("utf-8"))
+        return text, state["truncated"]
+
+    def _limited_batches(self, cursor, state: dict):
+        while True:
+            rows = cursor.fetchmany(ENCODE_BATCH_SIZE)
+            if not rows:
+                return
+            if self.max_rows and state["rows"] + len(rows) > self.max_rows:
+                rows = rows[:self.max_rows - state["rows"]]
+                state["truncated"] = True
+                self.hit(f"结果行数超过 {self.max_rows} 行，超出部分未返回")
+            if self.max_bytes:
+                kept = 0
+                for row in rows:
+                    self.bytes_used += estimate_row_bytes(row)
+                    if self.bytes_used > self.max_bytes:
+                        state["truncated"] = True
+                        self.hit(f"响应大小超过 {self.max_bytes} 字节，超出部分未返回")
+                        break
+                    kept += 1
+                rows = rows[:kept]
+            state["rows"] += len(rows)
+            if rows:
+                yield rows
+            if state["truncated"]:
+                return
+
+    def check_concurrency(self):
+        """占用当前会话及数据库目标的并发名额，达到上限时返回 None，否则返回释放名额的函数"""
+        session = f"{self.target}:{current_session.get()}"
+        if self.max_concurrent and not _session_limiter.acquire(session, self.max_concurrent):
+            self.hit(f"当前会话同时执行的查询数已达上限 {self.max_concurrent}")
+            return None
+        if self.max_running and not _target_limiter.acquire(self.target, self.max_running):
+            if self.max_concurrent:
+                _session_limiter.release(session)
+            self.hit(f"数据库目标 {self.target or 'default'} 同时执行的查询数已达上限 {self.max_running}")
+            return None
+
+        def release():
+            if self.max_concurrent:
+                _session_limiter.release(session)
+            if self.max_running:
+                _target_limiter.release(self.target)
+        return release
+
+
+class SessionConcurrency:
+    """按会话（或数据库目标）统计正在执行的查询数"""
+
+    def __init__(self):
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, session: str, limit: int) -> bool:
+        with self._lock:
+            running = self._running.get(session, 0)
+            if running >= limit:
+                return False
+            self._running[session] = running + 1
+            return True
+
+    def release(self, session: str):
+        with self._lock:
+            running = self._running.get(session, 0) - 1
+            if running > 0:
+                self._running[session] = running
+            else:
+                self._running.pop(session, None)
+
+
+_session_limiter = SessionConcurrency()
+_target_limiter = SessionConcurrency()
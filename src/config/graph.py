@@ -0,0 +1,30 @@
+import threading
+
+from .dbconfig import get_neo4j_config
+
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def get_neo4j_driver():
+    """获取进程级共享的 Neo4j 驱动（驱动内部自带连接池，整个进程只创建一次）"""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                # neo4j 驱动导入较慢，首次使用时才导入，不拖慢服务启动
+                from neo4j import GraphDatabase
+
+                neo4j_config = get_neo4j_config()
+                _driver = GraphDatabase.driver(neo4j_config['neo4j_uri'],
+                                               auth=(neo4j_config['neo4j_user'], neo4j_config['neo4j_password']))
+    return _driver
+
+
+def close_neo4j_driver():
+    """关闭共享的 Neo4j 驱动"""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
@@ -0,0 +1,275 @@
+import json
+import logging
+import re
+
+from mysql.connector import Error
+
+from .cost_guard import PlanWalker, plan_number
+from .logger import log_event
+from .sql_lexer import tokenize
+
+# EXPLAIN FORMAT=JSON 的条件中，列引用写作 `库名`.`表别名`.`列名`
+_COLUMN = r"`((?:[^`]|``)+)`\.`((?:[^`]|``)+)`\.`((?:[^`]|``)+)`"
+# 列在左侧的谓词：`库`.`表`.`列` = ... / in (...) / between ... / like ... / is null
+_LEFT_PREDICATE = re.compile(
+    _COLUMN + r"\s*(<=>|>=|<=|<>|!=|=|>|<|between\b|like\b|in\b|is\s+null\b)", re.IGNORECASE)
+# 列在右侧的等值条件，通常是连接条件：... = `库`.`表`.`列`
+_RIGHT_EQUALITY = re.compile(r"(?<![<>!])=\s*" + _COLUMN)
+_EQUALITY_OPERATORS = {"=", "<=>", "in", "is null"}
+_RANGE_OPERATORS = {">", "<", ">=", "<=", "between", "like"}
+# 已经是最优访问方式、无需建议索引的表
+_OPTIMAL_ACCESS = {"system", "const", "eq_ref"}
+
+# 表名之前的关键字，及表名之后不是别名的关键字
+_TABLE_KEYWORDS = {"FROM", "JOIN", "UPDATE", "STRAIGHT_JOIN"}
+_TABLE_MODIFIERS = {"LOW_PRIORITY", "IGNORE", "QUICK"}
+_NOT_ALIAS = {"WHERE", "ON", "USING", "JOIN", "INNER", "LEFT", "RIGHT", "CROSS", "NATURAL", "STRAIGHT_JOIN",
+              "OUTER", "GROUP", "ORDER", "LIMIT", "HAVING", "SET", "FOR", "LOCK", "UNION", "WINDOW", "FORCE",
+              "USE", "IGNORE", "PARTITION", "INTO"}
+
+_INDEXES_SQL = """
+SELECT INDEX_NAME, COLUMN_NAME
+FROM information_schema.STATISTICS
+WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+ORDER BY INDEX_NAME, SEQ_IN_INDEX
+"""
+_COLUMNS_SQL = "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s"
+
+# MySQL 标识符的最大长度
+_MAX_IDENTIFIER = 64
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1].replace("``", "`") if name.startswith("`") else name
+
+
+def _quote(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def table_aliases(sql: str) -> dict:
+    """粗略提取语句中 FROM / JOIN / UPDATE 之后的表及其别名
+
+    返回:
+        dict: 小写的别名（没有别名时为表名） -> (库名或 None, 表名)
+    """
+    tokens = [token for token in tokenize(sql) if token.kind not in ("whitespace", "comment")]
+    aliases = {}
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if token.kind != "word" or token.text.upper() not in _TABLE_KEYWORDS:
+            continue
+        while index < len(tokens):
+            while index < len(tokens) and tokens[index].text.upper() in _TABLE_MODIFIERS:
+                index += 1
+            # 库名.表名 或 表名；括号开头的派生表不处理
+            parts = []
+            while index < len(tokens) and tokens[index].kind in ("word", "identifier"):
+                parts.append(_unquote(tokens[index].text))
+                index += 1
+                if index < len(tokens) and tokens[index].text == ".":
+                    index += 1
+                    continue
+                break
+            if not parts:
+                break
+            alias = parts[-1]
+            if index < len(tokens) and tokens[index].text.upper() == "AS":
+                index += 1
+            if (index < len(tokens) and tokens[index].kind in ("word", "identifier")
+                    and tokens[index].text.upper() not in _NOT_ALIAS):
+                alias = _unquote(tokens[index].text)
+                index += 1
+            aliases[alias.lower()] = (parts[-2] if len(parts) > 1 else None, parts[-1])
+            # FROM a x, b y
+            if index < len(tokens) and tokens[index].text == ",":
+                index += 1
+                continue
+            break
+    return aliases
+
+
+def _is_prefix_pattern(conditions: str, end: int) -> bool:
+    """LIKE 的模式是否以常量开头（'abc%' 可以使用索引，'%abc' 不能）"""
+    match = re.match(r"\s*'([^']?)", conditions[end:])
+    return bool(match) and match.group(1) not in ("%", "_")
+
+
+def table_predicates(table: dict) -> tuple:
+    """从执行计划的表节点中提取可以使用索引的列
+
+    返回:
+        tuple: (库名, 等值条件的列列表, 范围条件的列列表)；库名取自条件中的列引用，没有条件时为 None
+    """
+    alias = table["table_name"]
+    access = table.get("access_type")
+    equalities, ranges = [], []
+    # 已经使用的索引列：ref 访问为等值，range 访问的最后一列为范围
+    key_parts = list(table.get("used_key_parts") or [])
+    if access in ("ref", "ref_or_null"):
+        equalities.extend(key_parts)
+    elif access == "range" and key_parts:
+        equalities.extend(key_parts[:-1])
+        ranges.append(key_parts[-1])
+
+    schema = None
+    conditions = " ".join(str(table[key]) for key in ("index_condition", "attached_condition") if key in table)
+    for match in _LEFT_PREDICATE.finditer(conditions):
+        if match.group(2) != alias:
+            continue
+        schema = match.group(1)
+        column, operator = match.group(3), " ".join(match.group(4).lower().split())
+        if operator in _EQUALITY_OPERATORS:
+            equalities.append(column)
+        elif operator in _RANGE_OPERATORS and (operator != "like" or _is_prefix_pattern(conditions, match.end())):
+            ranges.append(column)
+    for match in _RIGHT_EQUALITY.finditer(conditions):
+        if match.group(2) == alias:
+            schema = match.group(1)
+            equalities.append(match.group(3))
+
+    equalities = list(dict.fromkeys(equalities))
+    ranges = [column for column in dict.fromkeys(ranges) if column not in equalities]
+    return schema, equalities, ranges
+
+
+def is_covered(columns: list, equality_count: int, indexes: dict) -> bool:
+    """已有索引是否已经覆盖候选索引：前 equality_count 列为相同的等值列（顺序不限），之后的列顺序相同"""
+    for index_columns in indexes.values():
+        if len(index_columns) < len(columns):
+            continue
+        if (set(index_columns[:equality_count]) == set(columns[:equality_count])
+                and index_columns[equality_count:len(columns)] == columns[equality_count:]):
+            return True
+    return False
+
+
+def index_name(columns: list, existing: dict) -> str:
+    """生成不与已有索引重名的索引名，如 idx_status_created_at"""
+    base = ("idx_" + "_".join(columns))[:_MAX_IDENTIFIER]
+    name, number = base, 2
+    while name in existing:
+        suffix = f"_{number}"
+        name, number = base[:_MAX_IDENTIFIER - len(suffix)] + suffix, number + 1
+    return name
+
+
+class IndexAdvisor:
+    """
+    根据工作负载记录建议组合索引。
+
+    对记录中总耗时最高的 SELECT/UPDATE/DELETE 执行 EXPLAIN FORMAT=JSON，取各表的等值条件列与一个范围条件列
+    组成候选索引（等值列在前，范围列在后），与 information_schema.STATISTICS 中的已有索引比较，去掉已被覆盖的候选。
+    收益估算为：该表每次扫描被条件过滤掉的行数（rows_examined_per_scan × (1 - filtered%)）× 扫描次数 × 执行次数，
+    即有了索引后可以少读的行数；同一候选被多条语句使用时收益相加。
+    """
+
+    def __init__(self, conn, database: str):
+        self.conn = conn
+        self.database = database
+        self._tables = {}  # (库名, 表名) -> (索引名 -> 列列表, 列名集合)
+
+    def explain(self, statement: str) -> dict:
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN FORMAT=JSON {statement}")
+            row = cursor.fetchone()
+            cursor.fetchall()
+        return json.loads(row[0])
+
+    def table_info(self, schema: str, table: str) -> tuple:
+        """读取表的已有索引与列，表不存在时列集合为空"""
+        key = (schema, table)
+        if key not in self._tables:
+            with self.conn.cursor() as cursor:
+                cursor.execute(_INDEXES_SQL, key)
+                indexes = {}
+                for name, column in cursor.fetchall():
+                    indexes.setdefault(name, []).append(column)
+                cursor.execute(_COLUMNS_SQL, key)
+                columns = {row[0] for row in cursor.fetchall()}
+            self._tables[key] = (indexes, columns)
+        return self._tables[key]
+
+    def advise(self, entries: list, top: int = 10) -> dict:
+        """分析工作负载记录（WorkloadLog.entries() 的结果），返回按估算收益排序的索引建议
+
+        返回:
+            dict:
+            - analyzed: 执行了 EXPLAIN 的语句形态数
+            - skipped: EXPLAIN 失败的语句及原因
+            - proposals: 索引建议，每项包含表、列、DDL、估算收益、已有索引与受益的语句
+        """
+        candidates = {}
+        analyzed, skipped = 0, []
+        for entry in entries:
+            if not entry["sample"]:
+                continue
+            try:
+                plan = self.explain(entry["sample"])
+            except (Error, ValueError, TypeError, IndexError) as e:
+                skipped.append({"sql": entry["digest_text"], "error": str(e)})
+                continue
+            analyzed += 1
+            self.collect(entry, plan, candidates)
+
+        proposals = sorted(candidates.values(), key=lambda proposal: proposal["estimated_rows_saved"],
+                           reverse=True)[:top]
+        for proposal in proposals:
+            proposal["estimated_rows_saved"] = round(proposal["estimated_rows_saved"])
+        log_event("index_advisor", sampled=True, analyzed=analyzed, skipped=len(skipped),
+                  candidates=len(candidates))
+        return {"analyzed": analyzed, "skipped": skipped, "proposals": proposals}
+
+    def collect(self, entry: dict, plan: dict, candidates: dict):
+        """从一条语句的执行计划中收集候选索引，合并到 candidates"""
+        walker = PlanWalker()
+        walker.walk(plan)
+        aliases = table_aliases(entry["sample"])
+        for table, scans in walker.scans:
+            alias = table["table_name"]
+            if alias.startswith("<") or table.get("access_type") in _OPTIMAL_ACCESS:
+                continue  # 派生表、临时表，或已经按主键/唯一键访问
+            per_scan = plan_number(table.get("rows_examined_per_scan", table.get("rows")), 0.0)
+            saved = per_scan * (1 - plan_number(table.get("filtered"), 100.0) / 100) * scans * entry["count"]
+            if saved <= 0:
+                continue  # 没有过滤掉的行，索引无法减少读取
+
+            schema, equalities, ranges = table_predicates(table)
+            alias_schema, table_name = aliases.get(alias.lower(), (None, alias))
+            schema = alias_schema or schema or self.database
+            columns = equalities + ranges[:1]
+            if not columns:
+                continue
+            try:
+                indexes, table_columns = self.table_info(schema, table_name)
+            except Error as e:
+                log_event("index_advisor_table_failed", level=logging.WARNING, table=f"{schema}.{table_name}",
+                          error=str(e))
+                continue
+            # 别名无法对应到实际的表时跳过
+            if not set(columns) <= table_columns or is_covered(columns, len(equalities), indexes):
+                continue
+
+            key = (schema, table_name, frozenset(equalities), tuple(ranges[:1]))
+            proposal = candidates.get(key)
+            if proposal is None:
+                name = index_name(columns, indexes)
+                proposal = candidates[key] = {
+                    "table": f"{schema}.{table_name}",
+                    "columns": columns,
+                    "ddl": "ALTER TABLE {}.{} ADD INDEX {} ({})".format(
+                        _quote(schema), _quote(table_name), _quote(name), ", ".join(_quote(c) for c in columns)),
+                    "estimated_rows_saved": 0.0,
+                    "existing_indexes": indexes,
+                    "queries": [],
+                }
+            proposal["estimated_rows_saved"] += saved
+            proposal["queries"].append({
+                "sql": entry["digest_text"],
+                "count": entry["count"],
+                "avg_ms": entry["avg_ms"],
+                "access_type": table.get("access_type"),
+                "rows_examined_per_scan": per_scan,
+            })
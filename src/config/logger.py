@@ -0,0 +1,57 @@
+import json
+import logging
+import random
+import sys
+
+from .dbconfig import get_logging_config
+
+_logger = None
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON：时间、级别、事件名以及附带的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def get_logger() -> logging.Logger:
+    """获取服务的结构化日志记录器（输出到 stderr，stdio 模式下不干扰协议数据）"""
+    global _logger
+    if _logger is None:
+        config = get_logging_config()
+        logger = logging.getLogger("mysql_mcp_server_pro")
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(JsonFormatter())
+            logger.addHandler(handler)
+        logger.setLevel(config["level"])
+        logger.propagate = False
+        logger.sample_rate = config["sample_rate"]
+        _logger = logger
+    return _logger
+
+
+def log_event(event: str, level: int = logging.INFO, sampled: bool = False, **fields):
+    """记录一条结构化日志
+
+    参数:
+        event (str): 事件名，如 execute_sql、schema_sync
+        level (int): 日志级别
+        sampled (bool): 是否按 LOG_SAMPLE_RATE 采样，用于每次请求都会产生的日志（如 SQL 文本、关键字）；
+            警告及以上级别的日志不采样
+        **fields: 附带的字段
+    """
+    logger = get_logger()
+    if not logger.isEnabledFor(level):
+        return
+    if sampled and level < logging.WARNING and random.random() >= logger.sample_rate:
+        return
+    logger.log(level, event, extra={"fields": fields})
+
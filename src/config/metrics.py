@@ -0,0 +1,164 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 响应大小直方图的桶上界（字节）
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metric:
+    """指标基类：按标签值分组保存数据，渲染为 Prometheus 文本格式"""
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_value(labels, value) for labels, value in items)
+        return lines
+
+    def _render_value(self, labels: tuple, value) -> str:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _render_value(self, labels: tuple, value) -> str:
+        return f"{self.name}{_format_labels(self.labels, labels)} {value:g}"
+
+
+class Histogram(Metric):
+    """累积直方图：每个标签组合保存各桶计数、总和与次数"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            data[0][index] += 1
+            data[1] += value
+            data[2] += 1
+
+    def _render_value(self, labels: tuple, value) -> str:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total:.6f}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """进程内的指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """渲染全部指标（Prometheus 文本格式 0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_DURATION = REGISTRY.register(Histogram(
+    "mcp_tool_duration_seconds", "MCP 工具调用耗时", ("tool", "status")))
+TOOL_ERRORS = REGISTRY.register(Counter(
+    "mcp_tool_errors_total", "MCP 工具调用出错次数（抛出异常或返回出错信息）", ("tool",)))
+TOOL_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "mcp_tool_response_bytes", "MCP 工具返回结果的字节数", ("tool",), SIZE_BUCKETS))
+SCHEMA_STAGE_DURATION = REGISTRY.register(Histogram(
+    "mcp_schema_stage_duration_seconds", "get_schema 各阶段耗时", ("stage",)))
+QUERY_ROUTES = REGISTRY.register(Counter(
+    "mcp_query_routes_total", "配置了从库时语句发往主库或从库的次数", ("target", "destination")))
+
+# 工具返回的文本以这些前缀开头时视为出错（工具内部捕获异常后以文本返回）
+_ERROR_MARKERS = ("执行查询时出错", "执行语句", "权限不足", "批量插入时出错", "读取结果时出错", "已达到资源限制",
+                  "成本检查未通过")
+
+
+def is_error_response(contents) -> bool:
+    """判断工具返回的结果是否为出错信息"""
+    return any(getattr(content, "text", "").startswith(_ERROR_MARKERS) for content in contents)
+
+
+def record_tool_call(tool: str, seconds: float, contents=None, failed: bool = False):
+    """记录一次工具调用的耗时、结果大小和是否出错
+
+    参数:
+        tool (str): 工具名称
+        seconds (float): 耗时（秒）
+        contents: 工具返回的结果，抛出异常时为 None
+        failed (bool): 是否抛出异常
+    """
+    failed = failed or (contents is not None and is_error_response(contents))
+    TOOL_DURATION.observe(tool, "error" if failed else "ok", value=seconds)
+    if failed:
+        TOOL_ERRORS.inc(tool)
+    if contents is not None:
+        size = sum(len(getattr(content, "text", "").encode("utf-8")) for content in contents)
+        TOOL_RESPONSE_BYTES.observe(tool, value=size)
+
+
+def observe_stage(stage: str, seconds: float):
+    """记录 get_schema 某个阶段的耗时"""
+    SCHEMA_STAGE_DURATION.observe(stage, value=seconds)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """统计代码块的耗时，记为 get_schema 的一个阶段"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,297 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error, InterfaceError, OperationalError
+
+from .dbconfig import get_db_config, get_pool_config, resolve_target
+
+
+class PoolTimeoutError(Error):
+    """在等待时间内未能从连接池获取到连接"""
+
+
+class MySQLConnectionPool:
+    """进程级 MySQL 连接池
+
+    - 连接数介于 min_size 与 max_size 之间，超过 max_size 的请求会等待
+    - 空闲超过 idle_timeout 的连接会被关闭（至少保留 min_size 个）
+    - 借出前通过 ping 做健康检查，失效连接自动重连
+    - 使用过程中出现连接级错误的连接会被丢弃，不再放回池中
+    """
+
+    def __init__(self, connect_args: dict, min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300, acquire_timeout: float = 10,
+                 health_check: bool = True, reconnect_attempts: int = 3,
+                 reconnect_delay: float = 1):
+        self.connect_args = connect_args
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check = health_check
+        self.reconnect_attempts = max(1, reconnect_attempts)
+        self.reconnect_delay = reconnect_delay
+
+        self._idle = deque()  # (connection, 归还时间)
+        self._size = 0  # 已打开的连接数（空闲 + 借出）
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "acquired": 0,
+            "released": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "reconnects": 0,
+            "acquire_timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------ 连接管理
+    def _connect(self):
+        """建立新连接，失败时按配置重试"""
+        last_error = None
+        for attempt in range(self.reconnect_attempts):
+            try:
+                return mysql.connector.connect(**self.connect_args)
+            except Error as e:
+                last_error = e
+                if attempt + 1 < self.reconnect_attempts:
+                    time.sleep(self.reconnect_delay)
+        raise last_error
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _prune_idle(self):
+        """关闭超出空闲时长的连接，调用方需持有锁"""
+        now = time.monotonic()
+        expired = []
+        while self._idle and self._size - len(expired) > self.min_size:
+            conn, released_at = self._idle[0]
+            if now - released_at < self.idle_timeout:
+                break
+            self._idle.popleft()
+            expired.append(conn)
+        self._size -= len(expired)
+        self._stats["closed"] += len(expired)
+        return expired
+
+    def warmup(self):
+        """预先建立 min_size 个连接，失败时静默忽略（由首次借用时再重试）"""
+        with self._cond:
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        created = []
+        try:
+            for _ in range(max(missing, 0)):
+                created.append(self._connect())
+        except Error:
+            pass
+        finally:
+            with self._cond:
+                self._size -= max(missing, 0) - len(created)
+                self._stats["created"] += len(created)
+                now = time.monotonic()
+                for conn in created:
+                    self._idle.append((conn, now))
+                self._cond.notify_all()
+
+    def acquire(self, timeout: float = None):
+        """从连接池借出一个连接
+
+        参数:
+            timeout (float): 等待可用连接的最长时间，默认使用 acquire_timeout
+
+        异常:
+            PoolTimeoutError: 超时仍无可用连接时抛出
+            Error: 无法建立数据库连接时抛出
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            if self._closed:
+                raise InterfaceError("连接池已关闭")
+            expired = self._prune_idle()
+            while True:
+                if self._idle:
+                    conn, _ = self._idle.pop()  # 后进先出，优先复用最热的连接
+                    break
+                if self._size < self.max_size:
+                    conn = None
+                    self._size += 1  # 先占位，在锁外建立连接
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["acquire_timeouts"] += 1
+                    raise PoolTimeoutError(f"获取数据库连接超时（{timeout}s），连接池已满: {self.max_size}")
+                self._cond.wait(remaining)
+            waited = time.monotonic() - started
+            self._stats["wait_seconds_total"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+        for stale in expired:
+            self._close_quietly(stale)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._stats["created"] += 1
+            elif self.health_check and not self._is_healthy(conn):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                try:
+                    conn.reconnect(attempts=self.reconnect_attempts, delay=self.reconnect_delay)
+                except Error:
+                    self._close_quietly(conn)
+                    conn = self._connect()
+                with self._cond:
+                    self._stats["reconnects"] += 1
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["acquired"] += 1
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """归还连接，未结束的事务会被回滚；discard=True 时直接关闭连接"""
+        if not discard:
+            try:
+                if conn.unread_result:
+                    conn.consume_results()
+                if conn.in_transaction:
+                    conn.rollback()
+            except Error:
+                discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                self._stats["discarded" if discard else "closed"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._stats["released"] += 1
+            self._cond.notify()
+
+        if discard or self._closed:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """以上下文管理器的方式借用连接，连接级错误会导致该连接被丢弃"""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (OperationalError, InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def kill_query(self, connection_id: int):
+        """在一条独立的连接上中止指定连接当前正在执行的语句
+
+        参数:
+            connection_id (int): 目标连接的线程ID（connection.connection_id）
+        """
+        conn = mysql.connector.connect(**self.connect_args)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"KILL QUERY {int(connection_id)}")
+        finally:
+            self._close_quietly(conn)
+
+    def close(self):
+        """关闭连接池及全部空闲连接"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._stats["closed"] += len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        """返回连接池运行指标，用于容量规划"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+            })
+        acquired = stats["acquired"] or 1
+        stats["avg_wait_seconds"] = round(stats["wait_seconds_total"] / acquired, 6)
+        stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 6)
+        stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 6)
+        return stats
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+_target_locks = {}  # 目标名称 -> 创建该目标连接池时持有的锁
+
+# 传给 mysql.connector.connect 的配置项
+_CONNECT_KEYS = ("host", "port", "user", "password", "database")
+
+
+def get_pool(target: str = None) -> MySQLConnectionPool:
+    """获取数据库目标的进程级共享连接池（首次调用时按配置创建），每个目标使用独立的连接池
+
+    创建与预热（建立 min_size 个连接，可能因重试而较慢）只持有该目标的锁，
+    一个无法连接的目标不会阻塞其他目标获取连接池。
+
+    参数:
+        target (str): 数据库目标名称，默认为 default
+
+    异常:
+        ValueError: 目标不存在或配置缺失时抛出
+    """
+    target = resolve_target(target)
+    pool = _pools.get(target)
+    if pool is None:
+        with _pool_lock:
+            target_lock = _target_locks.setdefault(target, threading.Lock())
+        with target_lock:
+            pool = _pools.get(target)
+            if pool is None:
+                db_config = get_db_config(target)
+                pool = MySQLConnectionPool(
+                    {k: db_config[k] for k in _CONNECT_KEYS},
+                    **get_pool_config(target)
+                )
+                pool.warmup()
+                _pools[target] = pool
+    return pool
+
+
+def get_pools() -> dict:
+    """已创建的连接池，目标名称 -> 连接池"""
+    return dict(_pools)
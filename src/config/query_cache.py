@@ -0,0 +1,220 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .dbconfig import get_query_cache_config
+from .sql_lexer import statement_type
+
+# 可缓存的只读语句：结果只取决于表数据或表结构
+_CACHEABLE_SHOW = re.compile(
+    r"^SHOW\s+(FULL\s+)?(TABLES|DATABASES|SCHEMAS|COLUMNS|FIELDS|INDEX|INDEXES|KEYS|CREATE\s+(TABLE|VIEW))\b",
+    re.IGNORECASE)
+# 结果随时间、会话或随机数变化，或需要加锁读取的语句不缓存
+_VOLATILE = re.compile(
+    r"\b(NOW|SYSDATE|CURDATE|CURTIME|UNIX_TIMESTAMP|RAND|UUID|UUID_SHORT|SLEEP|BENCHMARK|LAST_INSERT_ID|"
+    r"FOUND_ROWS|ROW_COUNT|CONNECTION_ID|USER|SESSION_USER|SYSTEM_USER|DATABASE|SCHEMA|GET_LOCK)\s*\(|"
+    r"\b(CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|CURRENT_USER|LOCALTIME|LOCALTIMESTAMP|UTC_DATE|UTC_TIME|"
+    r"UTC_TIMESTAMP|SQL_NO_CACHE)\b|@|\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b",
+    re.IGNORECASE)
+# 结果是表或库的列表、随 DDL 变化而不针对具体表的语句
+_SCHEMA_LISTING = re.compile(r"^SHOW\s+(FULL\s+)?(TABLES|DATABASES|SCHEMAS)\b", re.IGNORECASE)
+_INFORMATION_SCHEMA = re.compile(r"\bINFORMATION_SCHEMA\b", re.IGNORECASE)
+_STRING_OR_SPACE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`|\s+")
+_IDENTIFIER = r"`[^`]+`|[\w$]+"
+_TABLE_NAME = rf"(?:(?:{_IDENTIFIER})\.)?(?:{_IDENTIFIER})"
+# 单个表名：INSERT INTO t / UPDATE t / TRUNCATE TABLE t / DESCRIBE t / SHOW COLUMNS FROM t 等
+_TABLE_AFTER_KEYWORD = re.compile(
+    rf"\b(?:INTO|UPDATE|TABLE|JOIN|DESCRIBE|DESC|EXPLAIN|ON)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?({_TABLE_NAME})",
+    re.IGNORECASE)
+# FROM 子句可能包含以逗号分隔的多张表：FROM a x, b AS y WHERE ...
+_FROM_CLAUSE = re.compile(
+    r"\bFROM\s+(.+?)(?=\b(?:WHERE|GROUP|ORDER|LIMIT|HAVING|UNION|JOIN|INNER|LEFT|RIGHT|CROSS|NATURAL|STRAIGHT_JOIN|"
+    r"FOR|LOCK|INTO|WINDOW|USING|ON|SET|VALUES|SELECT)\b|[()]|$)",
+    re.IGNORECASE | re.DOTALL)
+_FROM_TABLE = re.compile(rf"^\s*({_TABLE_NAME})")
+_KEYWORDS = {"SELECT", "WHERE", "SET", "VALUES", "LIKE", "IF", "NOT", "EXISTS", "IGNORE", "LOW_PRIORITY",
+             "QUICK", "DELAYED", "HIGH_PRIORITY", "STATUS", "FULL", "EXTENDED", "FORMAT", "ANALYZE", "ALL",
+             "DISTINCT", "DUAL", "FROM", "IN", "LIMIT"}
+
+# 改变表结构或表集合的语句，会同时使 SHOW TABLES 之类不针对具体表的缓存失效
+DDL_OPERATIONS = {"CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME"}
+READ_OPERATIONS = {"SELECT", "SHOW", "DESCRIBE", "EXPLAIN"}
+
+
+def normalize_statement(statement: str) -> str:
+    """规范化语句用作缓存键：去除首尾空白与结尾分号，字符串与标识符之外的连续空白合并为一个空格"""
+    statement = statement.strip().rstrip(";").strip()
+    return _STRING_OR_SPACE.sub(lambda m: " " if m.group(0).isspace() else m.group(0), statement)
+
+
+def is_cacheable(statement: str) -> bool:
+    """判断只读语句的结果是否可以缓存"""
+    operation = statement_type(statement)
+    if operation not in READ_OPERATIONS:
+        return False
+    if operation == "SHOW" and not _CACHEABLE_SHOW.match(statement):
+        return False
+    return not _VOLATILE.search(_strip_literals(statement))
+
+
+def _strip_literals(statement: str) -> str:
+    return re.sub(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"", "''", statement)
+
+
+def _table_key(name: str) -> str:
+    """表名统一为不带库名、不带反引号的小写形式，按表失效时宁可多失效也不漏失效"""
+    return name.rsplit(".", 1)[-1].strip("`").lower()
+
+
+def referenced_tables(statement: str) -> frozenset:
+    """
+    粗略提取语句引用的表名（用于按表失效缓存）。
+    :return: 表名集合（小写、不含库名）；无法确定时返回空集合
+    """
+    statement = _strip_literals(statement)
+    names = [match.group(1) for match in _TABLE_AFTER_KEYWORD.finditer(statement)]
+    for clause in _FROM_CLAUSE.finditer(statement):
+        for part in clause.group(1).split(","):
+            match = _FROM_TABLE.match(part)
+            if match:
+                names.append(match.group(1))
+    return frozenset(key for key in (_table_key(name) for name in names)
+                     if key and key.upper() not in _KEYWORDS)
+
+
+def cache_tags(statement: str) -> frozenset:
+    """
+    只读语句缓存条目的失效标签：引用的表名；表或库的列表以及无法确定引用表的语句带空字符串标签，由 DDL 失效。
+    """
+    if _SCHEMA_LISTING.match(statement):
+        return frozenset([""])
+    tags = referenced_tables(statement)
+    if not tags or _INFORMATION_SCHEMA.search(statement):
+        tags |= {""}
+    return tags
+
+
+class QueryResultCache:
+    """
+    只读语句的结果缓存（LRU + TTL）。
+
+    - 缓存键为 (数据库目标, 库名, 角色, 规范化后的语句, 结果格式)，值为编码后的结果文本
+    - 条目超过 ttl 后失效；总字节数超过 max_bytes 时按最近最少使用淘汰，超过 max_entry_bytes 的结果不缓存
+    - 通过同一工具执行的写语句会使其涉及的表的缓存失效，DDL 还会使不针对具体表的缓存（如 SHOW TABLES）失效；
+      无法确定涉及的表时清空全部缓存
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_entry_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()   # key -> (text, size, tables, expires_at)
+        self._table_keys = {}           # 表名 -> {key}，表名为空字符串时表示不针对具体表的条目
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0,
+                       "invalidations": 0}
+
+    @staticmethod
+    def make_key(target: str, database: str, role: str, statement: str, fmt: str) -> tuple:
+        return target, database, role, normalize_statement(statement), fmt
+
+    def get(self, key):
+        """读取缓存，未命中或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[3] <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, text: str, tables: frozenset):
+        """写入缓存，结果过大时跳过
+
+        参数:
+            tables (frozenset): 失效标签，见 cache_tags
+        """
+        size = len(text.encode("utf-8")) + len(key[2])
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (text, size, tables, time.monotonic() + self.ttl)
+            self._bytes += size
+            for table in tables:
+                self._table_keys.setdefault(table, set()).add(key)
+            self._stats["stores"] += 1
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        text, size, tables, _ = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._table_keys.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._table_keys[table]
+
+    def invalidate_statement(self, statement: str):
+        """写语句执行成功后调用，使其涉及的表的缓存失效"""
+        tables = referenced_tables(statement)
+        if not tables:
+            self.clear()
+            return
+        if statement_type(statement) in DDL_OPERATIONS:
+            tables = tables | {""}
+        with self._lock:
+            for table in tables:
+                for key in list(self._table_keys.get(table, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._table_keys.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """返回缓存指标（命中率、条目数、占用字节数等）"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    """获取进程级共享的结果缓存，未启用时返回 None"""
+    global _cache
+    if _cache is None:
+        config = get_query_cache_config()
+        if not config["enabled"]:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryResultCache(config["ttl"], config["max_bytes"], config["max_entry_bytes"])
+    return _cache
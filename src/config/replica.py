@@ -0,0 +1,278 @@
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import ClassVar, Dict, Type
+
+import mysql.connector
+from mysql.connector import Error
+
+from .dbconfig import get_pool_config, get_replica_config, resolve_target
+from .logger import log_event
+from .metrics import QUERY_ROUTES
+from .pool import MySQLConnectionPool, get_pool
+from .query_cache import READ_OPERATIONS
+from .sql_lexer import is_locking_read
+
+# 依次尝试的复制状态语句：MySQL 8.0.22 起为 SHOW REPLICA STATUS，更早的版本只支持 SHOW SLAVE STATUS
+_REPLICA_STATUS_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+)
+
+
+def read_replication_lag(conn):
+    """读取从库的复制延迟（秒）
+
+    返回:
+        float: 复制延迟；没有复制状态（复制未配置或已被 RESET）或复制 SQL 线程未运行时返回 None
+    """
+    with conn.cursor(dictionary=True) as cursor:
+        for index, (query, column) in enumerate(_REPLICA_STATUS_QUERIES):
+            try:
+                cursor.execute(query)
+            except Error:
+                if index + 1 == len(_REPLICA_STATUS_QUERIES):
+                    raise
+                continue
+            rows = cursor.fetchall()
+            if not rows:
+                return None
+            lag = rows[0].get(column)
+            return None if lag is None else float(lag)
+
+
+def is_replica_safe(statement) -> bool:
+    """语句能否在从库执行：只读语句，且不是 FOR UPDATE 等加锁读"""
+    return statement.operation in READ_OPERATIONS and not is_locking_read(statement.text)
+
+
+class Replica:
+    """一个从库：独立的连接池，以及最近一次检查的复制延迟"""
+
+    def __init__(self, name: str, pool: MySQLConnectionPool):
+        self.name = name
+        self.pool = pool
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self._check_lock = threading.Lock()
+        self._checker = None
+        self._logged_error = None
+
+    def refresh(self, interval: float, timeout: float = 2):
+        """距上次检查超过 interval 秒时在后台线程中重新读取复制延迟，不阻塞读请求
+
+        检查完成前继续使用上次的结果，首次检查完成前从库视为不可用；其他线程正在检查时直接返回。
+        """
+        if self.checked_at is not None and time.monotonic() - self.checked_at < interval:
+            return
+        if not self._check_lock.acquire(blocking=False):
+            return
+        self._checker = threading.Thread(target=self._check, args=(timeout,), daemon=True,
+                                         name=f"replica-check-{self.name}")
+        self._checker.start()
+
+    def _check(self, timeout: float):
+        """用单独的短超时连接读取复制延迟，只尝试一次，不占用从库连接池也不使用连接池的重连重试"""
+        conn = None
+        try:
+            conn = mysql.connector.connect(**dict(self.pool.connect_args, connection_timeout=timeout))
+            self.lag = read_replication_lag(conn)
+            self.error = None if self.lag is not None else "复制未运行或没有复制状态"
+        except Error as e:
+            self.lag, self.error = None, str(e)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            if self.error is not None and self.error != self._logged_error:
+                log_event("replica_check_failed", level=logging.WARNING, replica=self.name, error=self.error)
+            self._logged_error = self.error
+            self.checked_at = time.monotonic()
+            self._check_lock.release()
+
+    def available(self, max_lag: float) -> bool:
+        return self.error is None and self.lag is not None and self.lag <= max_lag
+
+    def stats(self) -> dict:
+        return {"lag": self.lag, "error": self.error, "pool": self.pool.stats()}
+
+
+class LoadBalancerRegistry:
+    """从库负载均衡策略注册表"""
+
+    _balancers: ClassVar[Dict[str, Type['LoadBalancer']]] = {}
+
+    @classmethod
+    def register(cls, balancer_class: Type['LoadBalancer']) -> Type['LoadBalancer']:
+        cls._balancers[balancer_class.name] = balancer_class
+        return balancer_class
+
+    @classmethod
+    def get_balancer(cls, name: str) -> 'LoadBalancer':
+        """创建负载均衡策略实例
+
+        异常:
+            ValueError: 当策略不存在时抛出
+        """
+        if name not in cls._balancers:
+            raise ValueError(f"未知的从库负载均衡策略: {name}，可选: {', '.join(cls._balancers)}")
+        return cls._balancers[name]()
+
+
+class LoadBalancer:
+    """从库负载均衡策略基类：从可用的从库中选择一个"""
+
+    name: str = ""
+
+    def __init_subclass__(cls, **kwargs):
+        """子类初始化时自动注册到策略注册表"""
+        super().__init_subclass__(**kwargs)
+        if cls.name:
+            LoadBalancerRegistry.register(cls)
+
+    def choose(self, replicas: list) -> Replica:
+        raise NotImplementedError
+
+
+class RoundRobinBalancer(LoadBalancer):
+    """轮询"""
+    name = "round_robin"
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def choose(self, replicas: list) -> Replica:
+        return replicas[next(self._counter) % len(replicas)]
+
+
+class RandomBalancer(LoadBalancer):
+    """随机"""
+    name = "random"
+
+    def choose(self, replicas: list) -> Replica:
+        return random.choice(replicas)
+
+
+class LeastConnectionsBalancer(LoadBalancer):
+    """选择借出连接数最少的从库"""
+    name = "least_connections"
+
+    def choose(self, replicas: list) -> Replica:
+        return min(replicas, key=lambda replica: replica.pool.stats()["in_use"])
+
+
+class ReplicaRouter:
+    """
+    数据库目标的读写分离路由。
+
+    - 只读语句按负载均衡策略发往复制延迟不超过 max_lag 的从库，没有可用从库时发往主库
+    - 复制延迟每 check_interval 秒在后台检查一次（连接超时 check_timeout 秒），没有复制状态的从库视为不可用
+    - 写语句、事务与加锁读发往主库
+    - 启用 read_your_writes 时，会话写入后的一段时间内（max_lag + check_interval 秒，即可用从库可能落后的最长时间）
+      该会话的读语句也发往主库
+    """
+
+    def __init__(self, target: str, primary: MySQLConnectionPool, replicas: list, balancer: LoadBalancer,
+                 max_lag: float = 30, check_interval: float = 5, read_your_writes: bool = True,
+                 check_timeout: float = 2):
+        self.target = target
+        self.primary = primary
+        self.replicas = replicas
+        self.balancer = balancer
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.read_your_writes = read_your_writes
+        self.check_timeout = check_timeout
+        self.sticky_seconds = max_lag + check_interval
+        self._writes = {}  # 会话 -> 最近一次写入的时间
+        self._lock = threading.Lock()
+
+    def route(self, session: str, read_only: bool) -> MySQLConnectionPool:
+        """选择执行语句的连接池（在数据库线程中调用，复制延迟过期时触发后台检查，不在此等待）
+
+        参数:
+            session (str): 会话标识
+            read_only (bool): 语句是否都可以在从库执行
+        """
+        if read_only and not self._is_sticky(session):
+            for replica in self.replicas:
+                replica.refresh(self.check_interval, self.check_timeout)
+            available = [replica for replica in self.replicas if replica.available(self.max_lag)]
+            if available:
+                replica = self.balancer.choose(available)
+                QUERY_ROUTES.inc(self.target, "replica")
+                return replica.pool
+            log_event("replica_unavailable", level=logging.WARNING, sampled=True, target=self.target)
+        QUERY_ROUTES.inc(self.target, "primary")
+        return self.primary
+
+    def _is_sticky(self, session: str) -> bool:
+        if not self.read_your_writes:
+            return False
+        with self._lock:
+            written_at = self._writes.get(session)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def record_write(self, session: str):
+        """记录会话的写入，之后一段时间内该会话的读语句发往主库"""
+        if not self.read_your_writes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes[session] = now
+            # 清理已过期的会话，避免会话很多时持续增长
+            expired = [key for key, written_at in self._writes.items() if now - written_at >= self.sticky_seconds]
+            for key in expired:
+                del self._writes[key]
+
+    def stats(self) -> dict:
+        return {replica.name: replica.stats() for replica in self.replicas}
+
+
+_routers = {}
+_router_lock = threading.Lock()
+
+
+def get_router(target: str = None):
+    """获取数据库目标的读写分离路由，没有配置从库时返回 None"""
+    target = resolve_target(target)
+    if target not in _routers:
+        # 主库连接池的创建与预热可能较慢，在全局锁之外进行
+        primary = get_pool(target)
+        with _router_lock:
+            if target not in _routers:
+                config = get_replica_config(target)
+                router = None
+                if config["replicas"]:
+                    pool_config = get_pool_config(target)
+                    replicas = [
+                        Replica(replica["name"], MySQLConnectionPool(
+                            {k: v for k, v in replica.items() if k != "name"}, **pool_config))
+                        for replica in config["replicas"]
+                    ]
+                    router = ReplicaRouter(target, primary, replicas,
+                                           LoadBalancerRegistry.get_balancer(config["policy"]),
+                                           config["max_lag"], config["check_interval"], config["read_your_writes"],
+                                           config["check_timeout"])
+                _routers[target] = router
+    return _routers[target]
+
+
+def route_pool(target: str, session: str, read_only: bool) -> MySQLConnectionPool:
+    """选择执行语句的连接池：配置了从库时读写分离，否则为数据库目标的连接池"""
+    router = get_router(target)
+    if router is None:
+        return get_pool(target)
+    return router.route(session, read_only)
+
+
+def record_write(target: str, session: str):
+    """记录会话在数据库目标上的写入（用于读写分离的 read-your-writes）"""
+    router = get_router(target)
+    if router is not None:
+        router.record_write(session)
@@ -0,0 +1,255 @@
+import math
+import secrets
+import threading
+import time
+
+from mysql.connector import Error
+
+from .dbconfig import get_result_config
+
+# 每次从服务端读取的行数，读取粒度越小内存越平稳
+FETCH_BATCH_SIZE = 500
+# 结果集连接的 net_write_timeout 在空闲超时之外额外保留的秒数
+NET_WRITE_TIMEOUT_MARGIN = 30
+
+
+def estimate_row_bytes(row) -> int:
+    """粗略估算一行数据编码为文本后的字节数（含分隔符），用于分页字节预算"""
+    size = len(row)
+    for value in row:
+        if value is None:
+            size += 4
+        elif isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        else:
+            size += len(str(value))
+    return size
+
+
+def page_limits(arguments: dict) -> tuple:
+    """读取工具参数中的分页行数与字节数，未传入时使用 RESULT_PAGE_ROWS / RESULT_PAGE_BYTES
+
+    异常:
+        ValueError: 行数或字节数不是正整数时抛出
+    """
+    config = get_result_config()
+    page_rows = int(arguments.get("page_rows") or config["page_rows"])
+    page_bytes = int(arguments.get("page_bytes") or config["page_bytes"])
+    if page_rows < 1:
+        raise ValueError("page_rows 必须大于0")
+    if page_bytes < 1:
+        raise ValueError("page_bytes 必须大于0")
+    return page_rows, page_bytes
+
+
+def extend_net_write_timeout(conn, ttl: float) -> int:
+    """调大连接的 net_write_timeout，使其不小于结果集的空闲超时
+
+    非缓冲结果集在两次续读之间停留在服务端，服务端发送被阻塞超过 net_write_timeout（默认 60 秒）后会中止连接，
+    续读令牌尚未过期时下一次 fetch_more 就会因连接丢失而失败。
+
+    返回:
+        int: 原来的 net_write_timeout，归还连接前需用 restore_net_write_timeout 恢复
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT @@SESSION.net_write_timeout")
+        previous = int(cursor.fetchone()[0])
+        seconds = max(previous, math.ceil(ttl) + NET_WRITE_TIMEOUT_MARGIN)
+        if seconds != previous:
+            cursor.execute(f"SET SESSION net_write_timeout = {seconds}")
+    return previous
+
+
+def restore_net_write_timeout(conn, seconds: int) -> bool:
+    """恢复连接的 net_write_timeout（先丢弃未读完的结果），失败时返回 False（调用方应丢弃该连接）"""
+    try:
+        if conn.unread_result:
+            conn.consume_results()
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET SESSION net_write_timeout = {int(seconds)}")
+        return True
+    except Error:
+        return False
+
+
+class ResultStream:
+    """一个未读完的服务端（非缓冲）结果集
+
+    结果集持有从连接池借出的连接，直到读完、关闭或超时后才归还。
+    max_rows 为整个结果集（跨全部分页）最多返回的行数，0 表示不限制；达到后 limited 置为 True，结果集应被关闭。
+    net_write_timeout 为连接原来的 net_write_timeout（见 extend_net_write_timeout），归还连接前恢复。
+    """
+
+    def __init__(self, pool, conn, cursor, columns: list, statement: str, fmt: str = "csv", target: str = None,
+                 max_rows: int = 0, net_write_timeout: int = None):
+        self.pool = pool
+        self.target = target
+        self.conn = conn
+        self.cursor = cursor
+        self.columns = columns
+        self.statement = statement
+        self.fmt = fmt
+        self.max_rows = max_rows
+        self.net_write_timeout = net_write_timeout
+        self.rows_read = 0
+        self.exhausted = False
+        self.limited = False
+        self.last_access = time.monotonic()
+        self.lock = threading.Lock()
+        self._pending = []  # 上一页为判断是否还有数据而多读出的行
+        self._closed = False
+
+    def read_page(self, max_rows: int, max_bytes: int) -> list:
+        """读取下一页数据，行数和估算字节数都不超过预算（至少返回一行）
+
+        返回:
+            list: 本页的原始行数据；读到结果集末尾时 exhausted 置为 True
+        """
+        self.last_access = time.monotonic()
+        if self.max_rows:
+            max_rows = min(max_rows, self.max_rows - self.rows_read)
+        page, page_bytes = [], 0
+        while len(page) < max_rows:
+            if not self._pending:
+                if self.exhausted:
+                    break
+                self._pending = self.cursor.fetchmany(min(FETCH_BATCH_SIZE, max_rows - len(page) + 1))
+                if not self._pending:
+                    self.exhausted = True
+                    break
+                self._pending.reverse()
+            row_bytes = estimate_row_bytes(self._pending[-1])
+            if page and page_bytes + row_bytes > max_bytes:
+                break
+            page.append(self._pending.pop())
+            page_bytes += row_bytes
+
+        # 预读一行，判断结果集是否已经读完，避免返回一个永远为空的续读令牌
+        if not self._pending and not self.exhausted:
+            row = self.cursor.fetchone()
+            if row is None:
+                self.exhausted = True
+            else:
+                self._pending.append(row)
+
+        self.rows_read += len(page)
+        self.limited = bool(self.max_rows) and self.rows_read >= self.max_rows and not self.exhausted
+        return page
+
+    def close(self):
+        """关闭结果集并归还连接；未读完的结果集直接丢弃连接，避免把剩余数据全部读回来"""
+        if self._closed:
+            return
+        self._closed = True
+        discard = not self.exhausted
+        if not discard:
+            try:
+                self.cursor.close()
+            except Exception:
+                discard = True
+        if not discard and self.net_write_timeout is not None:
+            discard = not restore_net_write_timeout(self.conn, self.net_write_timeout)
+        self.pool.release(self.conn, discard=discard)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class ResultStreamRegistry:
+    """按续读令牌管理未读完的结果集
+
+    空闲超时的结果集由后台定时器（与 QueryHandle 的看门狗相同，使用 threading.Timer）关闭并归还连接，
+    不依赖后续请求触发；有打开的结果集时定时器在最早到期的时间点运行。
+    """
+
+    def __init__(self, ttl: float, max_open: int):
+        self.ttl = ttl
+        self.max_open = max_open
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.disabled_reason = None  # 不支持流式读取时的原因，如多进程 HTTP 模式下续读请求可能落到其他进程
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, stream in self._streams.items()
+                       if not stream.lock.locked() and now - stream.last_access > self.ttl]
+            streams = [self._streams.pop(token) for token in expired]
+        for stream in streams:
+            stream.close()
+
+    def _schedule_reaper(self):
+        """在最早到期的结果集超时后运行定时器，需持有 self._lock"""
+        if self._reaper is not None or not self._streams:
+            return
+        deadline = min(stream.last_access for stream in self._streams.values()) + self.ttl
+        self._reaper = threading.Timer(max(deadline - time.monotonic(), 0) + 0.05, self._reap)
+        self._reaper.daemon = True
+        self._reaper.start()
+
+    def _reap(self):
+        try:
+            self._expire()
+        finally:
+            with self._lock:
+                self._reaper = None
+                self._schedule_reaper()
+
+    def can_open(self) -> bool:
+        """是否还可以再保持一个未读完的结果集"""
+        self._expire()
+        with self._lock:
+            return len(self._streams) < self.max_open
+
+    def register(self, stream: ResultStream) -> str:
+        """登记未读完的结果集，返回续读令牌"""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._streams[token] = stream
+            self._schedule_reaper()
+        return token
+
+    def get(self, token: str):
+        """根据令牌获取结果集，令牌不存在或已过期时返回 None
+
+        取出时即刷新最近访问时间，避免在调用方读取之前被其他线程判定为超时而关闭
+        """
+        self._expire()
+        with self._lock:
+            stream = self._streams.get(token)
+            if stream is not None:
+                stream.last_access = time.monotonic()
+            return stream
+
+    def close(self, token: str):
+        """关闭并移除令牌对应的结果集"""
+        with self._lock:
+            stream = self._streams.pop(token, None)
+        if stream is not None:
+            stream.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open_streams": len(self._streams), "max_open": self.max_open}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_stream_registry() -> ResultStreamRegistry:
+    """获取进程级共享的结果集注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                config = get_result_config()
+                _registry = ResultStreamRegistry(config["ttl"], config["max_open"])
+    return _registry
+
+
+def disable_streams(reason: str):
+    """在当前进程中禁用流式读取（续读令牌只在打开结果集的进程中有效）"""
+    get_stream_registry().disabled_reason = reason
@@ -1,286 +1,345 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
 from typing import Sequence
 
 from config import get_db_config
 import jieba
 from mcp.types import TextContent
-from sklearn.feature_extraction.text import TfidfVectorizer
-import mysql.connector
-from neo4j import GraphDatabase
 
-from config.dbconfig import get_neo4j_config
+from config.dbconfig import DEFAULT_TARGET, get_import_config, get_target_names, get_warmup_config, resolve_target
+from config.pool import get_pool
+from config.executor import run_blocking
+from config.logger import log_event
+from config.metrics import timed_stage
+from config.warmup import Warmup
 
-from wordprocess.chinese_wordnet import get_synonyms, is_semantically_similar
+from config.schema_index import comment_fragments, get_comment_index
+from config.schema_snapshot import get_schema_snapshot, invalidate_schema_snapshot
+from config.schema_store import get_schema_store
+from wordprocess.chinese_wordnet import get_model, get_wordnet
 
+# 后台周期性同步 schema 的线程；同一时刻只允许一次同步
+_sync_thread = None
+_sync_stop = threading.Event()
+_sync_lock = threading.Lock()
 
-def init_neo4j_graph():
+
+def init_neo4j_graph(mode=None, target=None):
     """
-    将 MySQL schema 导入 Neo4j，构建图模型。
+    将 MySQL schema 导入 schema 图存储（SCHEMA_STORE 选择 Neo4j 或内嵌存储），构建图模型。
+    :param mode: incremental 按表指纹只同步新增、变更和删除的表；full 全量导入。默认取 SCHEMA_SYNC_MODE
+    :param target: 数据库目标名称，默认为 default
     """
+    mode = mode or get_import_config()["sync_mode"]
+    with _sync_lock:
+        _sync_neo4j_graph(mode, resolve_target(target))
 
 
+def init_schema_graphs(mode=None):
+    """
+    依次将全部数据库目标的 schema 导入各自的 schema 图存储，单个目标失败不影响其他目标。
+    :return: 导入失败的目标名称 -> 错误信息
+    """
+    errors = {}
+    for target in get_target_names():
+        try:
+            init_neo4j_graph(mode, target)
+        except Exception as e:
+            log_event("schema_sync_failed", level=logging.ERROR, target=target, error=str(e))
+            errors[target] = str(e)
+    return errors
+
+
+def _sync_neo4j_graph(mode, target):
+    started = time.perf_counter()
+    tables, columns, foreign_keys = extract_mysql_schema(target)
+    log_event("schema_extracted", target=target, tables=len(tables), columns=len(columns),
+              foreign_keys=len(foreign_keys), seconds=round(time.perf_counter() - started, 3))
+
+    started = time.perf_counter()
+    comments = [table['TABLE_COMMENT'] for table in tables] + [column['COLUMN_COMMENT'] for column in columns]
+    get_comment_index(comment_fragments(comments), target)
+    log_event("comment_index_built", target=target, seconds=round(time.perf_counter() - started, 3))
+
+    store = get_schema_store(target)
+    if mode == "full":
+        started = time.perf_counter()
+        store.build(tables, columns, foreign_keys)
+        invalidate_schema_snapshot(target)
+        log_event("schema_graph_built", target=target, store=store.name,
+                  seconds=round(time.perf_counter() - started, 3))
+        return
+
+    result = store.sync(tables, columns, foreign_keys)
+    if result["added"] or result["updated"] or result["removed"]:
+        invalidate_schema_snapshot(target)
+    log_event("schema_graph_synced", target=target, store=store.name, seconds=result["seconds"],
+              added=len(result["added"]),
+              updated=len(result["updated"]), removed=len(result["removed"]), unchanged=result["unchanged"])
+
+
+def start_schema_sync(interval=None):
+    """
+    启动后台线程，按固定间隔依次增量同步全部数据库目标的 schema，服务在同步期间照常处理请求。
+    :param interval: 同步间隔（秒），默认取 SCHEMA_SYNC_INTERVAL；不大于 0 时不启动
+    """
+    global _sync_thread
+    interval = get_import_config()["sync_interval"] if interval is None else interval
+    if interval <= 0 or (_sync_thread is not None and _sync_thread.is_alive()):
+        return
 
-    print("Extracting MySQL schema...")
-    tables, columns, foreign_keys = extract_mysql_schema()
-    print("Finished extracting MySQL schema")
-    print("Building Neo4j graph model...")
-    build_neo4j_graph(tables, columns, foreign_keys)
-    print("Finished building Neo4j graph model")
+    def sync_loop():
+        while not _sync_stop.wait(interval):
+            init_schema_graphs("incremental")
 
+    _sync_stop.clear()
+    _sync_thread = threading.Thread(target=sync_loop, name="schema-sync", daemon=True)
+    _sync_thread.start()
 
 
-# ==================== Step 1: 解析 MySQL Schema ====================
-def extract_mysql_schema():
+def stop_schema_sync():
     """
-    提取 MySQL 数据库的表、字段、注释和外键关系。
+    停止后台 schema 同步线程。
     """
-    mysql_config = get_db_config()
-    connection = mysql.connector.connect(**{k: v for k, v in mysql_config.items() if k != "role"})
-    cursor = connection.cursor(dictionary=True)
-
-    # 获取表注释
-    cursor.execute("""
-        SELECT TABLE_NAME, TABLE_COMMENT 
-        FROM INFORMATION_SCHEMA.TABLES 
-        WHERE TABLE_SCHEMA = %s ;
-    """, (mysql_config['database'],))
-    tables = cursor.fetchall()
-
-    # 获取字段注释
-    cursor.execute("""
-        SELECT TABLE_NAME, COLUMN_NAME, COLUMN_COMMENT, DATA_TYPE 
-        FROM INFORMATION_SCHEMA.COLUMNS 
-        WHERE TABLE_SCHEMA = %s AND COLUMN_NAME NOT IN ('CREATE_USER','CREATE_TIME','UPDATE_USER','UPDATE_TIME')
-    """, (mysql_config['database'],))
-    columns = cursor.fetchall()
-
-    # 获取外键关系
-    cursor.execute("""
-        SELECT TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
-        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-        WHERE TABLE_SCHEMA = %s AND REFERENCED_TABLE_NAME IS NOT NULL;
-    """, (mysql_config['database'],))
-    foreign_keys = cursor.fetchall()
-
-    cursor.close()
-    connection.close()
-
-    for table in tables:
-        if table['TABLE_COMMENT']:
-            jieba.add_word(table['TABLE_COMMENT'].removesuffix('表').removesuffix('信息'))
-
-    for column in columns:
-        if column['COLUMN_COMMENT']:
-            jieba.add_word(column['COLUMN_COMMENT'])
+    _sync_stop.set()
 
-    return tables, columns, foreign_keys
 
+_warmup = None
+_warmup_lock = threading.Lock()
 
-# ==================== Step 2: 构建 Neo4j 图模型 ====================
-def build_neo4j_graph(tables, columns, foreign_keys):
+
+def get_schema_warmup():
+    """
+    获取 schema 检索的预热任务：加载分词词典、WordNet 与语义模型（全部数据库目标共用一份，在默认组中执行），
+    再为每个数据库目标创建连接池、同步 schema 到该目标的 schema 图存储并加载 schema 快照，
+    最后按 SCHEMA_SYNC_INTERVAL 启动后台同步。每个数据库目标的任务在以目标名为组名的独立线程中执行，
+    一个目标同步缓慢不会阻塞其他目标；非默认目标的任务名带有 ":目标名" 后缀。
+    SCHEMA_WARMUP_SYNC 关闭时（多进程模式的工作进程）不同步，只从共享的 schema 图存储加载快照，
+    并将快照中的注释加入分词词典。
     """
-    将 MySQL schema 导入 Neo4j，构建图模型。
+    global _warmup
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                sync = get_warmup_config()["sync"]
+                warmup = Warmup("schema")
+                warmup.add_task("jieba", jieba.initialize)
+                warmup.add_task("wordnet", get_wordnet)
+                warmup.add_task("embedding_model", get_model)
+                for target in get_target_names():
+                    suffix = "" if target == DEFAULT_TARGET else f":{target}"
+                    add_task = functools.partial(warmup.add_task, group=target)
+                    add_task(f"mysql_pool{suffix}", functools.partial(get_pool, target))
+                    if sync:
+                        add_task(f"schema_graph{suffix}", functools.partial(init_neo4j_graph, target=target))
+                        add_task(f"schema_snapshot{suffix}", functools.partial(get_schema_snapshot, target))
+                    else:
+                        add_task(f"schema_snapshot{suffix}", functools.partial(get_schema_snapshot, target))
+                        add_task(f"schema_words{suffix}", functools.partial(load_snapshot_words, target))
+                if sync:
+                    warmup.add_task("schema_sync", start_schema_sync)
+                _warmup = warmup
+    return _warmup
+
+
+def start_schema_warmup():
     """
+    服务启动时在后台开始预热（SCHEMA_WARMUP 关闭时跳过，改为第一次调用 get_schema 时才开始）。
+    """
+    if get_warmup_config()["enabled"]:
+        get_schema_warmup().start()
+
 
-    neo4j_config = get_neo4j_config()
+def _warmup_groups(target):
+    # 共用的模型任务（默认组）与该目标的任务；未指定目标时等待全部组
+    return None if target is None else (None, target)
 
-    driver = GraphDatabase.driver(neo4j_config['neo4j_uri'], auth=(neo4j_config['neo4j_user'], neo4j_config['neo4j_password']))
 
-    with driver.session() as session:
-        # 清空现有数据（可选）
-        # session.run("MATCH (n) DETACH DELETE n")
+async def wait_schema_warmup(timeout, target=None):
+    """
+    等待 schema 预热结束，不占用线程池。
+    :param target: 只等待共用的模型与该数据库目标的任务；默认等待全部任务
+    :return: 预热已结束返回 True，超时返回 False
+    """
+    warmup = get_schema_warmup()
+    warmup.start()
+    groups = _warmup_groups(target)
+    deadline = time.monotonic() + timeout
+    while not (warmup.done if groups is None else warmup.groups_done(groups)):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(0.1)
+    return True
 
-        # 创建表节点（包括表注释）
-        for table in tables:
-            table_name = table['TABLE_NAME']
-            table_comment = table['TABLE_COMMENT']
 
-            session.run("""
-                MERGE (table:Table {name: $table_name})
-                ON CREATE SET table.comment = $table_comment
-            """, table_name=table_name, table_comment=table_comment)
+# ==================== Step 1: 解析 MySQL Schema ====================
+def extract_mysql_schema(target=None):
+    """
+    提取 MySQL 数据库的表、字段、注释和外键关系。
+    :param target: 数据库目标名称，默认为 default
+    """
+    mysql_config = get_db_config(target)
+    with get_pool(target).connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+
+        # 获取表注释
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_COMMENT 
+            FROM INFORMATION_SCHEMA.TABLES 
+            WHERE TABLE_SCHEMA = %s ;
+        """, (mysql_config['database'],))
+        tables = cursor.fetchall()
+
+        # 获取字段注释
+        cursor.execute("""
+            SELECT TABLE_NAME, COLUMN_NAME, COLUMN_COMMENT, DATA_TYPE 
+            FROM INFORMATION_SCHEMA.COLUMNS 
+            WHERE TABLE_SCHEMA = %s AND COLUMN_NAME NOT IN ('CREATE_USER','CREATE_TIME','UPDATE_USER','UPDATE_TIME')
+        """, (mysql_config['database'],))
+        columns = cursor.fetchall()
+
+        # 获取外键关系
+        cursor.execute("""
+            SELECT TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = %s AND REFERENCED_TABLE_NAME IS NOT NULL;
+        """, (mysql_config['database'],))
+        foreign_keys = cursor.fetchall()
+
+        cursor.close()
+
+    add_schema_words([table['TABLE_COMMENT'] for table in tables], [column['COLUMN_COMMENT'] for column in columns])
+
+    return tables, columns, foreign_keys
 
-        # 创建字段节点（包括字段注释）
-        for column in columns:
-            table_name = column['TABLE_NAME']
-            field_name = column['COLUMN_NAME']
-            field_comment = column['COLUMN_COMMENT']
-            data_type = column['DATA_TYPE']
 
-            session.run("""
-                MERGE (field:Field {name: $field_name})
-                ON CREATE SET field.comment = $field_comment, field.data_type = $data_type
-                WITH field
-                MATCH (table:Table {name: $table_name})
-                MERGE (table)-[:HAS_FIELD]->(field)
-            """, table_name=table_name, field_name=field_name, field_comment=field_comment, data_type=data_type)
+def add_schema_words(table_comments, column_comments):
+    """将表注释与字段注释加入 jieba 词典，使分词结果能与注释对齐"""
+    for comment in table_comments:
+        if comment:
+            jieba.add_word(comment.removesuffix('表').removesuffix('信息'))
 
-        # 创建外键关系
-        for fk in foreign_keys:
-            table_name = fk['TABLE_NAME']
-            column_name = fk['COLUMN_NAME']
-            referenced_table = fk['REFERENCED_TABLE_NAME']
-            referenced_column = fk['REFERENCED_COLUMN_NAME']
+    for comment in column_comments:
+        if comment:
+            jieba.add_word(comment)
 
-            session.run("""
-                MATCH (table1:Table {name: $table_name}), (table2:Table {name: $referenced_table})
-                MERGE (table1)-[:FOREIGN_KEY {column: $column_name, references: $referenced_column}]->(table2)
-            """, table_name=table_name, referenced_table=referenced_table,
-                        column_name=column_name, referenced_column=referenced_column)
 
-    driver.close()
+def load_snapshot_words(target=None):
+    """不在本进程同步 schema 时，从 schema 快照中读取注释加入 jieba 词典"""
+    fields = get_schema_snapshot(target).fields
+    add_schema_words({field[1] for field in fields}, {field[3] for field in fields})
 
 
-def extract_keywords(query):
+def extract_keywords(query, target=None):
     """
-    提取用户查询中的关键字，并与 Neo4j 中的 schema（包括表名、字段名和注释）进行匹配。
+    提取用户查询中的关键字，并与 schema 快照（包括表名、字段名和注释）进行匹配。
     :param query: 用户的自然语言查询
+    :param target: 数据库目标名称，默认为 default
     :return: 相关关键字列表
     """
     # Step 1: 使用 jieba 分词并提取名词
-    words = jieba.lcut(query)
+    with timed_stage("jieba"):
+        words = jieba.lcut(query)
     noun_words = [word for word in words if len(word) > 1]  # 过滤掉单字词
 
-    # Step 2: 使用 TF-IDF 提取关键词
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform([query])
-    feature_names = vectorizer.get_feature_names_out()
-    tfidf_scores = tfidf_matrix.toarray()[0]
+    # Step 2: 使用 TF-IDF 提取关键词（sklearn 导入较慢，首次使用时才导入）
+    with timed_stage("tfidf"):
+        from sklearn.feature_extraction.text import TfidfVectorizer
 
-    # 按 TF-IDF 分数排序，提取前 N 个关键词
-    top_n = 5  # 提取前 5 个关键词
-    top_keywords = [feature_names[i] for i in tfidf_scores.argsort()[-top_n:][::-1]]
+        vectorizer = TfidfVectorizer()
+        tfidf_matrix = vectorizer.fit_transform([query])
+        feature_names = vectorizer.get_feature_names_out()
+        tfidf_scores = tfidf_matrix.toarray()[0]
+
+        # 按 TF-IDF 分数排序，提取前 N 个关键词
+        top_n = 5  # 提取前 5 个关键词
+        top_keywords = [feature_names[i] for i in tfidf_scores.argsort()[-top_n:][::-1]]
 
     # 合并分词结果和 TF-IDF 关键词
     keywords = list(set(noun_words + top_keywords))
 
-    print('拆分关键字：')
-    print(keywords)
-
-    # Step 3: 从 Neo4j 获取表名、字段名和注释
-    relevant_keywords = []
-    neo4j_config = get_neo4j_config()
-    driver = GraphDatabase.driver(uri = neo4j_config['neo4j_uri'], auth=(neo4j_config['neo4j_user'], neo4j_config['neo4j_password']))
-    with driver.session() as session:
-        result = session.run("""
-            MATCH (t:Table)-[:HAS_FIELD]->(f:Field)
-            RETURN t.name AS table_name, t.comment AS table_comment, 
-                   f.name AS field_name, f.comment AS field_comment
-        """)
-        schema_terms = []
-        for record in result:
-            table_name = record["table_name"]
-            table_comment = record["table_comment"] or ""
-            field_name = record["field_name"]
-            field_comment = record["field_comment"] or ""
-
-            # 添加表名和字段名
-            schema_terms.append((table_name, "table", table_comment))
-            schema_terms.append((field_name, "field", field_comment))
-
-        # Step 4: 匹配关键词
-        matched_terms = []
-        for keyword in keywords:
-            for term, term_type, comment in schema_terms:
-                # 匹配表名/字段名或注释
-                keyword_synonyms = get_synonyms(keyword.lower())
-                if (keyword.lower() in term.lower() or
-                        any(keyword.lower() == word.strip().lower() for word in comment.split(',')) or
-                        any(word.strip().lower() in keyword_synonyms for word in comment.split(',')) or
-                        any(is_semantically_similar(keyword, word.strip()) for word in comment.split(','))):
-                    matched_terms.append((term, term_type, comment))
-
-        if matched_terms:
-            matched_terms = list(set(matched_terms))
-        print('匹配到的关键字：')
-        print(matched_terms)
-
-        # Step 5: 去重并按优先级排序
-        unique_terms = {}
-        for term, term_type, comment in matched_terms:
-            if term not in unique_terms:
-                # 赋予不同权重：表名 > 字段名 > 注释
-                weight = 3 if term_type == "table" else 2 if term_type == "field" else 1
-                unique_terms[term] = (weight, comment)
-
-        # 按权重排序，返回结果
-        sorted_terms = sorted(unique_terms.items(), key=lambda x: x[1][0], reverse=True)
-        relevant_keywords = [term for term, _ in sorted_terms]
+    log_event("schema_keywords", sampled=True, query=query, keywords=keywords)
+
+    # Step 3: 从进程内的 schema 快照获取表名、字段名和注释（仅在 schema 变化时才访问 schema 图存储）
+    snapshot = get_schema_snapshot(target)
+
+    # Step 4: 匹配关键词（表名/字段名、注释、同义词、语义相似），通过倒排索引完成
+    matched_terms = list(snapshot.term_index.match(keywords))
+    log_event("schema_matched_terms", sampled=True, terms=[term for term, _, _ in matched_terms])
+
+    # Step 5: 去重并按优先级排序
+    unique_terms = {}
+    for term, term_type, comment in matched_terms:
+        if term not in unique_terms:
+            # 赋予不同权重：表名 > 字段名 > 注释
+            weight = 3 if term_type == "table" else 2 if term_type == "field" else 1
+            unique_terms[term] = (weight, comment)
+
+    # 按权重排序，返回结果
+    sorted_terms = sorted(unique_terms.items(), key=lambda x: x[1][0], reverse=True)
+    relevant_keywords = [term for term, _ in sorted_terms]
 
     return relevant_keywords
 
-def generate_table_info(keywords):
+def generate_table_info(keywords, target=None):
     """
-    根据关键字从 Neo4j 中提取相关表、字段以及外键关系信息。
+    根据关键字从 schema 快照中提取相关表、字段以及外键关系信息。
     :param keywords: 自然语言查询
+    :param target: 数据库目标名称，默认为 default
     :return: 格式化的表、字段和外键关系信息字符串
     """
+    snapshot = get_schema_snapshot(target)
+
+    table_info = "Available Tables and Columns:\n"
 
-    neo4j_config = get_neo4j_config()
-    driver = GraphDatabase.driver(uri=neo4j_config['neo4j_uri'],
-                                  auth=(neo4j_config['neo4j_user'], neo4j_config['neo4j_password']))
+    # 查询相关表和字段（与原 Cypher 语义一致：表名/字段名/表注释/字段注释包含任一关键字），通过 n-gram 索引查找
+    fields = sorted({snapshot.fields[i] for i in snapshot.field_index.search_any(keywords)},
+                    key=lambda field: (field[0], field[2]))
 
+    current_table = None
+    for table_name, table_comment, field_name, field_comment, field_type in fields:
+        # 如果切换到新的表，添加表信息
+        if table_name != current_table:
+            table_info += f"\nTable: {table_name} ({table_comment})\n"
+            current_table = table_name
 
-    table_info = "Available Tables and Columns:\n"
-    with driver.session() as session:
-        # 查询相关表和字段
-        result = session.run("""
-            MATCH (t:Table)-[:HAS_FIELD]->(f:Field)
-            WHERE ANY(keyword IN $keywords WHERE 
-                toLower(t.name) CONTAINS toLower(keyword) OR 
-                toLower(f.name) CONTAINS toLower(keyword) OR 
-                toLower(t.comment) CONTAINS toLower(keyword) OR 
-                toLower(f.comment) CONTAINS toLower(keyword))
-            RETURN DISTINCT t.name AS table_name, t.comment AS table_comment, f.data_type AS data_type,
-                   f.name AS field_name, f.comment AS field_comment
-            ORDER BY t.name, f.name
-        """, keywords=keywords)
-
-        current_table = None
-        for record in result:
-            table_name = record["table_name"]
-            table_comment = record["table_comment"] or ""
-            field_name = record["field_name"]
-            field_comment = record["field_comment"] or ""
-            field_type = record["data_type"]
-
-            # 如果切换到新的表，添加表信息
-            if table_name != current_table:
-                table_info += f"\nTable: {table_name} ({table_comment})\n"
-                current_table = table_name
-
-            # 添加字段信息
-            table_info += f"  - {field_name} ({field_type}, {field_comment})\n"
-
-        # 查询相关外键关系
-        fk_result = session.run("""
-            MATCH (table1:Table)-[r:FOREIGN_KEY]->(table2:Table)
-            WHERE ANY(keyword IN $keywords WHERE 
-                toLower(table1.name) CONTAINS toLower(keyword) OR 
-                toLower(table2.name) CONTAINS toLower(keyword))
-            RETURN DISTINCT table1.name AS from_table, r.column AS from_column, 
-                   table2.name AS to_table, r.references AS to_column
-        """, keywords=keywords)
-
-        # 添加外键关系信息
-        if fk_result.peek():
-            table_info += "\nForeign Key Relationships:\n"
-            for record in fk_result:
-                from_table = record["from_table"]
-                from_column = record["from_column"]
-                to_table = record["to_table"]
-                to_column = record["to_column"]
-                table_info += (
-                    f"  - Table {from_table}.{from_column} references "
-                    f"{to_table}.{to_column}\n"
-                )
+        # 添加字段信息
+        table_info += f"  - {field_name} ({field_type}, {field_comment})\n"
+
+    # 查询相关外键关系（引用表或被引用表的名称包含任一关键字）
+    foreign_keys = [snapshot.foreign_keys[i] for i in sorted(snapshot.foreign_key_index.search_any(keywords))]
+
+    # 添加外键关系信息
+    if foreign_keys:
+        table_info += "\nForeign Key Relationships:\n"
+        for from_table, from_column, to_table, to_column in foreign_keys:
+            table_info += (
+                f"  - Table {from_table}.{from_column} references "
+                f"{to_table}.{to_column}\n"
+            )
 
     return table_info.strip()
 
 
-async def get_schema(query) -> Sequence[TextContent]:
-    relevant_keywords = extract_keywords(query)
-    table_info = generate_table_info(relevant_keywords)
-    print('获取到的schema：')
-    print(table_info)
+async def get_schema(query, target=None) -> Sequence[TextContent]:
+    """
+    根据用户问题检索数据库目标中相关的表、字段与外键关系。
+    :param query: 用户的自然语言问题
+    :param target: 数据库目标名称，默认为 default
+    """
+    target = resolve_target(target)
+    # 启动预热（模型加载、schema 导入）尚未完成时等待一段时间，仍未完成则提示稍后重试
+    if not await wait_schema_warmup(get_warmup_config()["wait_timeout"], target):
+        pending = get_schema_warmup().pending_tasks(_warmup_groups(target))
+        return [TextContent(type="text", text=f"schema 检索正在预热中（{', '.join(pending)}），请稍后重试")]
+
+    # 分词、模型推理与图数据库查询均为阻塞操作，放到 schema 线程池中执行
+    relevant_keywords = await run_blocking(extract_keywords, query, target, executor="schema")
+    with timed_stage("table_lookup"):
+        table_info = await run_blocking(generate_table_info, relevant_keywords, target, executor="schema")
+    log_event("schema_result", sampled=True, target=target, keywords=relevant_keywords, chars=len(table_info))
     relevant_schema = [TextContent(type="text", text = table_info)]
     return relevant_schema
\ No newline at end of file
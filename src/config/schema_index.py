@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from wordprocess.chinese_wordnet import get_synonyms
+from wordprocess.embedding_index import EmbeddingIndex
+
+from .dbconfig import DEFAULT_TARGET, get_snapshot_config
+from .metrics import observe_stage, timed_stage
+
+# 语义匹配：余弦相似度阈值，以及每个关键词最多匹配的注释片段数
+SIMILARITY_THRESHOLD = 0.7
+SIMILARITY_TOP_K = 50
+
+# 注释片段的向量索引，每个数据库目标一个：目标名称 -> (注释片段集合, EmbeddingIndex)。
+# schema 加载时构建，注释片段集合不变时复用
+_comment_indexes = {}
+_comment_index_lock = threading.Lock()
+
+_EMPTY_POSTING = np.empty(0, dtype=np.int32)
+
+
+def split_comment(comment):
+    """
+    将注释按逗号拆分为片段（去空白、小写），与关键词匹配时以片段为单位。
+    :param comment: 注释
+    :return: 注释片段列表
+    """
+    return [word for word in (word.strip().lower() for word in (comment or "").split(',')) if word]
+
+
+def comment_fragments(comments):
+    """
+    汇总多条注释的片段并去重。
+    :param comments: 注释列表
+    :return: 注释片段集合
+    """
+    fragments = set()
+    for comment in comments:
+        fragments.update(split_comment(comment))
+    return frozenset(fragments)
+
+
+def get_comment_index(fragments, target=None):
+    """
+    获取数据库目标的注释片段向量索引；片段集合与已构建的索引一致时直接复用，否则重新构建（已编码过的片段复用向量）。
+    设置了 EMBEDDING_CACHE_PATH 时优先复用磁盘上的向量文件，并在编码了新片段后写回，
+    多个工作进程共享同一份向量，只有第一个进程需要做模型推理。
+    目标第一次构建索引时复用其他目标已编码的向量，结构相同的多个数据库只需编码一次。
+    :param fragments: 注释片段集合
+    :param target: 数据库目标名称，默认为 default
+    :return: EmbeddingIndex
+    """
+    target = target or DEFAULT_TARGET
+    with _comment_index_lock:
+        key, index = _comment_indexes.get(target, (None, None))
+        if index is None or key != fragments:
+            cache_path = get_snapshot_config(target)["embedding_cache"]
+            previous = index
+            if previous is None and _comment_indexes:
+                previous = max((entry[1] for entry in _comment_indexes.values()), key=len)
+            if cache_path:
+                previous = EmbeddingIndex.load(cache_path) or previous
+            index = EmbeddingIndex(sorted(fragments), previous=previous)
+            _comment_indexes[target] = (fragments, index)
+            if cache_path and index.encoded_count:
+                index.save(cache_path)
+        return index
+
+
+class NGramIndex:
+    """
+    字符 n-gram 倒排索引，用于“任一文本包含关键词”的子串查询（不区分大小写）。
+
+    表名、表注释会在同一张表的每个字段上重复出现，因此先对不同的文本去重，在文本上建立索引：
+    按字符切分 unigram 与 bigram，不依赖分词，中文注释与英文表名同样适用。
+    长度为 1 的关键词直接查 unigram 倒排表；更长的关键词取其全部 bigram 的倒排表求交集得到候选文本，
+    长度大于 2 时再逐个校验子串，最后把命中的文本映射回文档，结果与逐行 CONTAINS 扫描完全一致。
+    倒排表以有序 int32 数组保存，交集与合并由 numpy 完成。
+    """
+
+    def __init__(self, documents):
+        """
+        :param documents: 文档列表，每个文档是若干文本组成的元组，如 (表名, 字段名, 表注释, 字段注释)
+        """
+        text_ids = {}
+        text_docs = []
+        doc_count = 0
+        for doc_id, texts in enumerate(documents):
+            doc_count += 1
+            for text in texts:
+                text = (text or "").lower()
+                text_id = text_ids.get(text)
+                if text_id is None:
+                    text_id = text_ids[text] = len(text_docs)
+                    text_docs.append([])
+                doc_ids = text_docs[text_id]
+                if not doc_ids or doc_ids[-1] != doc_id:
+                    doc_ids.append(doc_id)
+
+        self.doc_count = doc_count
+        self.texts = list(text_ids)
+        self.text_docs = [np.array(doc_ids, dtype=np.int32) for doc_ids in text_docs]
+
+        postings = defaultdict(list)
+        for text_id, text in enumerate(self.texts):
+            for gram in self._grams(text):
+                postings[gram].append(text_id)
+        # gram 长度为 1 时即 unigram，为 2 时即 bigram
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    @staticmethod
+    def _grams(text):
+        """文本的全部 unigram 与 bigram（每个文本单独切分，n-gram 不跨越文本边界）"""
+        return frozenset(text) | frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+    def _search_texts(self, keyword):
+        """查询包含关键词的文本，返回文本下标数组；关键词为空时返回 None 表示匹配全部"""
+        if not keyword:
+            return None
+        if len(keyword) == 1:
+            return self.postings.get(keyword, _EMPTY_POSTING)
+
+        postings = sorted((self.postings.get(keyword[i:i + 2], _EMPTY_POSTING) for i in range(len(keyword) - 1)),
+                          key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(keyword) == 2:
+            return candidates
+        texts = self.texts
+        return np.array([text_id for text_id in candidates.tolist() if keyword in texts[text_id]], dtype=np.int32)
+
+    def search_any(self, keywords):
+        """
+        查询任一文本包含任一关键词的文档。
+        :param keywords: 关键词列表
+        :return: 文档下标集合
+        """
+        matched_texts = []
+        for keyword in keywords:
+            text_ids = self._search_texts(keyword.lower())
+            if text_ids is None:
+                return set(range(self.doc_count))
+            matched_texts.append(text_ids)
+        if not matched_texts:
+            return set()
+
+        text_ids = np.unique(np.concatenate(matched_texts))
+        if not len(text_ids):
+            return set()
+        return set(np.unique(np.concatenate([self.text_docs[text_id] for text_id in text_ids.tolist()])).tolist())
+
+    def search(self, keyword):
+        """
+        查询任一文本包含关键词的文档。
+        :param keyword: 关键词
+        :return: 文档下标集合
+        """
+        return self.search_any([keyword])
+
+
+class SchemaTermIndex:
+    """
+    schema 术语（表名/字段名及其注释）的倒排索引。
+
+    - names: 小写的表名/字段名 -> 术语集合，用于关键词包含匹配
+    - fragments: 注释片段（即同义词词条）-> 术语集合，关键词本身、关键词的同义词以及
+      语义相似的片段都通过一次字典查找映射回术语，无需逐个术语扫描
+    """
+
+    def __init__(self, schema_terms, target=None):
+        """
+        :param schema_terms: [(表名或字段名, 类型, 注释), ...]
+        :param target: 数据库目标名称，决定使用哪个注释向量索引
+        """
+        self.terms = list(dict.fromkeys(schema_terms))
+        self.names = defaultdict(set)
+        self.fragments = defaultdict(set)
+        for term in self.terms:
+            name, _, comment = term
+            self.names[name.lower()].add(term)
+            for fragment in split_comment(comment):
+                self.fragments[fragment].add(term)
+        self.embeddings = get_comment_index(frozenset(self.fragments), target)
+
+    def match(self, keywords):
+        """
+        匹配关键词对应的 schema 术语：表名/字段名包含关键词，或注释片段等于关键词、
+        属于关键词的同义词、与关键词语义相似。
+        :param keywords: 关键词列表
+        :return: 匹配到的术语集合 {(术语, 类型, 注释)}
+        """
+        # 全部关键词一次性批量编码，与注释片段向量矩阵做一次矩阵乘法得到语义相似的片段
+        with timed_stage("embedding"):
+            similar_fragments = self.embeddings.search(keywords, SIMILARITY_THRESHOLD, SIMILARITY_TOP_K)
+
+        matched_terms = set()
+        synonym_seconds = name_seconds = 0.0
+        for keyword, similar in zip(keywords, similar_fragments):
+            keyword = keyword.lower()
+            started = time.perf_counter()
+            for name, terms in self.names.items():
+                if keyword in name:
+                    matched_terms.update(terms)
+            name_seconds += time.perf_counter() - started
+
+            started = time.perf_counter()
+            synonyms = get_synonyms(keyword)
+            synonym_seconds += time.perf_counter() - started
+
+            candidates = {keyword} | synonyms | {text for text, _ in similar}
+            for fragment in candidates:
+                matched_terms.update(self.fragments.get(fragment, ()))
+        observe_stage("name_match", name_seconds)
+        observe_stage("synonyms", synonym_seconds)
+        return matched_terms
+
@@ -0,0 +1,147 @@
+import functools
+import itertools
+import logging
+import threading
+import time
+
+from .dbconfig import get_snapshot_config, resolve_target
+from .logger import log_event
+from .metrics import timed_stage
+from .schema_index import NGramIndex, SchemaTermIndex
+from .schema_store import get_schema_store
+
+
+class SchemaSnapshot:
+    """
+    进程内的 schema 快照：表/字段/注释、外键关系，以及基于它们构建的术语索引。
+    快照创建后不再修改，多个线程可以同时读取。
+    """
+
+    def __init__(self, version, graph_version, fields, foreign_keys, target=None):
+        """
+        :param version: 进程内快照版本号，每次重新加载加一
+        :param graph_version: 加载时 schema 图存储中的版本号，未知时为 None
+        :param fields: [(表名, 表注释, 字段名, 字段注释, 字段类型), ...]
+        :param foreign_keys: [(表名, 字段名, 引用表名, 引用字段名), ...]
+        :param target: 数据库目标名称
+        """
+        self.version = version
+        self.target = target
+        self.graph_version = graph_version
+        self.fields = fields
+        self.foreign_keys = foreign_keys
+        self.loaded_at = time.time()
+
+        schema_terms = []
+        for table_name, table_comment, field_name, field_comment, _ in fields:
+            schema_terms.append((table_name, "table", table_comment))
+            schema_terms.append((field_name, "field", field_comment))
+        self.schema_terms = schema_terms
+        self.term_index = SchemaTermIndex(schema_terms, target)
+
+        # 按关键词查找表/字段与外键时使用的子串索引，替代逐行扫描
+        self.field_index = NGramIndex(
+            (table_name, field_name, table_comment, field_comment)
+            for table_name, table_comment, field_name, field_comment, _ in fields
+        )
+        self.foreign_key_index = NGramIndex((from_table, to_table) for from_table, _, to_table, _ in foreign_keys)
+
+
+def load_snapshot(version, target=None):
+    """从数据库目标的 schema 图存储加载完整的 schema 快照"""
+    graph_version, fields, foreign_keys = get_schema_store(target).load()
+    return SchemaSnapshot(version, graph_version, fields, foreign_keys, target)
+
+
+class SchemaSnapshotCache:
+    """
+    schema 快照缓存。
+
+    - 显式调用 invalidate() 后，下次读取时重新加载
+    - 超过 ttl 后只读取 schema 图存储中的版本号，版本变化（或没有版本信息）时才重新加载
+    - 其余情况下直接返回内存中的快照，不访问 schema 图存储
+    """
+
+    def __init__(self, ttl, loader=load_snapshot, version_reader=None):
+        self.ttl = ttl
+        self._loader = loader
+        self._version_reader = version_reader
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _read_graph_version(self):
+        if self._version_reader is not None:
+            return self._version_reader()
+        return get_schema_store().read_version()
+
+    def get(self):
+        """获取当前有效的 schema 快照"""
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and not self._stale and self.ttl and now - self._checked_at > self.ttl:
+                try:
+                    # 读取 schema 图存储（Neo4j）中的版本号
+                    with timed_stage("graph_version"):
+                        graph_version = self._read_graph_version()
+                except Exception as e:
+                    # schema 图存储暂时不可用时继续使用现有快照
+                    log_event("schema_version_check_failed", level=logging.WARNING, error=str(e))
+                    graph_version = self._snapshot.graph_version
+                if graph_version is None or graph_version != self._snapshot.graph_version:
+                    self._stale = True
+                else:
+                    self._checked_at = now
+
+            if self._snapshot is None or self._stale:
+                try:
+                    with timed_stage("graph_load"):
+                        self._snapshot = self._loader(next(self._versions))
+                except Exception as e:
+                    if self._snapshot is None:
+                        raise
+                    log_event("schema_snapshot_reload_failed", level=logging.WARNING, error=str(e))
+                    return self._snapshot
+                self._stale = False
+                self._checked_at = now
+            return self._snapshot
+
+    def invalidate(self):
+        """使当前快照失效，下次读取时重新加载"""
+        with self._lock:
+            self._stale = True
+
+    def peek(self):
+        """返回当前快照（可能已失效），不触发加载"""
+        return self._snapshot
+
+
+_caches = {}
+_cache_lock = threading.Lock()
+
+
+def get_snapshot_cache(target=None):
+    """获取数据库目标的进程级共享 schema 快照缓存，每个目标一个"""
+    target = resolve_target(target)
+    cache = _caches.get(target)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(target)
+            if cache is None:
+                cache = _caches[target] = SchemaSnapshotCache(
+                    get_snapshot_config(target)["ttl"],
+                    loader=functools.partial(load_snapshot, target=target),
+                    version_reader=lambda: get_schema_store(target).read_version())
+    return cache
+
+
+def get_schema_snapshot(target=None):
+    """获取数据库目标当前有效的 schema 快照"""
+    return get_snapshot_cache(target).get()
+
+
+def invalidate_schema_snapshot(target=None):
+    """使数据库目标的 schema 快照失效（schema 发生变化后调用）"""
+    get_snapshot_cache(target).invalidate()
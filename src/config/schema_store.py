@@ -0,0 +1,393 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import ClassVar, Dict, Type
+
+from .dbconfig import DEFAULT_TARGET, get_schema_store_config, resolve_target
+from .graph import close_neo4j_driver, get_neo4j_driver
+from .logger import log_event
+from .schema_sync import (build_neo4j_graph, diff_schema, group_schema, sync_neo4j_graph_incremental,
+                          table_fingerprint)
+
+
+class SchemaStoreRegistry:
+    """schema 图存储注册表，按名称管理所有存储后端"""
+
+    _stores: ClassVar[Dict[str, Type['SchemaStore']]] = {}
+
+    @classmethod
+    def register(cls, store_class: Type['SchemaStore']) -> Type['SchemaStore']:
+        cls._stores[store_class.name] = store_class
+        return store_class
+
+    @classmethod
+    def get_store(cls, name: str, **kwargs) -> 'SchemaStore':
+        """创建存储后端实例
+
+        异常:
+            ValueError: 当存储后端不存在时抛出
+        """
+        if name not in cls._stores:
+            raise ValueError(f"未知的 schema 存储: {name}，可选: {', '.join(cls.get_names())}")
+        return cls._stores[name](**kwargs)
+
+    @classmethod
+    def get_names(cls) -> list:
+        return list(cls._stores)
+
+
+class SchemaStore:
+    """
+    schema 图存储基类：保存表、字段及其注释，以及表之间的外键关系。
+
+    字段按名称在表之间共享（与 Neo4j 图模型中的 Field 节点一致），每次写入后 schema 版本号加一，
+    各进程的 schema 快照据此判断是否需要重新加载。
+    """
+
+    name: str = ""
+
+    def __init_subclass__(cls, **kwargs):
+        """子类初始化时自动注册到存储注册表"""
+        super().__init_subclass__(**kwargs)
+        if cls.name:
+            SchemaStoreRegistry.register(cls)
+
+    def build(self, tables, columns, foreign_keys):
+        """全量导入 extract_mysql_schema 提取的 schema"""
+        raise NotImplementedError
+
+    def sync(self, tables, columns, foreign_keys):
+        """
+        增量同步：按表指纹只写入新增、变更的表，删除已不存在的表。
+        :return: 同步结果 {"added": [...], "updated": [...], "removed": [...], "unchanged": n, "seconds": s}
+        """
+        raise NotImplementedError
+
+    def read_version(self):
+        """读取当前 schema 版本号，尚未导入时返回 None"""
+        raise NotImplementedError
+
+    def load(self):
+        """
+        读取完整的 schema。
+        :return: (版本号, [(表名, 表注释, 字段名, 字段注释, 字段类型), ...], [(表名, 字段名, 引用表名, 引用字段名), ...])
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """释放存储占用的资源"""
+
+
+# ==================== Neo4j ====================
+SCHEMA_VERSION_QUERY = """
+    MATCH (m:SchemaMeta {target: $target, name: 'schema'})
+    RETURN m.version AS version
+"""
+
+SCHEMA_FIELDS_QUERY = """
+    MATCH (t:Table {target: $target})-[:HAS_FIELD]->(f:Field)
+    RETURN t.name AS table_name, t.comment AS table_comment, f.data_type AS data_type,
+           f.name AS field_name, f.comment AS field_comment
+"""
+
+SCHEMA_FOREIGN_KEYS_QUERY = """
+    MATCH (table1:Table {target: $target})-[r:FOREIGN_KEY]->(table2:Table)
+    RETURN DISTINCT table1.name AS from_table, r.column AS from_column,
+           table2.name AS to_table, r.references AS to_column
+"""
+
+
+def read_graph_version(session, target=DEFAULT_TARGET):
+    """读取图数据库中数据库目标的 schema 版本号，没有版本节点时返回 None"""
+    record = session.run(SCHEMA_VERSION_QUERY, target=target).single()
+    return record["version"] if record else None
+
+
+class Neo4jSchemaStore(SchemaStore):
+    """
+    schema 保存在 Neo4j 中，多个服务进程共享同一个图。
+
+    多个数据库目标默认共用同一个 Neo4j 数据库，节点以 target 属性区分所属目标；
+    也可以为目标单独指定 Neo4j 数据库（多数据库需要 Neo4j Enterprise 版）。
+    """
+
+    name = "neo4j"
+
+    def __init__(self, database=None, target=DEFAULT_TARGET, legacy_target=None):
+        """
+        :param database: Neo4j 数据库名称，为空时使用服务端的默认数据库
+        :param target: 数据库目标名称
+        :param legacy_target: 没有 target 属性的旧节点归属的目标，为空时不迁移旧节点
+        """
+        self.database = database or None
+        self.target = target
+        self.legacy_target = legacy_target
+
+    def build(self, tables, columns, foreign_keys):
+        build_neo4j_graph(tables, columns, foreign_keys, database=self.database,
+                          target=self.target, legacy_target=self.legacy_target)
+
+    def sync(self, tables, columns, foreign_keys):
+        return sync_neo4j_graph_incremental(tables, columns, foreign_keys, database=self.database,
+                                            target=self.target, legacy_target=self.legacy_target)
+
+    def read_version(self):
+        with get_neo4j_driver().session(database=self.database) as session:
+            return read_graph_version(session, self.target)
+
+    def load(self):
+        with get_neo4j_driver().session(database=self.database) as session:
+            graph_version = read_graph_version(session, self.target)
+            fields = [
+                (record["table_name"], record["table_comment"] or "", record["field_name"],
+                 record["field_comment"] or "", record["data_type"])
+                for record in session.run(SCHEMA_FIELDS_QUERY, target=self.target)
+            ]
+            foreign_keys = [
+                (record["from_table"], record["from_column"], record["to_table"], record["to_column"])
+                for record in session.run(SCHEMA_FOREIGN_KEYS_QUERY, target=self.target)
+            ]
+        return graph_version, fields, foreign_keys
+
+    def close(self):
+        close_neo4j_driver()
+
+
+# ==================== 内嵌存储 ====================
+SQLITE_TABLES = """
+    CREATE TABLE IF NOT EXISTS schema_meta (name TEXT PRIMARY KEY, version INTEGER);
+    CREATE TABLE IF NOT EXISTS schema_tables (name TEXT PRIMARY KEY, comment TEXT, fingerprint TEXT);
+    CREATE TABLE IF NOT EXISTS schema_fields (name TEXT PRIMARY KEY, comment TEXT, data_type TEXT);
+    CREATE TABLE IF NOT EXISTS schema_table_fields (table_name TEXT, field_name TEXT);
+    CREATE TABLE IF NOT EXISTS schema_foreign_keys (table_name TEXT, column_name TEXT,
+                                                    referenced_table TEXT, referenced_column TEXT);
+"""
+
+
+class EmbeddedSchemaStore(SchemaStore):
+    """
+    进程内的 schema 图存储，不需要 Neo4j 服务。
+
+    以邻接表保存表 -> 字段、表 -> 外键关系，写入语义与 Neo4j 图模型一致：全量导入时已存在的表和字段保持原有注释，
+    增量同步时覆盖变更的表并删除不再被引用的字段。指定 path 时每次写入后整体持久化到 SQLite 文件，
+    启动时从文件恢复；多个进程共用同一个文件时，读取前按文件中的版本号判断是否需要重新加载。
+    """
+
+    name = "embedded"
+
+    def __init__(self, path=None):
+        self.path = path or None
+        self._lock = threading.RLock()
+        self._version = None
+        self._tables = {}           # 表名 -> {"comment": 表注释, "fingerprint": 表指纹}
+        self._fields = {}           # 字段名 -> (字段注释, 字段类型)
+        self._table_fields = {}     # 表名 -> {字段名: None}（有序集合）
+        self._foreign_keys = {}     # 表名 -> {(字段名, 引用表名, 引用字段名): None}（有序集合）
+        if self.path and os.path.exists(self.path):
+            self._load_file()
+
+    def _add_table(self, name, comment, fingerprint=None):
+        self._tables[name] = {"comment": comment, "fingerprint": fingerprint}
+        self._table_fields.setdefault(name, {})
+        self._foreign_keys.setdefault(name, {})
+
+    def _remove_table(self, name):
+        """删除表及其字段关系、外键关系，包括其他表指向它的外键"""
+        self._tables.pop(name, None)
+        self._table_fields.pop(name, None)
+        self._foreign_keys.pop(name, None)
+        for foreign_keys in self._foreign_keys.values():
+            for fk in [fk for fk in foreign_keys if fk[1] == name]:
+                del foreign_keys[fk]
+
+    def _add_foreign_key(self, table_name, column_name, referenced_table, referenced_column):
+        # 与 MATCH 语义一致：两端的表都存在时才建立外键关系
+        if table_name in self._tables and referenced_table in self._tables:
+            self._foreign_keys[table_name][(column_name, referenced_table, referenced_column)] = None
+
+    def build(self, tables, columns, foreign_keys):
+        started = time.perf_counter()
+        with self._lock:
+            self._reload_if_changed()
+            for table in tables:
+                if table['TABLE_NAME'] not in self._tables:
+                    self._add_table(table['TABLE_NAME'], table['TABLE_COMMENT'])
+            for column in columns:
+                field_name = column['COLUMN_NAME']
+                if field_name not in self._fields:
+                    self._fields[field_name] = (column['COLUMN_COMMENT'], column['DATA_TYPE'])
+                if column['TABLE_NAME'] in self._tables:
+                    self._table_fields[column['TABLE_NAME']][field_name] = None
+            for fk in foreign_keys:
+                self._add_foreign_key(fk['TABLE_NAME'], fk['COLUMN_NAME'],
+                                      fk['REFERENCED_TABLE_NAME'], fk['REFERENCED_COLUMN_NAME'])
+            self._bump_version()
+
+        total_rows = len(tables) + len(columns) + len(foreign_keys)
+        elapsed = time.perf_counter() - started
+        log_event("schema_import", store=self.name, rows=total_rows, seconds=round(elapsed, 3),
+                  rows_per_sec=round(total_rows / max(elapsed, 1e-9)))
+
+    def sync(self, tables, columns, foreign_keys):
+        started = time.perf_counter()
+        grouped = group_schema(tables, columns, foreign_keys)
+        fingerprints = {name: table_fingerprint(table) for name, table in grouped.items()}
+
+        with self._lock:
+            self._reload_if_changed()
+            stored_fingerprints = {name: table["fingerprint"] for name, table in self._tables.items()}
+            added, changed, removed = diff_schema(grouped, fingerprints, stored_fingerprints)
+            if added or changed or removed:
+                for name in removed:
+                    self._remove_table(name)
+                for name in changed:
+                    self._table_fields[name] = {}
+                    self._foreign_keys[name] = {}
+
+                # 先写入全部表，再写入字段与外键，保证外键两端的表都已存在
+                upserts = added + changed
+                for name in upserts:
+                    self._add_table(name, grouped[name]["comment"], fingerprints[name])
+                for name in upserts:
+                    for field_name, field_comment, data_type in grouped[name]["columns"]:
+                        self._fields[field_name] = (field_comment, data_type)
+                        self._table_fields[name][field_name] = None
+                for name in upserts:
+                    for column_name, referenced_table, referenced_column in grouped[name]["foreign_keys"]:
+                        self._add_foreign_key(name, column_name, referenced_table, referenced_column)
+
+                # 字段按名称在多张表之间共享，不再被任何表引用时删除
+                referenced = {field_name for fields in self._table_fields.values() for field_name in fields}
+                self._fields = {name: field for name, field in self._fields.items() if name in referenced}
+                self._bump_version()
+
+        return {
+            "added": added,
+            "updated": changed,
+            "removed": removed,
+            "unchanged": len(grouped) - len(added) - len(changed),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def read_version(self):
+        if self.path and os.path.exists(self.path):
+            with self._connect() as connection:
+                return self._read_file_version(connection)
+        return self._version
+
+    def load(self):
+        with self._lock:
+            self._reload_if_changed()
+            fields = [
+                (table_name, self._tables[table_name]["comment"] or "", field_name,
+                 self._fields[field_name][0] or "", self._fields[field_name][1])
+                for table_name, field_names in self._table_fields.items()
+                for field_name in field_names
+            ]
+            foreign_keys = [
+                (table_name, column_name, referenced_table, referenced_column)
+                for table_name, table_foreign_keys in self._foreign_keys.items()
+                for column_name, referenced_table, referenced_column in table_foreign_keys
+            ]
+            return self._version, fields, foreign_keys
+
+    def _bump_version(self):
+        self._version = (self._version or 0) + 1
+        if self.path:
+            self._save_file()
+
+    # ---------- SQLite 持久化 ----------
+    @contextmanager
+    def _connect(self):
+        """打开 SQLite 连接：正常退出时提交，异常时回滚，最后关闭连接"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.executescript(SQLITE_TABLES)
+            yield connection
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _read_file_version(connection):
+        row = connection.execute("SELECT version FROM schema_meta WHERE name = 'schema'").fetchone()
+        return row[0] if row else None
+
+    def _reload_if_changed(self):
+        """其他进程写入了更新的版本时，从文件重新加载"""
+        if self.path and os.path.exists(self.path) and self.read_version() != self._version:
+            self._load_file()
+
+    def _load_file(self):
+        with self._connect() as connection:
+            version = self._read_file_version(connection)
+            tables = connection.execute("SELECT name, comment, fingerprint FROM schema_tables ORDER BY rowid").fetchall()
+            fields = connection.execute("SELECT name, comment, data_type FROM schema_fields ORDER BY rowid").fetchall()
+            table_fields = connection.execute(
+                "SELECT table_name, field_name FROM schema_table_fields ORDER BY rowid").fetchall()
+            foreign_keys = connection.execute(
+                "SELECT table_name, column_name, referenced_table, referenced_column "
+                "FROM schema_foreign_keys ORDER BY rowid").fetchall()
+
+        self._version = version
+        self._tables, self._fields, self._table_fields, self._foreign_keys = {}, {}, {}, {}
+        for name, comment, fingerprint in tables:
+            self._add_table(name, comment, fingerprint)
+        self._fields = {name: (comment, data_type) for name, comment, data_type in fields}
+        for table_name, field_name in table_fields:
+            self._table_fields[table_name][field_name] = None
+        for table_name, column_name, referenced_table, referenced_column in foreign_keys:
+            self._foreign_keys[table_name][(column_name, referenced_table, referenced_column)] = None
+
+    def _save_file(self):
+        """在一个事务中整体写入当前 schema（几千个节点的规模下整体重写足够快）"""
+        with self._connect() as connection:
+            for table in ("schema_tables", "schema_fields", "schema_table_fields", "schema_foreign_keys"):
+                connection.execute(f"DELETE FROM {table}")
+            connection.executemany(
+                "INSERT INTO schema_tables (name, comment, fingerprint) VALUES (?, ?, ?)",
+                [(name, table["comment"], table["fingerprint"]) for name, table in self._tables.items()])
+            connection.executemany(
+                "INSERT INTO schema_fields (name, comment, data_type) VALUES (?, ?, ?)",
+                [(name, comment, data_type) for name, (comment, data_type) in self._fields.items()])
+            connection.executemany(
+                "INSERT INTO schema_table_fields (table_name, field_name) VALUES (?, ?)",
+                [(table_name, field_name) for table_name, fields in self._table_fields.items()
+                 for field_name in fields])
+            connection.executemany(
+                "INSERT INTO schema_foreign_keys (table_name, column_name, referenced_table, referenced_column) "
+                "VALUES (?, ?, ?, ?)",
+                [(table_name, *fk) for table_name, fks in self._foreign_keys.items() for fk in fks])
+            connection.execute("INSERT OR REPLACE INTO schema_meta (name, version) VALUES ('schema', ?)",
+                               (self._version,))
+
+
+_stores = {}
+_store_lock = threading.Lock()
+
+
+def get_schema_store(target=None) -> SchemaStore:
+    """获取数据库目标的进程级共享 schema 图存储（按 SCHEMA_STORE 选择后端），每个目标使用独立的存储"""
+    target = resolve_target(target)
+    store = _stores.get(target)
+    if store is None:
+        with _store_lock:
+            store = _stores.get(target)
+            if store is None:
+                config = get_schema_store_config(target)
+                if config["backend"] == EmbeddedSchemaStore.name:
+                    kwargs = {"path": config["path"]}
+                elif config["backend"] == Neo4jSchemaStore.name:
+                    # 旧版本的节点没有 target 属性：默认数据库中的属于默认目标，单独指定的数据库中的属于该目标
+                    legacy_target = target if target == DEFAULT_TARGET or config["neo4j_dedicated"] else None
+                    kwargs = {"database": config["neo4j_database"], "target": target,
+                              "legacy_target": legacy_target}
+                else:
+                    kwargs = {}
+                store = _stores[target] = SchemaStoreRegistry.get_store(config["backend"], **kwargs)
+    return store
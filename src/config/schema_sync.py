@@ -0,0 +1,286 @@
+import hashlib
+import json
+import time
+
+from .dbconfig import DEFAULT_TARGET, get_import_config
+from .graph import get_neo4j_driver
+from .logger import log_event
+
+# 多个数据库目标可以共用一个 Neo4j 数据库（Community 版只有一个用户数据库），节点以 target 属性区分所属目标
+READ_FINGERPRINTS_QUERY = """
+    MATCH (t:Table {target: $target})
+    RETURN t.name AS table_name, t.fingerprint AS fingerprint
+"""
+
+DELETE_TABLES_QUERY = """
+    UNWIND $names AS name
+    MATCH (t:Table {target: $target, name: name})
+    DETACH DELETE t
+"""
+
+# 变更的表先删除其字段关系与外键关系，再按最新结构重建
+CLEAR_TABLE_EDGES_QUERY = """
+    UNWIND $names AS name
+    MATCH (t:Table {target: $target, name: name})
+    OPTIONAL MATCH (t)-[r:HAS_FIELD|FOREIGN_KEY]->()
+    DELETE r
+"""
+
+UPSERT_TABLES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (table:Table {target: $target, name: row.table_name})
+    SET table.comment = row.table_comment, table.fingerprint = row.fingerprint
+"""
+
+UPSERT_FIELDS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (field:Field {target: $target, name: row.field_name})
+    SET field.comment = row.field_comment, field.data_type = row.data_type
+    WITH field, row
+    MATCH (table:Table {target: $target, name: row.table_name})
+    MERGE (table)-[:HAS_FIELD]->(field)
+"""
+
+UPSERT_FOREIGN_KEYS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (table1:Table {target: $target, name: row.table_name}),
+          (table2:Table {target: $target, name: row.referenced_table})
+    MERGE (table1)-[:FOREIGN_KEY {column: row.column_name, references: row.referenced_column}]->(table2)
+"""
+
+# 字段节点按名称在多张表之间共享，不再被任何表引用时删除
+DELETE_ORPHAN_FIELDS_QUERY = """
+    MATCH (f:Field {target: $target})
+    WHERE NOT ()-[:HAS_FIELD]->(f)
+    DETACH DELETE f
+"""
+
+BUMP_SCHEMA_VERSION_QUERY = """
+    MERGE (m:SchemaMeta {target: $target, name: 'schema'})
+    SET m.version = coalesce(m.version, 0) + 1, m.updated_at = timestamp()
+"""
+
+
+def group_schema(tables, columns, foreign_keys):
+    """
+    按表汇总 MySQL schema。
+    :return: {表名: {"comment": 表注释, "columns": [(字段名, 字段注释, 类型)], "foreign_keys": [(字段名, 引用表, 引用字段)]}}
+    """
+    grouped = {
+        table['TABLE_NAME']: {"comment": table['TABLE_COMMENT'] or "", "columns": [], "foreign_keys": []}
+        for table in tables
+    }
+    for column in columns:
+        table = grouped.get(column['TABLE_NAME'])
+        if table is not None:
+            table["columns"].append((column['COLUMN_NAME'], column['COLUMN_COMMENT'] or "", column['DATA_TYPE']))
+    for fk in foreign_keys:
+        table = grouped.get(fk['TABLE_NAME'])
+        if table is not None:
+            table["foreign_keys"].append(
+                (fk['COLUMN_NAME'], fk['REFERENCED_TABLE_NAME'], fk['REFERENCED_COLUMN_NAME']))
+    return grouped
+
+
+def table_fingerprint(table):
+    """
+    计算单张表的指纹：表注释、字段（名称/注释/类型）、外键，任一变化都会导致指纹变化。
+    """
+    payload = json.dumps([table["comment"], sorted(table["columns"]), sorted(table["foreign_keys"])],
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def diff_schema(grouped, fingerprints, stored_fingerprints):
+    """
+    比较 MySQL 当前的表指纹与图数据库中保存的指纹。
+    :return: (新增的表, 变更的表, 删除的表)，均为排好序的表名列表
+    """
+    added = {name for name in grouped if name not in stored_fingerprints}
+    removed = {name for name in stored_fingerprints if name not in grouped}
+    changed = {name for name in grouped
+               if name in stored_fingerprints and stored_fingerprints[name] != fingerprints[name]}
+
+    # 外键指向新增或删除的表时，表自身指纹不变但外键关系需要重建（删除表会一并删除指向它的外键关系）
+    touched = added | removed
+    if touched:
+        changed |= {name for name, table in grouped.items()
+                    if name not in added and any(ref in touched for _, ref, _ in table["foreign_keys"])}
+    return sorted(added), sorted(changed), sorted(removed)
+
+
+def run_batched(tx, query, rows, batch_size, param="rows", target=DEFAULT_TARGET):
+    """
+    在同一个事务中按批执行 UNWIND 语句，每批的行通过参数 param 传入，数据库目标通过参数 target 传入。
+    """
+    for start in range(0, len(rows), batch_size):
+        tx.run(query, {param: rows[start:start + batch_size], "target": target}).consume()
+
+
+def _apply_changes(tx, grouped, fingerprints, upserts, changed, removed, batch_size, target):
+    """在一个事务中应用全部 schema 变更，读取方不会看到中间状态"""
+    run_batched(tx, DELETE_TABLES_QUERY, removed, batch_size, param="names", target=target)
+    run_batched(tx, CLEAR_TABLE_EDGES_QUERY, changed, batch_size, param="names", target=target)
+
+    table_rows, field_rows, foreign_key_rows = [], [], []
+    for name in upserts:
+        table = grouped[name]
+        table_rows.append({"table_name": name, "table_comment": table["comment"], "fingerprint": fingerprints[name]})
+        field_rows.extend({"table_name": name, "field_name": field_name,
+                           "field_comment": field_comment, "data_type": data_type}
+                          for field_name, field_comment, data_type in table["columns"])
+        foreign_key_rows.extend({"table_name": name, "column_name": column_name,
+                                 "referenced_table": referenced_table, "referenced_column": referenced_column}
+                                for column_name, referenced_table, referenced_column in table["foreign_keys"])
+
+    run_batched(tx, UPSERT_TABLES_QUERY, table_rows, batch_size, target=target)
+    run_batched(tx, UPSERT_FIELDS_QUERY, field_rows, batch_size, target=target)
+    run_batched(tx, UPSERT_FOREIGN_KEYS_QUERY, foreign_key_rows, batch_size, target=target)
+    tx.run(DELETE_ORPHAN_FIELDS_QUERY, target=target).consume()
+    tx.run(BUMP_SCHEMA_VERSION_QUERY, target=target).consume()
+
+
+def sync_neo4j_graph_incremental(tables, columns, foreign_keys, batch_size=None, database=None,
+                                 target=DEFAULT_TARGET, legacy_target=None):
+    """
+    增量同步 MySQL schema 到 Neo4j：只写入新增、变更的表，删除已不存在的表。
+    :param database: Neo4j 数据库名称，为空时使用服务端的默认数据库
+    :param target: 数据库目标名称，只读写该目标的节点
+    :param legacy_target: 没有 target 属性的旧节点归属的目标，见 ensure_schema_constraints
+    :return: 同步结果 {"added": [...], "updated": [...], "removed": [...], "unchanged": n, "seconds": s}
+    """
+    batch_size = batch_size or get_import_config()["batch_size"]
+    started = time.perf_counter()
+
+    grouped = group_schema(tables, columns, foreign_keys)
+    fingerprints = {name: table_fingerprint(table) for name, table in grouped.items()}
+
+    with get_neo4j_driver().session(database=database) as session:
+        # 增量同步是默认方式，全新的 Neo4j 上也要先建立唯一约束，否则 UPSERT 中的 MERGE 会退化为全标签扫描
+        ensure_schema_constraints(session, legacy_target)
+        stored_fingerprints = {
+            record["table_name"]: record["fingerprint"]
+            for record in session.run(READ_FINGERPRINTS_QUERY, target=target)
+        }
+        added, changed, removed = diff_schema(grouped, fingerprints, stored_fingerprints)
+        if added or changed or removed:
+            session.execute_write(_apply_changes, grouped, fingerprints, added + changed,
+                                  changed, removed, batch_size, target)
+
+    return {
+        "added": added,
+        "updated": changed,
+        "removed": removed,
+        "unchanged": len(grouped) - len(added) - len(changed),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# 全量导入使用的唯一约束与 MERGE 语句。唯一约束同时会创建索引，MERGE 按目标与名称查找节点时走索引而不是全标签扫描；
+# 多属性唯一约束 Neo4j 5 起 Community 版也支持
+SCHEMA_CONSTRAINTS = [
+    "CREATE CONSTRAINT table_target_name_unique IF NOT EXISTS FOR (t:Table) REQUIRE (t.target, t.name) IS UNIQUE",
+    "CREATE CONSTRAINT field_target_name_unique IF NOT EXISTS FOR (f:Field) REQUIRE (f.target, f.name) IS UNIQUE",
+    "CREATE CONSTRAINT schema_meta_target_name_unique IF NOT EXISTS "
+    "FOR (m:SchemaMeta) REQUIRE (m.target, m.name) IS UNIQUE",
+]
+
+# 旧版本按名称建立的唯一约束不允许不同目标有同名的表与字段，先删除
+LEGACY_CONSTRAINTS = [
+    "DROP CONSTRAINT table_name_unique IF EXISTS",
+    "DROP CONSTRAINT field_name_unique IF EXISTS",
+    "DROP CONSTRAINT schema_meta_name_unique IF EXISTS",
+]
+
+CLAIM_LEGACY_NODES_QUERY = """
+    MATCH (n)
+    WHERE (n:Table OR n:Field OR n:SchemaMeta) AND n.target IS NULL
+    SET n.target = $target
+"""
+
+MERGE_TABLES_QUERY = """
+    UNWIND $rows AS row
+    MERGE (table:Table {target: $target, name: row.table_name})
+    ON CREATE SET table.comment = row.table_comment
+"""
+
+MERGE_FIELDS_QUERY = """
+    UNWIND $rows AS row
+    MERGE (field:Field {target: $target, name: row.field_name})
+    ON CREATE SET field.comment = row.field_comment, field.data_type = row.data_type
+    WITH field, row
+    MATCH (table:Table {target: $target, name: row.table_name})
+    MERGE (table)-[:HAS_FIELD]->(field)
+"""
+
+MERGE_FOREIGN_KEYS_QUERY = """
+    UNWIND $rows AS row
+    MATCH (table1:Table {target: $target, name: row.table_name}),
+          (table2:Table {target: $target, name: row.referenced_table})
+    MERGE (table1)-[:FOREIGN_KEY {column: row.column_name, references: row.referenced_column}]->(table2)
+"""
+
+
+def ensure_schema_constraints(session, legacy_target=None):
+    """
+    创建图模型所需的唯一约束（及其索引），已存在时跳过。
+    旧版本写入的节点没有 target 属性，指定 legacy_target 时将它们归入该目标，否则保持不变（不会被读取）。
+    """
+    for statement in LEGACY_CONSTRAINTS:
+        session.run(statement).consume()
+    if legacy_target:
+        session.run(CLAIM_LEGACY_NODES_QUERY, target=legacy_target).consume()
+    for statement in SCHEMA_CONSTRAINTS:
+        session.run(statement).consume()
+
+
+def build_neo4j_graph(tables, columns, foreign_keys, batch_size=None, database=None,
+                      target=DEFAULT_TARGET, legacy_target=None):
+    """
+    将 MySQL schema 导入 Neo4j，构建图模型。
+    表、字段、外键分别在一个显式事务中以 UNWIND 批量写入，每批 batch_size 行。
+    :param database: Neo4j 数据库名称，为空时使用服务端的默认数据库
+    :param target: 数据库目标名称，节点的 target 属性
+    :param legacy_target: 没有 target 属性的旧节点归属的目标，见 ensure_schema_constraints
+    """
+    batch_size = batch_size or get_import_config()["batch_size"]
+
+    table_rows = [
+        {"table_name": table['TABLE_NAME'], "table_comment": table['TABLE_COMMENT']}
+        for table in tables
+    ]
+    field_rows = [
+        {"table_name": column['TABLE_NAME'], "field_name": column['COLUMN_NAME'],
+         "field_comment": column['COLUMN_COMMENT'], "data_type": column['DATA_TYPE']}
+        for column in columns
+    ]
+    foreign_key_rows = [
+        {"table_name": fk['TABLE_NAME'], "column_name": fk['COLUMN_NAME'],
+         "referenced_table": fk['REFERENCED_TABLE_NAME'], "referenced_column": fk['REFERENCED_COLUMN_NAME']}
+        for fk in foreign_keys
+    ]
+
+    started = time.perf_counter()
+    with get_neo4j_driver().session(database=database) as session:
+        # 清空现有数据（可选）
+        # session.run("MATCH (n) DETACH DELETE n")
+
+        ensure_schema_constraints(session, legacy_target)
+
+        # 创建表节点（包括表注释）、字段节点（包括字段注释）与外键关系，先表后字段以保证 MATCH 能找到表节点
+        for name, query, rows in (("tables", MERGE_TABLES_QUERY, table_rows),
+                                  ("fields", MERGE_FIELDS_QUERY, field_rows),
+                                  ("foreign keys", MERGE_FOREIGN_KEYS_QUERY, foreign_key_rows)):
+            phase_started = time.perf_counter()
+            session.execute_write(run_batched, query, rows, batch_size, target=target)
+            elapsed = time.perf_counter() - phase_started
+            log_event("schema_import_phase", phase=name, rows=len(rows), seconds=round(elapsed, 3),
+                      rows_per_sec=round(len(rows) / max(elapsed, 1e-9)))
+
+        # 更新 schema 版本号，各进程的 schema 快照据此判断是否需要重新加载
+        session.execute_write(lambda tx: tx.run(BUMP_SCHEMA_VERSION_QUERY, target=target).consume())
+
+    total_rows = len(table_rows) + len(field_rows) + len(foreign_key_rows)
+    elapsed = time.perf_counter() - started
+    log_event("schema_import", store="neo4j", rows=total_rows, seconds=round(elapsed, 3),
+              rows_per_sec=round(total_rows / max(elapsed, 1e-9)), batch_size=batch_size)
@@ -0,0 +1,221 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+# 解析结果缓存的条目数，同一条 SQL 重复执行时不再重新切分
+PARSE_CACHE_SIZE = 512
+
+_TOKEN = re.compile(r"""
+    (?P<whitespace>\s+)
+  | (?P<comment>(?:--(?=\s|$)|\#)[^\n]*|/\*(?!!)[\s\S]*?(?:\*/|$))
+  | (?P<code_comment_open>/\*!\d*)
+  | (?P<code_comment_close>\*/)
+  | (?P<string>'(?:[^'\\]|\\[\s\S]|'')*'?|"(?:[^"\\]|\\[\s\S]|"")*"?)
+  | (?P<identifier>`(?:[^`]|``)*`?)
+  | (?P<word>[^\W]+|\$[\w$]*)
+  | (?P<semicolon>;)
+  | (?P<symbol>[\s\S])
+""", re.VERBOSE)
+
+# sql_mode 包含 NO_BACKSLASH_ESCAPES 时反斜杠不是转义符，'a\' 即为完整的字符串
+_TOKEN_NO_BACKSLASH_ESCAPES = re.compile(
+    _TOKEN.pattern.replace(r"""'(?:[^'\\]|\\[\s\S]|'')*'?|"(?:[^"\\]|\\[\s\S]|"")*"?""",
+                           r"""'(?:[^']|'')*'?|"(?:[^"]|"")*"?"""),
+    re.VERBOSE)
+
+# 不参与语句分类和语句边界计算的记号
+_TRIVIA = {"whitespace", "comment"}
+# CTE（WITH ... AS (...)）之后可以出现的主语句关键字
+_CTE_BODIES = {"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "TABLE", "VALUES"}
+# 语义相同的语句关键字统一为权限表中使用的名称
+_SYNONYMS = {"DESC": "DESCRIBE"}
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+class Statement(NamedTuple):
+    """切分后的单条语句"""
+    text: str        # 语句文本：去掉首尾空白、注释以及结尾分号，内部内容保持原样
+    operation: str   # 语句类型（大写），如 SELECT/INSERT/SHOW；WITH 语句取其主语句的类型
+
+
+def tokenize(sql: str, backslash_escapes: bool = True):
+    """
+    将 SQL 切分为记号，正确处理字符串、反引号标识符、-- / # / /* */ 注释。
+    /*! ... */ 可执行注释中的内容会被 MySQL 执行，因此按普通 SQL 切分。
+    backslash_escapes 为 False 时按 NO_BACKSLASH_ESCAPES 模式处理字符串（反斜杠不是转义符）。
+    """
+    pattern = _TOKEN if backslash_escapes else _TOKEN_NO_BACKSLASH_ESCAPES
+    pos, in_code_comment = 0, False
+    while pos < len(sql):
+        match = pattern.match(sql, pos)
+        kind, text = match.lastgroup, match.group()
+        if kind == "code_comment_open":
+            in_code_comment = True
+        elif kind == "code_comment_close":
+            if in_code_comment:
+                in_code_comment = False
+            else:
+                # 可执行注释之外的 */ 只是普通符号
+                kind, text = "symbol", "*"
+        yield Token(kind, text, pos, pos + len(text))
+        pos += len(text)
+
+
+def _classify(tokens) -> str:
+    """根据语句的有效记号判断语句类型"""
+    words = iter(token for token in tokens if token.kind not in ("code_comment_open", "code_comment_close"))
+    for token in words:
+        if token.kind == "word":
+            operation = token.text.upper()
+            break
+        if token.text != "(":
+            return ""
+    else:
+        return ""
+
+    if operation != "WITH":
+        return _SYNONYMS.get(operation, operation)
+
+    # WITH [RECURSIVE] name [(columns)] AS (...) [, ...] 之后，括号外的第一个主语句关键字即语句类型
+    depth = 0
+    for token in words:
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            depth -= 1
+        elif depth == 0 and token.kind == "word" and token.text.upper() in _CTE_BODIES:
+            return token.text.upper()
+    return operation
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def split_statements(sql: str, backslash_escapes: bool = True) -> Tuple[Statement, ...]:
+    """
+    按分号切分多条 SQL 语句（字符串、标识符和注释中的分号不作为分隔符），并识别每条语句的类型。
+    只有空白和注释的片段会被忽略。结果不可变，按 SQL 文本缓存。
+    backslash_escapes 为 False 时按 NO_BACKSLASH_ESCAPES 模式切分，见 tokenize。
+    """
+    statements, current = [], []
+
+    def flush():
+        code = [token for token in current if token.kind not in _TRIVIA]
+        if code:
+            statements.append(Statement(sql[code[0].start:code[-1].end], _classify(code)))
+        current.clear()
+
+    for token in tokenize(sql, backslash_escapes):
+        if token.kind == "semicolon":
+            flush()
+        else:
+            current.append(token)
+    flush()
+    return tuple(statements)
+
+
+def statement_type(sql: str) -> str:
+    """单条语句的类型（大写）；为空或无法识别时返回空字符串"""
+    statements = split_statements(sql)
+    return statements[0].operation if statements else ""
+
+
+# 加锁读：需要在主库上执行
+_LOCKING_CLAUSES = (("FOR", "UPDATE"), ("FOR", "SHARE"), ("LOCK", "IN", "SHARE", "MODE"))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def is_locking_read(sql: str) -> bool:
+    """语句是否包含 FOR UPDATE / FOR SHARE / LOCK IN SHARE MODE 加锁子句（字符串与注释中的内容不算）"""
+    words = tuple(token.text.upper() for token in tokenize(sql) if token.kind == "word")
+    return any(words[i:i + len(clause)] == clause
+               for clause in _LOCKING_CLAUSES for i in range(len(words) - len(clause) + 1))
+
+
+_NUMBER = re.compile(r"^(?:\d|0x)", re.IGNORECASE)
+_VALUE_LIST = re.compile(r"\?(?: ?, ?\?)+")
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def digest_text(sql: str) -> str:
+    """
+    语句摘要文本（与 performance_schema 的 DIGEST_TEXT 类似）：去掉注释，连续空白合并为一个空格，
+    字符串与数字常量替换为 ?，IN (1, 2, 3) 之类的常量列表合并为 "?, ..."。只有常量不同的语句摘要相同。
+    """
+    parts = []
+    for token in tokenize(sql):
+        if token.kind in _TRIVIA:
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        elif token.kind == "string" or (token.kind == "word" and _NUMBER.match(token.text)):
+            parts.append("?")
+        elif token.kind != "semicolon":
+            parts.append(token.text)
+    return _VALUE_LIST.sub("?, ...", "".join(parts).strip())
+
+
+def statement_digest(sql: str) -> str:
+    """语句摘要文本的 SHA-256，用作执行计划等按语句形态缓存的键"""
+    return hashlib.sha256(digest_text(sql).encode("utf-8")).hexdigest()
+
+
+def _top_level_tokens(sql: str) -> list:
+    """语句最外层（不在括号中的子查询内）的有效记号"""
+    tokens, depth = [], 0
+    for token in tokenize(sql):
+        if token.kind in _TRIVIA:
+            continue
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            depth -= 1
+        elif depth == 0:
+            tokens.append(token)
+    return tokens
+
+
+def _top_level_words(sql: str) -> list:
+    """语句最外层的单词，大写"""
+    return [token.text.upper() for token in _top_level_tokens(sql) if token.kind == "word"]
+
+
+def has_top_level_into(sql: str) -> bool:
+    """语句在最外层是否带有 INTO 子句（SELECT ... INTO @var / OUTFILE / DUMPFILE）"""
+    return "INTO" in _top_level_words(sql)
+
+
+# LIMIT 子句之后可能出现的子句
+_AFTER_LIMIT = {"FOR", "LOCK", "INTO", "PROCEDURE"}
+
+
+def top_level_limit(sql: str):
+    """最外层 LIMIT 子句的 (行数, 偏移量)，支持 LIMIT n、LIMIT m, n 与 LIMIT n OFFSET m
+
+    返回:
+        tuple: 没有 LIMIT 时返回 None；行数或偏移量不是数字常量（如参数占位符）时对应的值为 None
+    """
+    tokens = _top_level_tokens(sql)
+    starts = [index for index, token in enumerate(tokens) if token.kind == "word" and token.text.upper() == "LIMIT"]
+    if not starts:
+        return None
+    clause = []
+    for token in tokens[starts[-1] + 1:]:
+        if token.kind == "word" and token.text.upper() in _AFTER_LIMIT:
+            break
+        clause.append(token.text.upper())
+
+    def number(texts):
+        return int(texts[0]) if len(texts) == 1 and texts[0].isdigit() else None
+
+    if "OFFSET" in clause:
+        position = clause.index("OFFSET")
+        return number(clause[:position]), number(clause[position + 1:])
+    if "," in clause:
+        position = clause.index(",")
+        return number(clause[position + 1:]), number(clause[:position])
+    return number(clause), 0
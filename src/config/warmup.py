@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+
+from .logger import log_event
+
+
+class Warmup:
+    """
+    后台预热：在独立线程中依次执行耗时的初始化任务（模型加载、schema 导入等），
+    服务启动后即可处理请求，依赖这些子系统的请求可以等待预热完成。
+
+    任务可以分组：同一组的任务按注册顺序在同一线程中执行，不同组在各自的线程中并行执行，
+    请求可以只等待自己依赖的组（如某个数据库目标），不受其他组中慢任务的影响。
+    单个任务失败不会中断后续任务，失败信息记录在 status() 中；依赖它的功能在使用时会按需重试加载。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._groups = {}       # 组名 -> [(任务名, 函数)]
+        self._group_done = {}   # 组名 -> threading.Event
+        self._status = {}
+        self._threads = []
+        self._running = 0
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._finished_at = None
+
+    def add_task(self, name, func, group=None):
+        """注册预热任务，需在 start() 之前调用；group 为任务所在的组，默认组为 None"""
+        with self._lock:
+            self._groups.setdefault(group, []).append((name, func))
+            self._group_done.setdefault(group, threading.Event())
+            self._status[name] = {"state": "pending"}
+
+    def start(self):
+        """为每个组启动一个预热线程，重复调用时忽略"""
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.time()
+            self._running = len(self._groups)
+            if not self._groups:
+                self._finish()
+            for group, tasks in self._groups.items():
+                thread_name = f"{self.name}-warmup" if group is None else f"{self.name}-warmup-{group}"
+                thread = threading.Thread(target=self._run, args=(group, tasks), name=thread_name, daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _finish(self):
+        self._finished_at = time.time()
+        self._done.set()
+
+    def _run(self, group, tasks):
+        try:
+            for name, func in tasks:
+                self._status[name] = {"state": "running"}
+                started = time.perf_counter()
+                try:
+                    func()
+                except Exception as e:
+                    log_event("warmup_task_failed", level=logging.WARNING, warmup=self.name, task=name, error=str(e))
+                    self._status[name] = {"state": "failed", "error": str(e),
+                                          "seconds": round(time.perf_counter() - started, 3)}
+                else:
+                    self._status[name] = {"state": "ready",
+                                          "seconds": round(time.perf_counter() - started, 3)}
+        finally:
+            self._group_done[group].set()
+            with self._lock:
+                self._running -= 1
+                if self._running == 0:
+                    self._finish()
+
+    @property
+    def started(self):
+        return self._started_at is not None
+
+    @property
+    def done(self):
+        """全部任务已执行结束（无论成功与否）"""
+        return self._done.is_set()
+
+    @property
+    def ready(self):
+        """全部任务均已成功完成"""
+        return self.done and all(status["state"] == "ready" for status in self._status.values())
+
+    def wait(self, timeout=None):
+        """等待全部任务执行结束，超时返回 False"""
+        return self._done.wait(timeout)
+
+    def groups_done(self, groups):
+        """指定的组均已执行结束（无论成功与否）；未注册的组视为已结束"""
+        return all(self._group_done[group].is_set() for group in groups if group in self._group_done)
+
+    def pending_tasks(self, groups=None):
+        """指定的组（默认全部组）中尚未执行结束的任务名"""
+        names = [name for group, tasks in self._groups.items() if groups is None or group in groups
+                 for name, _ in tasks]
+        return [name for name in names if self._status[name]["state"] in ("pending", "running")]
+
+    def status(self):
+        """
+        返回预热状态。
+        :return: {"state": pending/warming/ready/failed, "tasks": {任务名: {"state": ..., ...}}, ...}
+        """
+        if not self.started:
+            state = "pending"
+        elif not self.done:
+            state = "warming"
+        else:
+            state = "ready" if self.ready else "failed"
+        status = {"state": state, "tasks": {name: dict(task) for name, task in self._status.items()}}
+        if self._started_at is not None:
+            finished_at = self._finished_at or time.time()
+            status["seconds"] = round(finished_at - self._started_at, 3)
+        return status
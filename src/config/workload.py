@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+from .dbconfig import get_workload_config
+from .sql_lexer import digest_text
+
+# 保留样例语句（供索引建议执行 EXPLAIN）的语句类型
+EXPLAINABLE_OPERATIONS = {"SELECT", "UPDATE", "DELETE"}
+# 样例语句超过该长度时不保留（如很长的 IN 列表），只记录统计
+_MAX_SAMPLE_LENGTH = 10000
+
+
+class WorkloadEntry:
+    """同一形态（摘要文本相同）语句的执行统计"""
+
+    __slots__ = ("digest_text", "operation", "sample", "count", "total_ms", "max_ms", "rows")
+
+    def __init__(self, digest: str, operation: str):
+        self.digest_text = digest
+        self.operation = operation
+        self.sample = None  # 最近一次执行的原始语句
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0       # 返回或影响的行数之和
+
+    def to_dict(self) -> dict:
+        return {
+            "digest_text": self.digest_text,
+            "operation": self.operation,
+            "sample": self.sample,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+        }
+
+
+class WorkloadLog:
+    """
+    进程内有界的工作负载记录：按 (数据库目标, 库名, 语句摘要文本) 累计 execute_sql 执行的语句的次数、耗时与行数。
+    只有常量不同的语句合并为一条；条目数超过 max_entries 时淘汰最久未执行的语句形态。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (target, database, digest_text) -> WorkloadEntry
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def record(self, target: str, database: str, statement, ms: float, rows: int):
+        """记录一次语句执行
+
+        参数:
+            statement: sql_lexer.Statement
+            ms (float): 执行耗时（毫秒）
+            rows (int): 返回或影响的行数
+        """
+        digest = digest_text(statement.text)
+        key = (target, database, digest)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = WorkloadEntry(digest, statement.operation)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+            else:
+                self._entries.move_to_end(key)
+            entry.count += 1
+            entry.total_ms += ms
+            entry.max_ms = max(entry.max_ms, ms)
+            entry.rows += max(rows, 0)
+            if statement.operation in EXPLAINABLE_OPERATIONS and len(statement.text) <= _MAX_SAMPLE_LENGTH:
+                entry.sample = statement.text
+
+    def entries(self, target: str = None, database: str = None) -> list:
+        """按总耗时从高到低返回记录的快照，每项为 dict（包含 target 与 database）；可按数据库目标与库过滤"""
+        with self._lock:
+            snapshot = [dict(entry.to_dict(), target=key[0], database=key[1])
+                        for key, entry in self._entries.items()
+                        if (target is None or key[0] == target) and (database is None or key[1] == database)]
+        return sorted(snapshot, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def clear(self, target: str = None, database: str = None):
+        """清除记录；指定 target / database 时只清除对应数据库目标与库的条目"""
+        with self._lock:
+            if target is None and database is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries
+                        if (target is None or key[0] == target) and (database is None or key[1] == database)]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "evictions": self._evictions}
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_workload_log():
+    """获取进程级共享的工作负载记录，WORKLOAD_LOG_SIZE 为 0 时返回 None"""
+    global _log
+    if _log is None:
+        config = get_workload_config()
+        if config["log_size"] <= 0:
+            return None
+        with _log_lock:
+            if _log is None:
+                _log = WorkloadLog(config["log_size"])
+    return _log
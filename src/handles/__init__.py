@@ -1,7 +1,19 @@
 from .execute_sql import ExecuteSQL
 from .get_schema import GetSchema
+from .pool_stats import GetPoolStats
+from .fetch_more import FetchMore
+from .query_cache_stats import GetQueryCacheStats
+from .bulk_insert import BulkInsert
+from .diagnose_workload import DiagnoseWorkload
+from .advise_indexes import AdviseIndexes
 
 __all__ = [
     "ExecuteSQL",
-    "GetSchema"
+    "GetSchema",
+    "GetPoolStats",
+    "FetchMore",
+    "GetQueryCacheStats",
+    "BulkInsert",
+    "DiagnoseWorkload",
+    "AdviseIndexes"
 ]
\ No newline at end of file
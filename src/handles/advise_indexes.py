@@ -0,0 +1,106 @@
+import json
+from typing import Dict, Any, Sequence
+
+from mcp import Tool
+from mcp.types import TextContent
+from mysql.connector import Error
+
+from config import get_db_config, get_role_permissions, get_pool, run_blocking
+from config.dbconfig import get_workload_config
+from config.governor import QueryGovernor
+from config.index_advisor import IndexAdvisor
+from config.workload import EXPLAINABLE_OPERATIONS, get_workload_log
+from .base import BaseHandler, target_property
+from .execute_sql import QueryHandle
+
+
+class AdviseIndexes(BaseHandler):
+    name = "advise_indexes"
+    description = (
+        "根据通过 execute_sql 执行过的语句（工作负载记录）建议组合索引：结合已有索引与 EXPLAIN 结果，"
+        "按估算收益返回候选索引的 DDL 及其可以加速的语句"
+    )
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "top": {
+                        "type": "integer",
+                        "description": "返回的索引建议条数，默认 10"
+                    },
+                    "clear": {
+                        "type": "boolean",
+                        "description": "分析后是否清空该数据库目标与库的工作负载记录（如建立索引后重新开始收集）"
+                    },
+                    "target": target_property()
+                }
+            }
+        )
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
+        """分析工作负载记录并返回索引建议
+
+        按总耗时选取记录中的 SELECT/UPDATE/DELETE（最多 INDEX_ADVISOR_STATEMENTS 种形态），
+        在主库执行 EXPLAIN（不执行语句本身）。只给出建议，不会创建索引。
+
+        参数:
+            top (int): 返回的建议条数
+            clear (bool): 分析后是否清空该数据库目标与库的工作负载记录
+            target (str): 数据库目标
+
+        返回:
+            list[TextContent]: JSON 格式的索引建议；未启用工作负载记录时返回提示信息
+        """
+        config = get_db_config(arguments.get("target"))
+        governor = QueryGovernor.for_role(config["role"], config["target"])
+        release = None
+        try:
+            if "EXPLAIN" not in get_role_permissions(config["role"]):
+                return [TextContent(type="text", text=f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作")]
+
+            log = get_workload_log()
+            if log is None:
+                return [TextContent(type="text", text="工作负载记录未启用（WORKLOAD_LOG_SIZE=0）")]
+
+            top = int(arguments.get("top") or 10)
+            if top < 1:
+                raise ValueError("top 必须大于0")
+            entries = [entry for entry in log.entries(config["target"], config["database"])
+                       if entry["operation"] in EXPLAINABLE_OPERATIONS and entry["sample"]]
+            entries = entries[:get_workload_config()["advisor_statements"]]
+            if not entries:
+                return [TextContent(type="text", text="工作负载记录中还没有可以分析的 SELECT/UPDATE/DELETE 语句")]
+
+            release = governor.check_concurrency()
+            if release is None:
+                return [TextContent(type="text", text=governor.report())]
+
+            handle = QueryHandle(governor)
+            report = await run_blocking(self.advise, entries, top, handle, config, on_cancel=handle.kill)
+            report["workload"] = log.stats()
+            if arguments.get("clear"):
+                log.clear(config["target"], config["database"])
+            text = json.dumps(report, ensure_ascii=False)
+            if governor.limits_hit:
+                text += f"\n{governor.report()}"
+            return [TextContent(type="text", text=text)]
+
+        except (ValueError, Error) as e:
+            return [TextContent(type="text", text=f"生成索引建议时出错: {str(e)}")]
+        finally:
+            if release is not None:
+                release()
+
+    def advise(self, entries: list, top: int, handle: QueryHandle, config: dict) -> dict:
+        """在当前线程中执行 EXPLAIN 并生成建议（由 run_tool 调度到数据库线程池）"""
+        pool = get_pool(config["target"])
+        with pool.connection() as conn:
+            handle.attach(pool, conn)
+            try:
+                return IndexAdvisor(conn, config["database"]).advise(entries, top)
+            finally:
+                handle.detach()
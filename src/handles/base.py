@@ -2,6 +2,8 @@ from typing import Dict, Any, Sequence, Type, ClassVar
 
 from mcp.types import TextContent, Tool
 
+from config.dbconfig import get_target_names
+
 
 class ToolRegistry:
     """工具注册表，用于管理所有工具实例"""
@@ -48,6 +50,15 @@ class ToolRegistry:
         return [tool.get_tool_description() for tool in cls._tools.values()]
 
 
+def target_property() -> dict:
+    """工具参数 target 的定义：可选的数据库目标，默认为 default"""
+    return {
+        "type": "string",
+        "enum": get_target_names(),
+        "description": "数据库目标（MYSQL_TARGETS 中配置的名称），默认为 default"
+    }
+
+
 class BaseHandler:
     """工具基类"""
     name: str = ""
@@ -0,0 +1,249 @@
+import csv
+import io
+import json
+import re
+import time
+from typing import Dict, Any, Sequence
+
+from mcp import Tool
+from mcp.types import TextContent
+from mysql.connector import Error
+
+from config import get_db_config, get_role_permissions, get_pool, run_blocking
+from config.dbconfig import get_bulk_insert_config
+from config.governor import QueryGovernor
+from config.logger import log_event
+from config.query_cache import get_query_cache
+from config.replica import record_write
+from .base import BaseHandler, target_property
+from .execute_sql import QueryHandle
+
+
+def quote_identifier(name: str) -> str:
+    """用反引号引用标识符，内部的反引号转义为两个反引号"""
+    return "`" + name.replace("`", "``") + "`"
+
+
+# 表名：库名.表名 或 表名，每部分为反引号引用的标识符或不含反引号、点号与空白的名称
+_TABLE_PART = r"(?:`(?:[^`]|``)+`|[^`.\s]+)"
+_TABLE_NAME = re.compile(rf"^({_TABLE_PART})(?:\.({_TABLE_PART}))?$")
+
+
+def quote_table(name: str) -> str:
+    """引用表名，支持 库名.表名；已带反引号的部分先去掉反引号再统一转义，不会原样拼入 SQL
+
+    异常:
+        ValueError: 表名不合法时抛出
+    """
+    match = _TABLE_NAME.match(name.strip())
+    if match is None:
+        raise ValueError(f"不合法的表名: {name}")
+    parts = [part for part in match.groups() if part is not None]
+    return ".".join(quote_identifier(part[1:-1].replace("``", "`") if part.startswith("`") else part)
+                    for part in parts)
+
+
+def values_clause(count: int, prefix: str) -> str:
+    """生成 executemany 使用的 VALUES 占位括号
+
+    mysql-connector 只替换该括号内的 %s，并把 SQL 中第一次出现的括号文本替换为多行值，
+    %% 不会被还原，因此列名不能用 %% 转义。列名中恰好含有相同文本时，在括号内补空格直到
+    与前面的 SQL 不重复，保证替换的是 VALUES 后的占位括号。
+    """
+    placeholders = ", ".join(["%s"] * count)
+    padding = ""
+    while f"({padding}{placeholders})" in prefix:
+        padding += " "
+    return f"({padding}{placeholders})"
+
+
+class BulkInsert(BaseHandler):
+    name = "bulk_insert"
+    description = (
+        "向MySQL表批量插入数据（JSON 或 CSV），按批使用一条多行 INSERT 执行并分批提交，返回插入速度"
+    )
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "table": {
+                        "type": "string",
+                        "description": "目标表名，可以为 库名.表名"
+                    },
+                    "columns": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "列名列表；省略时 CSV 取首行作为列名，JSON 对象数组取第一个对象的键"
+                    },
+                    "rows": {
+                        "type": "array",
+                        "description": "JSON 格式的数据：每行为与 columns 顺序一致的数组，或以列名为键的对象"
+                    },
+                    "csv": {
+                        "type": "string",
+                        "description": "CSV 格式的数据（与 rows 二选一），字段均按字符串插入"
+                    },
+                    "null_token": {
+                        "type": "string",
+                        "description": "CSV 中等于该值的字段插入为 NULL（例如 NULL 或 \\N），加引号的字段同样匹配；省略时不转换"
+                    },
+                    "chunk_size": {
+                        "type": "integer",
+                        "description": "每批（每个事务）插入的行数"
+                    },
+                    "ignore": {
+                        "type": "boolean",
+                        "description": "是否使用 INSERT IGNORE 跳过主键或唯一键冲突的行"
+                    },
+                    "target": target_property()
+                },
+                "required": ["table"]
+            }
+        )
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
+        """批量插入数据
+
+           数据按 chunk_size 分批，每批在一个事务中用 executemany 执行（mysql-connector 会将其改写为
+           一条多行 VALUES 的 INSERT）并提交一次。某一批出错时回滚该批并停止，已提交的批次保留。
+           与 execute_sql 共用角色的执行超时与会话并发数限制。
+
+           参数:
+               table (str): 目标表名
+               columns (list): 列名列表
+               rows (list) / csv (str): 要插入的数据
+               null_token (str): CSV 中表示 NULL 的字段值
+               chunk_size (int): 每批的行数
+               ignore (bool): 是否使用 INSERT IGNORE
+               target (str): 数据库目标
+
+           返回:
+               list[TextContent]: 插入的行数、批数、耗时与每秒插入行数
+           """
+        config = get_db_config(arguments.get("target"))
+        governor = QueryGovernor.for_role(config["role"], config["target"])
+        release = None
+        try:
+            if not arguments.get("table"):
+                raise ValueError("缺少目标表名")
+
+            # 与 execute_sql 使用相同的角色权限
+            if "INSERT" not in get_role_permissions(config["role"]):
+                return [TextContent(type="text", text=f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作")]
+
+            columns, rows = self.parse_rows(arguments)
+            bulk_config = get_bulk_insert_config()
+            if len(rows) > bulk_config["max_rows"]:
+                raise ValueError(f"单次最多插入 {bulk_config['max_rows']} 行，当前 {len(rows)} 行")
+            chunk_size = int(arguments.get("chunk_size") or bulk_config["chunk_size"])
+            if chunk_size < 1:
+                raise ValueError("chunk_size 必须大于0")
+
+            prefix = "INSERT {}INTO {} ({}) VALUES ".format(
+                "IGNORE " if arguments.get("ignore") else "",
+                quote_table(arguments["table"]),
+                ", ".join(quote_identifier(column) for column in columns))
+            sql = prefix + values_clause(len(columns), prefix)
+
+            log_event("bulk_insert", sampled=True, sql=sql, rows=len(rows), chunk_size=chunk_size)
+
+            release = governor.check_concurrency()
+            if release is None:
+                return [TextContent(type="text", text=governor.report())]
+
+            handle = QueryHandle(governor)
+            text = await run_blocking(self.insert_chunks, sql, rows, chunk_size, handle, config["target"],
+                                      on_cancel=handle.kill)
+            if governor.limits_hit:
+                text += f"\n{governor.report()}"
+            return [TextContent(type="text", text=text)]
+
+        except (ValueError, Error) as e:
+            return [TextContent(type="text", text=f"批量插入时出错: {str(e)}")]
+        finally:
+            if release is not None:
+                release()
+
+    def parse_rows(self, arguments: Dict[str, Any]) -> tuple:
+        """解析 JSON 或 CSV 数据，返回 (列名列表, 行元组列表)
+
+        异常:
+            ValueError: 数据缺失或列数不一致时抛出
+        """
+        columns = list(arguments.get("columns") or [])
+
+        if arguments.get("csv") is not None:
+            records = list(csv.reader(io.StringIO(arguments["csv"])))
+            if not columns:
+                if not records:
+                    raise ValueError("CSV 数据为空")
+                columns, records = records[0], records[1:]
+            # csv.reader 无法区分加引号与未加引号的字段，只在显式指定 null_token 时转换为 NULL
+            null_token = arguments.get("null_token")
+            rows = [tuple(None if null_token is not None and value == null_token else value for value in record)
+                    for record in records if record]
+        else:
+            rows = arguments.get("rows")
+            if isinstance(rows, str):
+                rows = json.loads(rows)
+            if not isinstance(rows, list):
+                raise ValueError("缺少要插入的数据（rows 或 csv）")
+            if rows and isinstance(rows[0], dict):
+                columns = columns or list(rows[0].keys())
+                rows = [tuple(row.get(column) for column in columns) for row in rows]
+            else:
+                rows = [tuple(row) for row in rows]
+
+        if not columns:
+            raise ValueError("缺少列名")
+        for number, row in enumerate(rows, 1):
+            if len(row) != len(columns):
+                raise ValueError(f"第 {number} 行有 {len(row)} 个值，与列数 {len(columns)} 不一致")
+        return columns, rows
+
+    def insert_chunks(self, sql: str, rows: list, chunk_size: int, handle: QueryHandle, target: str = None) -> str:
+        """在当前线程中按批插入并提交（由 run_tool 调度到数据库线程池）
+
+        返回:
+            str: 插入结果统计；出错时包含已提交的行数与出错的批次
+        """
+        # 写入总是发往主库，之后该会话的读语句在一段时间内也发往主库
+        record_write(target, handle.session)
+        pool = get_pool(target)
+        inserted = chunks = 0
+        error = None
+        start = time.perf_counter()
+        with pool.connection() as conn:
+            handle.attach(pool, conn)
+            try:
+                with conn.cursor() as cursor:
+                    for offset in range(0, len(rows), chunk_size):
+                        if handle.cancelled:
+                            break
+                        chunk = rows[offset:offset + chunk_size]
+                        try:
+                            conn.start_transaction()
+                            cursor.executemany(sql, chunk)
+                            conn.commit()
+                        except Error as e:
+                            conn.rollback()
+                            error = f"第 {chunks + 1} 批（第 {offset + 1}-{offset + len(chunk)} 行）插入失败，已回滚该批: {str(e)}"
+                            break
+                        inserted += max(cursor.rowcount, 0)
+                        chunks += 1
+            finally:
+                handle.detach()
+        elapsed = time.perf_counter() - start
+
+        if chunks:
+            cache = get_query_cache()
+            if cache is not None:
+                cache.invalidate_statement(sql)
+
+        summary = (f"已插入 {inserted} 行，提交 {chunks} 批，耗时 {elapsed:.3f} 秒，"
+                   f"{inserted / elapsed if elapsed > 0 else 0:.0f} 行/秒")
+        return f"{error}\n{summary}" if error else summary
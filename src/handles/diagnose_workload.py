@@ -0,0 +1,337 @@
+import json
+import logging
+import time
+from typing import Dict, Any, Sequence
+
+from mcp import Tool
+from mcp.types import TextContent
+from mysql.connector import Error
+
+from config import get_db_config, get_role_permissions, get_pool, run_blocking
+from config.governor import QueryGovernor
+from config.logger import log_event
+from .base import BaseHandler, target_property
+from .execute_sql import QueryHandle
+
+# performance_schema 的计时单位为皮秒
+_PICOSECONDS_PER_MS = 1_000_000_000
+
+# 排序方式 -> events_statements_summary_by_digest 的列
+_DIGEST_ORDERS = {
+    "total_latency": "SUM_TIMER_WAIT",
+    "avg_latency": "AVG_TIMER_WAIT",
+    "rows_examined": "SUM_ROWS_EXAMINED",
+}
+
+# 语句摘要统计（MySQL 5.6 起可用）；排除诊断查询自身访问系统表的语句（带参数执行，% 需写为 %%）
+_DIGEST_SQL = """
+SELECT DIGEST, DIGEST_TEXT, SCHEMA_NAME, COUNT_STAR, SUM_TIMER_WAIT, AVG_TIMER_WAIT, MAX_TIMER_WAIT,
+       SUM_ROWS_EXAMINED, SUM_ROWS_SENT, SUM_ROWS_AFFECTED, SUM_NO_INDEX_USED, SUM_NO_GOOD_INDEX_USED, SUM_ERRORS
+FROM performance_schema.events_statements_summary_by_digest
+WHERE DIGEST_TEXT IS NOT NULL
+  AND DIGEST_TEXT NOT LIKE '%%performance_schema%%'
+  AND DIGEST_TEXT NOT LIKE '%%information_schema%%'
+ORDER BY {order} DESC
+LIMIT %s
+"""
+
+# 不使用索引读取的行（INDEX_NAME 为 NULL 即全表扫描），MySQL 5.6 起可用
+_FULL_SCAN_SQL = """
+SELECT OBJECT_SCHEMA, OBJECT_NAME, COUNT_READ, SUM_TIMER_READ
+FROM performance_schema.table_io_waits_summary_by_index_usage
+WHERE INDEX_NAME IS NULL AND COUNT_READ > 0
+  AND OBJECT_SCHEMA NOT IN ('mysql', 'performance_schema', 'information_schema', 'sys')
+ORDER BY COUNT_READ DESC
+LIMIT %s
+"""
+
+_TRX_SQL = """
+SELECT trx_id, trx_state, trx_mysql_thread_id, trx_query, trx_operation_state, trx_tables_locked,
+       trx_rows_locked, trx_rows_modified, TIMESTAMPDIFF(SECOND, trx_started, NOW()) AS running_seconds,
+       TIMESTAMPDIFF(SECOND, trx_wait_started, NOW()) AS waiting_seconds
+FROM information_schema.innodb_trx
+ORDER BY trx_started
+"""
+
+# 依次尝试的锁等待查询：MySQL 8.0 为 performance_schema.data_lock_waits，5.6/5.7 为 information_schema.innodb_lock_waits
+_LOCK_WAIT_QUERIES = (
+    """
+    SELECT w.REQUESTING_ENGINE_TRANSACTION_ID AS requesting_trx_id,
+           w.BLOCKING_ENGINE_TRANSACTION_ID AS blocking_trx_id,
+           CONCAT(l.OBJECT_SCHEMA, '.', l.OBJECT_NAME) AS locked_table, l.INDEX_NAME AS locked_index,
+           l.LOCK_MODE AS lock_mode
+    FROM performance_schema.data_lock_waits w
+    JOIN performance_schema.data_locks l ON l.ENGINE_LOCK_ID = w.REQUESTING_ENGINE_LOCK_ID
+    """,
+    """
+    SELECT w.requesting_trx_id, w.blocking_trx_id, l.lock_table AS locked_table, l.lock_index AS locked_index,
+           l.lock_mode
+    FROM information_schema.innodb_lock_waits w
+    JOIN information_schema.innodb_locks l ON l.lock_id = w.requested_lock_id
+    """,
+)
+
+_TEXT_LIMIT = 200
+
+
+def _ms(picoseconds) -> float:
+    return round(int(picoseconds or 0) / _PICOSECONDS_PER_MS, 3)
+
+
+def _shorten(text, limit: int = _TEXT_LIMIT):
+    if text is None:
+        return None
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def summarize_digests(rows: list) -> list:
+    """整理语句摘要统计：耗时换算为毫秒，计算扫描行数与返回行数之比，标记未使用索引的语句"""
+    digests = []
+    for row in rows:
+        count = int(row["COUNT_STAR"] or 0)
+        examined, sent = int(row["SUM_ROWS_EXAMINED"] or 0), int(row["SUM_ROWS_SENT"] or 0)
+        digest = {
+            "digest": row["DIGEST"],
+            "sql": _shorten(row["DIGEST_TEXT"]),
+            "schema": row["SCHEMA_NAME"],
+            "count": count,
+            "total_ms": _ms(row["SUM_TIMER_WAIT"]),
+            "avg_ms": _ms(row["AVG_TIMER_WAIT"]),
+            "max_ms": _ms(row["MAX_TIMER_WAIT"]),
+            "rows_examined": examined,
+            "rows_sent": sent,
+            "rows_affected": int(row["SUM_ROWS_AFFECTED"] or 0),
+            # 每返回（或影响）一行需要扫描的行数，明显偏大说明缺少合适的索引
+            "examined_per_row": round(examined / max(sent + int(row["SUM_ROWS_AFFECTED"] or 0), 1), 1),
+        }
+        if row["SUM_NO_INDEX_USED"]:
+            digest["no_index_used"] = int(row["SUM_NO_INDEX_USED"])
+        if row["SUM_NO_GOOD_INDEX_USED"]:
+            digest["no_good_index_used"] = int(row["SUM_NO_GOOD_INDEX_USED"])
+        if row["SUM_ERRORS"]:
+            digest["errors"] = int(row["SUM_ERRORS"])
+        digests.append(digest)
+    return digests
+
+
+def build_lock_chains(transactions: list, waits: list) -> dict:
+    """根据 InnoDB 事务与锁等待关系整理阻塞链
+
+    参数:
+        transactions (list): innodb_trx 的行
+        waits (list): 锁等待关系，每行包含 requesting_trx_id、blocking_trx_id、locked_table、locked_index、lock_mode
+
+    返回:
+        dict:
+        - blockers: 阻塞源头（自身未在等待锁的阻塞者），按被其直接或间接阻塞的事务数排序
+        - chains: 每个等待锁的事务到阻塞源头的链，如 [等待者, 阻塞者, ..., 源头]，以线程 ID 表示
+        - waits: 锁等待明细
+    """
+    by_id = {str(trx["trx_id"]): trx for trx in transactions}
+    blocked_by = {}
+    for wait in waits:
+        blocked_by.setdefault(str(wait["requesting_trx_id"]), []).append(str(wait["blocking_trx_id"]))
+
+    def thread_of(trx_id: str):
+        trx = by_id.get(trx_id)
+        return trx["trx_mysql_thread_id"] if trx else None
+
+    chains, blocked_counts = [], {}
+    for waiting in blocked_by:
+        # 沿第一个阻塞者向上追溯到源头；死锁检测前可能短暂成环，遇到已访问的事务时停止
+        chain, seen, current = [waiting], {waiting}, waiting
+        while current in blocked_by:
+            current = blocked_by[current][0]
+            if current in seen:
+                break
+            chain.append(current)
+            seen.add(current)
+        chains.append([thread_of(trx_id) for trx_id in chain])
+        root = chain[-1]
+        blocked_counts[root] = blocked_counts.get(root, 0) + 1
+
+    blockers = []
+    for trx_id, blocked in sorted(blocked_counts.items(), key=lambda item: item[1], reverse=True):
+        trx = by_id.get(trx_id, {})
+        blockers.append({
+            "thread_id": trx.get("trx_mysql_thread_id"),
+            "trx_id": trx_id,
+            "blocked": blocked,
+            "running_seconds": trx.get("running_seconds"),
+            "rows_locked": trx.get("trx_rows_locked"),
+            # 没有正在执行的语句时，通常是事务已执行完语句但未提交
+            "query": _shorten(trx.get("trx_query")) or "（无正在执行的语句，事务可能未提交）",
+            "kill": f"KILL {trx['trx_mysql_thread_id']}" if trx.get("trx_mysql_thread_id") else None,
+        })
+
+    details = []
+    for wait in waits:
+        requesting = by_id.get(str(wait["requesting_trx_id"]), {})
+        details.append({
+            "waiting_thread": requesting.get("trx_mysql_thread_id"),
+            "blocking_thread": thread_of(str(wait["blocking_trx_id"])),
+            "waiting_seconds": requesting.get("waiting_seconds"),
+            "table": wait["locked_table"],
+            "index": wait["locked_index"],
+            "lock_mode": wait["lock_mode"],
+            "query": _shorten(requesting.get("trx_query")),
+        })
+    return {"blockers": blockers, "chains": chains, "waits": details}
+
+
+class DiagnoseWorkload(BaseHandler):
+    name = "diagnose_workload"
+    description = (
+        "诊断MySQL负载：按总耗时/平均耗时/扫描行数列出最耗资源的语句摘要（扫描行数与返回行数之比、未使用索引的次数）、"
+        "全表扫描最多的表，以及当前的锁等待、阻塞链与长事务（支持 MySQL 5.6 及以上）"
+    )
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "order_by": {
+                        "type": "string",
+                        "enum": list(_DIGEST_ORDERS),
+                        "description": "语句摘要的排序方式：total_latency（总耗时，默认）、avg_latency（平均耗时）、rows_examined（扫描行数）"
+                    },
+                    "top": {
+                        "type": "integer",
+                        "description": "返回的语句摘要与全表扫描表的条数，默认 10"
+                    },
+                    "target": target_property()
+                }
+            }
+        )
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
+        """读取 performance_schema 与 InnoDB 事务、锁视图，返回紧凑的诊断摘要
+
+        诊断查询在主库执行（锁等待只存在于主库）。某部分在当前 MySQL 版本或权限下不可用时，
+        该部分返回不可用的原因，其余部分照常返回。
+
+        参数:
+            order_by (str): 语句摘要的排序方式
+            top (int): 返回的条数
+            target (str): 数据库目标
+
+        返回:
+            list[TextContent]: JSON 格式的诊断摘要
+        """
+        config = get_db_config(arguments.get("target"))
+        governor = QueryGovernor.for_role(config["role"], config["target"])
+        release = None
+        try:
+            # 诊断查询只读取系统表，与 execute_sql 的 SELECT 使用相同的角色权限
+            if "SELECT" not in get_role_permissions(config["role"]):
+                return [TextContent(type="text", text=f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作")]
+
+            order_by = arguments.get("order_by") or "total_latency"
+            if order_by not in _DIGEST_ORDERS:
+                raise ValueError(f"未知的排序方式: {order_by}，可选: {', '.join(_DIGEST_ORDERS)}")
+            top = int(arguments.get("top") or 10)
+            if top < 1:
+                raise ValueError("top 必须大于0")
+
+            release = governor.check_concurrency()
+            if release is None:
+                return [TextContent(type="text", text=governor.report())]
+
+            handle = QueryHandle(governor)
+            report = await run_blocking(self.diagnose, order_by, top, handle, config["target"],
+                                        on_cancel=handle.kill)
+            text = json.dumps(report, ensure_ascii=False, default=str)
+            if governor.limits_hit:
+                text += f"\n{governor.report()}"
+            return [TextContent(type="text", text=text)]
+
+        except (ValueError, Error) as e:
+            return [TextContent(type="text", text=f"诊断负载时出错: {str(e)}")]
+        finally:
+            if release is not None:
+                release()
+
+    def diagnose(self, order_by: str, top: int, handle: QueryHandle, target: str = None) -> dict:
+        """在当前线程中依次读取各部分诊断信息（由 run_tool 调度到数据库线程池）"""
+        pool = get_pool(target)
+        start = time.perf_counter()
+        report = {}
+        with pool.connection() as conn:
+            handle.attach(pool, conn)
+            try:
+                with conn.cursor(dictionary=True) as cursor:
+                    report["statements"] = self.read_section(
+                        cursor, "statements", lambda: self.read_digests(cursor, order_by, top))
+                    report["full_scans"] = self.read_section(
+                        cursor, "full_scans", lambda: self.read_full_scans(cursor, top))
+                    report["locks"] = self.read_section(cursor, "locks", lambda: self.read_locks(cursor, top))
+            finally:
+                handle.detach()
+        log_event("diagnose_workload", sampled=True, target=target,
+                  ms=round((time.perf_counter() - start) * 1000, 2))
+        return report
+
+    def read_section(self, cursor, section: str, read):
+        """读取一部分诊断信息；系统表不存在或无权限时返回不可用的原因"""
+        try:
+            return read()
+        except Error as e:
+            log_event("diagnose_section_unavailable", level=logging.WARNING, sampled=True,
+                      section=section, error=str(e))
+            return {"unavailable": str(e)}
+
+    def performance_schema_enabled(self, cursor) -> bool:
+        cursor.execute("SELECT @@performance_schema AS enabled")
+        return bool(int(cursor.fetchall()[0]["enabled"]))
+
+    def read_digests(self, cursor, order_by: str, top: int):
+        if not self.performance_schema_enabled(cursor):
+            return {"unavailable": "performance_schema 未启用（performance_schema=OFF）"}
+        cursor.execute(_DIGEST_SQL.format(order=_DIGEST_ORDERS[order_by]), (top,))
+        digests = summarize_digests(cursor.fetchall())
+        if not digests:
+            return {"unavailable": "没有语句摘要统计，请确认已启用 statements_digest 消费者"}
+        return digests
+
+    def read_full_scans(self, cursor, top: int):
+        if not self.performance_schema_enabled(cursor):
+            return {"unavailable": "performance_schema 未启用（performance_schema=OFF）"}
+        cursor.execute(_FULL_SCAN_SQL, (top,))
+        return [
+            {"table": f"{row['OBJECT_SCHEMA']}.{row['OBJECT_NAME']}", "rows_read": int(row["COUNT_READ"]),
+             "read_ms": _ms(row["SUM_TIMER_READ"])}
+            for row in cursor.fetchall()
+        ]
+
+    def read_locks(self, cursor, top: int) -> dict:
+        cursor.execute(_TRX_SQL)
+        transactions = cursor.fetchall()
+        waits = []
+        if any(trx["trx_state"] == "LOCK WAIT" for trx in transactions):
+            waits = self.read_lock_waits(cursor)
+
+        summary = build_lock_chains(transactions, waits)
+        summary["transactions"] = len(transactions)
+        # 运行时间最长的事务（长事务会持有锁并阻止 purge）
+        summary["longest_transactions"] = [
+            {"thread_id": trx["trx_mysql_thread_id"], "state": trx["trx_state"],
+             "running_seconds": trx["running_seconds"], "rows_locked": trx["trx_rows_locked"],
+             "rows_modified": trx["trx_rows_modified"], "query": _shorten(trx["trx_query"])}
+            for trx in transactions[:top]
+        ]
+        return summary
+
+    def read_lock_waits(self, cursor) -> list:
+        """读取锁等待关系，MySQL 8.0 使用 performance_schema.data_lock_waits，更早的版本使用 innodb_lock_waits"""
+        for index, query in enumerate(_LOCK_WAIT_QUERIES):
+            try:
+                cursor.execute(query)
+            except Error:
+                if index + 1 == len(_LOCK_WAIT_QUERIES):
+                    raise
+                continue
+            return cursor.fetchall()
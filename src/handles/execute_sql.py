@@ -1,11 +1,25 @@
+import logging
+import threading
+import time
 from typing import Dict, Any, Sequence
 
 from mcp import Tool
 from mcp.types import TextContent
-from mysql.connector import connect, Error
+from mysql.connector import Error
 
-from config import get_db_config, get_role_permissions
-from .base import BaseHandler
+from config import get_db_config, get_role_permissions, run_blocking
+from config.dbconfig import get_result_config
+from config.result_stream import (ResultStream, extend_net_write_timeout, get_stream_registry, page_limits,
+                                  restore_net_write_timeout)
+from config.cost_guard import get_cost_guard
+from config.encoders import EncoderRegistry, batched, get_encoder
+from config.governor import QueryGovernor, current_session
+from config.logger import log_event
+from config.query_cache import DDL_OPERATIONS, READ_OPERATIONS, cache_tags, get_query_cache, is_cacheable
+from config.replica import is_replica_safe, record_write, route_pool
+from config.sql_lexer import split_statements, statement_type
+from config.workload import get_workload_log
+from .base import BaseHandler, target_property
 
 
 class ExecuteSQL(BaseHandler):
@@ -24,7 +38,37 @@ class ExecuteSQL(BaseHandler):
                     "query": {
                         "type": "string",
                         "description": "要执行的SQL语句"
-                    }
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": EncoderRegistry.get_formats(),
+                        "description": "结果格式：csv（默认）、jsonl（每行一个JSON对象）、columnar（按列输出并对重复值做字典编码，最紧凑）、markdown（表格）"
+                    },
+                    "stream": {
+                        "type": "boolean",
+                        "description": "是否分页流式返回结果（仅支持单条查询语句），结果未读完时返回续读令牌，使用 fetch_more 工具继续获取"
+                    },
+                    "page_rows": {
+                        "type": "integer",
+                        "description": "流式模式下每页最多返回的行数"
+                    },
+                    "page_bytes": {
+                        "type": "integer",
+                        "description": "流式模式下每页最多返回的字节数"
+                    },
+                    "use_cache": {
+                        "type": "boolean",
+                        "description": "是否使用只读语句的结果缓存（服务端启用缓存时生效，默认使用），需要最新数据时传 false"
+                    },
+                    "transaction": {
+                        "type": "boolean",
+                        "description": "是否在一个事务中执行全部语句：最后只提交一次，任一语句出错时回滚整个事务，并返回每条语句的耗时（不支持 DDL）"
+                    },
+                    "savepoints": {
+                        "type": "boolean",
+                        "description": "事务模式下为每条语句设置保存点：语句出错时只回滚该语句并继续执行，最后提交其余语句"
+                    },
+                    "target": target_property()
                 },
                 "required": ["query"]
             }
@@ -40,79 +84,538 @@ class ExecuteSQL(BaseHandler):
         返回:
             bool: 是否有权限执行
         """
-        # 提取SQL语句的操作类型
-        operation = sql.strip().split()[0].upper()
-        return operation in allowed_operations
+        # 识别SQL语句的操作类型（跳过注释，WITH 语句取其主语句的类型）
+        return statement_type(sql) in allowed_operations
+
+    def check_escape_permission(self, query: str, allowed_operations: list) -> bool:
+        """按 NO_BACKSLASH_ESCAPES 模式（反斜杠不是转义符）重新切分语句，每条语句同样需要有执行权限
+
+        服务器启用该模式时 'a\\' 即为完整的字符串，其后的 ; DROP TABLE ... 会作为独立的语句执行，
+        只按默认规则切分会把它误认为字符串的一部分。两种规则下切分出的语句都有权限时才执行，与服务器的 sql_mode 无关。
+        """
+        return all(statement.operation in allowed_operations
+                   for statement in split_statements(query, backslash_escapes=False))
 
     async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
-       """执行SQL查询语句
-
-          参数:
-              query (str): 要执行的SQL语句，支持多条语句以分号分隔
-
-          返回:
-              list[TextContent]: 包含查询结果的TextContent列表
-              - 对于SELECT查询：返回CSV格式的结果，包含列名和数据
-              - 对于SHOW TABLES：返回数据库中的所有表名
-              - 对于其他查询：返回执行状态和影响行数
-              - 多条语句的结果以"---"分隔
-
-          异常:
-              Error: 当数据库连接或查询执行失败时抛出
-          """
-       config = get_db_config()
-       try:
-           if "query" not in arguments:
-               raise ValueError("缺少查询语句")
-
-           query = arguments["query"]
-
-           print('SQL语句：')
-           print(query)
-           
-           # 获取角色权限
-           allowed_operations = get_role_permissions(config["role"])
-
-           with connect(**{k: v for k, v in config.items() if k != "role"}) as conn:
-               with conn.cursor() as cursor:
-                   statements = [stmt.strip() for stmt in query.split(';') if stmt.strip()]
-                   results = []
-
-                   for statement in statements:
-                       try:
-                           # 检查权限
-                           if not self.check_sql_permission(statement, allowed_operations):
-                               results.append(f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作")
-                               continue
-
-                           cursor.execute(statement)
-
-                           # 检查语句是否返回了结果集 (SELECT, SHOW, EXPLAIN, etc.)
-                           if cursor.description:
-                               columns = [desc[0] for desc in cursor.description]
-                               rows = cursor.fetchall()
-
-                               # 将每一行的数据转换为字符串，特殊处理None值
-                               formatted_rows = []
-                               for row in rows:
-                                   formatted_row = ["NULL" if value is None else str(value) for value in row]
-                                   formatted_rows.append(",".join(formatted_row))
-
-                               # 将列名和数据合并为CSV格式
-                               results.append("\n".join([",".join(columns)] + formatted_rows))
-
-                           # 如果语句没有返回结果集 (INSERT, UPDATE, DELETE, etc.)
-                           else:
-                               conn.commit()  # 只有在非查询语句时才提交
-                               results.append(f"查询执行成功。影响行数: {cursor.rowcount}")
-
-                       except Error as stmt_error:
-                           # 单条语句执行出错时，记录错误并继续执行
-                           results.append(f"执行语句 '{statement}' 出错: {str(stmt_error)}")
-                           # 可以在这里选择是否继续执行后续语句，目前是继续
-
-                   return [TextContent(type="text", text="\n---\n".join(results))]
-
-       except Error as e:
-           return [TextContent(type="text", text=f"执行查询时出错: {str(e)}")]
+        """执行SQL查询语句
+
+           SQL 在独立的数据库线程池中执行，不阻塞事件循环；调用被取消（如客户端断开）或超过角色的执行超时时，
+           会通过独立连接发送 KILL QUERY 中止正在执行的语句，且不再执行剩余语句。
+           结果行数、响应字节数与并发数受角色及数据库目标的资源限制约束，触发的限制在结果末尾说明。
+           数据库目标配置了从库时，只读语句发往复制延迟在阈值内的从库，写语句与事务发往主库。
+
+           参数:
+               query (str): 要执行的SQL语句，支持多条语句以分号分隔
+               target (str): 数据库目标，使用该目标的连接池、角色与资源限制
+               transaction (bool): 是否在一个事务中执行全部语句，见 execute_transaction
+
+           返回:
+               list[TextContent]: 包含查询结果的TextContent列表
+               - 对于SELECT查询：按 format 参数编码的结果（默认CSV），包含列名和数据
+               - 对于SHOW TABLES：返回数据库中的所有表名
+               - 对于其他查询：返回执行状态和影响行数
+               - 多条语句的结果以"---"分隔
+
+           异常:
+               Error: 当数据库连接或查询执行失败时抛出
+           """
+        config = get_db_config(arguments.get("target"))
+        governor = QueryGovernor.for_role(config["role"], config["target"])
+        release = None
+        try:
+            if "query" not in arguments:
+                raise ValueError("缺少查询语句")
+
+            query = arguments["query"]
+
+            log_event("execute_sql", sampled=True, query=query)
+
+            result_config = get_result_config()
+            fmt = arguments.get("format") or result_config["format"]
+            if fmt not in EncoderRegistry.get_formats():
+                return [TextContent(type="text", text=f"未知的结果格式: {fmt}，可选: {', '.join(EncoderRegistry.get_formats())}")]
+
+            release = governor.check_concurrency()
+            if release is None:
+                return [TextContent(type="text", text=governor.report())]
+
+            handle = QueryHandle(governor)
+            if arguments.get("stream"):
+                page_rows, page_bytes = governor.clamp_page(*page_limits(arguments))
+                results = [await run_blocking(self.execute_streaming, query, config, handle, fmt,
+                                              page_rows, page_bytes, on_cancel=handle.kill)]
+            elif arguments.get("transaction"):
+                results = [await run_blocking(self.execute_transaction, query, config, handle, fmt,
+                                              bool(arguments.get("savepoints")), on_cancel=handle.kill)]
+            else:
+                use_cache = arguments.get("use_cache", True) is not False
+                results = await run_blocking(self.execute_statements, query, config, handle, fmt, use_cache,
+                                             on_cancel=handle.kill)
+
+            if governor.limits_hit:
+                results.append(governor.report())
+            return [TextContent(type="text", text="\n---\n".join(results))]
+
+        except Error as e:
+            text = f"执行查询时出错: {str(e)}"
+            if governor.limits_hit:
+                text += f"\n---\n{governor.report()}"
+            return [TextContent(type="text", text=text)]
+        finally:
+            if release is not None:
+                release()
+
+    def execute_statements(self, query: str, config: dict, handle: "QueryHandle", fmt: str = "csv",
+                           use_cache: bool = True) -> list:
+        """在当前线程中同步执行SQL语句（由 run_tool 调度到数据库线程池）
+
+        通过权限检查的语句拼接为一条多语句 SQL，一次网络往返执行，再依次读取每条语句的结果；
+        某条语句出错时 MySQL 不再执行其后的语句，记录错误后将剩余语句作为新的一批继续执行。
+        启用成本检查（COST_GUARD）时，执行前先对 SELECT 做 EXPLAIN，超过阈值的语句被拒绝或自动添加 LIMIT。
+        可缓存的只读语句优先从结果缓存读取（同一批中写语句之后的语句除外）；
+        写语句提交后使其涉及的表的缓存失效（不受 use_cache 影响）。
+        实际执行的语句按形态记入工作负载记录（WORKLOAD_LOG_SIZE），供索引建议分析。
+
+        参数:
+            query (str): 要执行的SQL语句，支持多条语句以分号分隔
+            config (dict): 数据库配置
+            handle (QueryHandle): 用于跨线程取消的查询句柄
+            fmt (str): 结果格式
+            use_cache (bool): 是否读取和写入结果缓存
+
+        返回:
+            list: 每条语句的执行结果文本
+        """
+        # 获取角色权限
+        allowed_operations = get_role_permissions(config["role"])
+        if not self.check_escape_permission(query, allowed_operations):
+            return [f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作"]
+        cache = get_query_cache()
+        statements = split_statements(query)
+        results = [None] * len(statements)
+        cache_keys = {}
+        timings = {}
+        pending = []
+        wrote = False
+
+        for index, statement in enumerate(statements):
+            # 检查权限
+            if not self.check_sql_permission(statement.text, allowed_operations):
+                results[index] = f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作"
+                continue
+
+            if cache is not None and use_cache and not wrote and is_cacheable(statement.text):
+                cache_key = cache.make_key(config["target"], config["database"], config["role"], statement.text, fmt)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+                cache_keys[index] = cache_key
+            if statement.operation not in READ_OPERATIONS:
+                wrote = True
+            pending.append(index)
+
+        if wrote:
+            record_write(config["target"], handle.session)
+        if pending:
+            # 同一批语句在同一个连接上执行：全部可以在从库执行时才发往从库
+            read_only = all(is_replica_safe(statements[index]) for index in pending)
+            pool = route_pool(config["target"], handle.session, read_only)
+            with pool.connection() as conn:
+                handle.attach(pool, conn)
+                try:
+                    guarded, pending, notes = self.guard_statements(conn, config, statements, pending, results,
+                                                                    cache_keys)
+                    while pending and not handle.cancelled:
+                        pending = self.execute_batch(conn, handle, guarded, pending, results, fmt, cache, cache_keys,
+                                                     timings)
+                finally:
+                    handle.detach()
+            self.record_workload(config, [(statements[index], *timing) for index, timing in timings.items()])
+            for index, note in notes.items():
+                if results[index] is not None:
+                    results[index] = f"{note}\n{results[index]}"
+
+        # 取消后未执行的语句不返回结果
+        return [result for result in results if result is not None]
+
+    def guard_statements(self, conn, config: dict, statements: tuple, pending: list, results: list,
+                         cache_keys: dict) -> tuple:
+        """执行前对待执行的 SELECT 做成本检查（未启用 COST_GUARD 时原样返回）
+
+        被拒绝的语句在 results 中写入计划摘要，不再执行；自动添加 LIMIT 的语句改写后执行，结果不写入缓存。
+
+        返回:
+            tuple: (语句，自动添加 LIMIT 的为改写后的语句, 仍需执行的语句下标, 语句下标 -> 自动添加 LIMIT 的提示)
+        """
+        guard = get_cost_guard(config["target"])
+        if not guard.enabled:
+            return statements, pending, {}
+
+        statements = list(statements)
+        remaining, notes = [], {}
+        for index in pending:
+            result = guard.check(conn, statements[index], (config["target"], config["database"]))
+            if result.rejected:
+                results[index] = result.message
+                continue
+            if result.message:
+                notes[index] = result.message
+                statements[index] = statements[index]._replace(text=result.statement)
+                cache_keys.pop(index, None)
+            remaining.append(index)
+        return tuple(statements), remaining, notes
+
+    def record_workload(self, config: dict, executed: list):
+        """将执行成功的语句记入工作负载记录
+
+        参数:
+            executed (list): (语句, 耗时毫秒, 返回或影响的行数) 列表
+        """
+        log = get_workload_log()
+        if log is not None:
+            for statement, ms, rows in executed:
+                log.record(config["target"], config["database"], statement, ms, rows)
+
+    def execute_batch(self, conn, handle: "QueryHandle", statements: tuple, batch: list, results: list, fmt: str,
+                      cache, cache_keys: dict, timings: dict = None) -> list:
+        """以一条多语句 SQL 执行一批语句，结果按语句下标写入 results
+
+        参数:
+            conn: 数据库连接
+            handle (QueryHandle): 查询句柄，提供资源限制
+            statements (tuple): 全部语句
+            batch (list): 本批要执行的语句下标
+            results (list): 每条语句的结果文本
+            fmt (str): 结果格式
+            cache: 结果缓存，未启用时为 None
+            cache_keys (dict): 语句下标 -> 缓存键，只有需要写入缓存的语句才有
+            timings (dict): 写入执行成功的语句的 语句下标 -> (耗时毫秒, 返回或影响的行数)；
+                多条语句一次发送，每条的耗时为上一条结果读取完到本条结果读取完的时间
+
+        返回:
+            list: 因前面的语句出错而未执行、需要继续执行的语句下标
+        """
+        writes = []
+        position = 0
+        timings = {} if timings is None else timings
+        with conn.cursor() as cursor:
+            try:
+                mark = time.perf_counter()
+                cursor.execute(";\n".join(statements[index].text for index in batch))
+                while True:
+                    index = batch[position]
+                    statement = statements[index].text
+
+                    # 检查语句是否返回了结果集 (SELECT, SHOW, EXPLAIN, etc.)
+                    if cursor.description:
+                        columns = [desc[0] for desc in cursor.description]
+                        # 按批读取并编码，避免同时持有全部原始行；超出资源限制的行被丢弃
+                        results[index], truncated = handle.governor.read_result(
+                            cursor, lambda batches: self.format_rows(columns, batches, fmt))
+                        if index in cache_keys and not truncated:
+                            cache.put(cache_keys[index], results[index], cache_tags(statement))
+
+                    # 如果语句没有返回结果集 (INSERT, UPDATE, DELETE, etc.)
+                    else:
+                        writes.append(statement)
+                        results[index] = f"查询执行成功。影响行数: {cursor.rowcount}"
+
+                    now = time.perf_counter()
+                    timings[index] = ((now - mark) * 1000, cursor.rowcount)
+                    mark = now
+                    position += 1
+                    if position == len(batch):
+                        break
+                    if not cursor.nextset():
+                        # 服务端返回的结果少于语句数，剩余语句是否执行未知，不再重试
+                        for index in batch[position:]:
+                            results[index] = f"执行语句 '{statements[index].text}' 未返回结果"
+                        position = len(batch)
+                        break
+            except Error as stmt_error:
+                # 单条语句执行出错时，记录错误，其后的语句由调用方作为新的一批继续执行
+                index = batch[position]
+                results[index] = f"执行语句 '{statements[index].text}' 出错: {str(stmt_error)}"
+                position += 1
+
+        if writes:
+            conn.commit()  # 只有在非查询语句时才提交
+            if cache is not None:
+                for statement in writes:
+                    cache.invalidate_statement(statement)
+        return batch[position:]
+
+    def execute_transaction(self, query: str, config: dict, handle: "QueryHandle", fmt: str = "csv",
+                            savepoints: bool = False) -> str:
+        """在一个事务中逐条执行全部语句，最后只提交一次（由 run_tool 调度到数据库线程池）
+
+        执行前检查全部语句的权限，任一语句无权限或为 DDL（MySQL 会隐式提交，无法回滚）时不执行任何语句。
+        默认任一语句出错即回滚整个事务；启用 savepoints 时每条语句前设置保存点，出错时只回滚到该语句之前并继续执行。
+        启用成本检查（COST_GUARD）时，开始事务前对全部 SELECT 做 EXPLAIN：任一语句被拒绝时不执行任何语句，
+        自动添加 LIMIT 的语句改写后执行，与非事务模式相同。
+        事务内不读写结果缓存，提交后使写语句涉及的表的缓存失效。
+
+        参数:
+            query (str): 要执行的SQL语句，多条语句以分号分隔
+            config (dict): 数据库配置
+            handle (QueryHandle): 用于跨线程取消的查询句柄
+            fmt (str): 结果格式
+            savepoints (bool): 是否为每条语句设置保存点
+
+        返回:
+            str: 每条语句的结果与耗时，以及事务的提交或回滚情况
+        """
+        allowed_operations = get_role_permissions(config["role"])
+        if not self.check_escape_permission(query, allowed_operations):
+            return f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作，事务未执行"
+        statements = split_statements(query)
+        if not statements:
+            return "没有要执行的SQL语句"
+        for statement in statements:
+            if not self.check_sql_permission(statement.text, allowed_operations):
+                return f"权限不足: 当前角色 '{config['role']}' 无权执行语句 '{statement.text}'，事务未执行"
+            if statement.operation in DDL_OPERATIONS:
+                return f"事务模式不支持 DDL 语句 '{statement.text}'（MySQL 会隐式提交），事务未执行"
+
+        results, writes, executed = [], [], []
+        failed = 0
+        if any(statement.operation not in READ_OPERATIONS for statement in statements):
+            record_write(config["target"], handle.session)
+        start = time.perf_counter()
+        pool = route_pool(config["target"], handle.session, read_only=False)
+        with pool.connection() as conn:
+            handle.attach(pool, conn)
+            try:
+                rejected = [None] * len(statements)
+                guarded, pending, notes = self.guard_statements(conn, config, statements,
+                                                                list(range(len(statements))), rejected, {})
+                if len(pending) < len(statements):
+                    return "\n---\n".join([message for message in rejected if message is not None]
+                                           + ["事务未执行"])
+                with conn.cursor() as cursor:
+                    conn.start_transaction()
+                    for index, statement in enumerate(guarded):
+                        if handle.cancelled:
+                            conn.rollback()
+                            return "查询已取消，事务已回滚"
+                        savepoint = f"sp_{index + 1}"
+                        statement_start = time.perf_counter()
+                        try:
+                            if savepoints:
+                                cursor.execute(f"SAVEPOINT {savepoint}")
+                            cursor.execute(statement.text)
+                            if cursor.description:
+                                columns = [desc[0] for desc in cursor.description]
+                                text, _ = handle.governor.read_result(
+                                    cursor, lambda batches: self.format_rows(columns, batches, fmt))
+                            else:
+                                writes.append(statement.text)
+                                text = f"查询执行成功。影响行数: {cursor.rowcount}"
+                        except Error as stmt_error:
+                            elapsed = (time.perf_counter() - statement_start) * 1000
+                            error = f"执行语句 '{statement.text}' 出错: {str(stmt_error)}"
+                            if not savepoints:
+                                conn.rollback()
+                                results.append(f"{error}\n耗时: {elapsed:.2f} ms")
+                                return "\n---\n".join(
+                                    results + [f"事务已回滚，第 {index + 1} 条语句出错，之前的 {index} 条语句均已撤销"])
+                            cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                            failed += 1
+                            text = f"{error}（已回滚到该语句之前）"
+                        else:
+                            executed.append((statements[index], (time.perf_counter() - statement_start) * 1000,
+                                             cursor.rowcount))
+                            if index in notes:
+                                text = f"{notes[index]}\n{text}"
+                        if savepoints:
+                            # 语句已完成（或已回滚到保存点），释放保存点，长事务中不累积
+                            cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+                        results.append(f"{text}\n耗时: {(time.perf_counter() - statement_start) * 1000:.2f} ms")
+                    conn.commit()
+            except Error:
+                conn.rollback()
+                raise
+            finally:
+                handle.detach()
+
+        self.record_workload(config, executed)
+        cache = get_query_cache()
+        if cache is not None:
+            for statement in writes:
+                cache.invalidate_statement(statement)
+        summary = f"事务已提交，共 {len(statements)} 条语句"
+        if failed:
+            summary += f"，其中 {failed} 条出错并已回滚到保存点"
+        results.append(f"{summary}，总耗时: {(time.perf_counter() - start) * 1000:.2f} ms")
+        return "\n---\n".join(results)
+
+    def execute_streaming(self, query: str, config: dict, handle: "QueryHandle", fmt: str,
+                          page_rows: int, page_bytes: int) -> str:
+        """以非缓冲游标执行单条查询，只读取第一页数据，剩余数据留在服务端等待续读
+
+        参数:
+            query (str): 要执行的单条查询语句
+            config (dict): 数据库配置
+            handle (QueryHandle): 用于跨线程取消的查询句柄
+            fmt (str): 结果格式，续读时默认沿用
+            page_rows (int): 每页最多返回的行数
+            page_bytes (int): 每页最多返回的字节数
+
+        返回:
+            str: 第一页结果；结果未读完时附带续读令牌
+        """
+        statements = split_statements(query)
+        if len(statements) != 1 or len(split_statements(query, backslash_escapes=False)) != 1:
+            return "流式模式仅支持单条SQL语句"
+        statement = statements[0].text
+
+        allowed_operations = get_role_permissions(config["role"])
+        if (not self.check_sql_permission(statement, allowed_operations)
+                or not self.check_escape_permission(query, allowed_operations)):
+            return f"权限不足: 当前角色 '{config['role']}' 无权执行该SQL操作"
+
+        registry = get_stream_registry()
+        if registry.disabled_reason:
+            return registry.disabled_reason
+        if not registry.can_open():
+            return "未读完的结果集数量已达上限，请先读完或关闭已有的结果集"
+
+        read_only = is_replica_safe(statements[0])
+        if not read_only:
+            record_write(config["target"], handle.session)
+        pool = route_pool(config["target"], handle.session, read_only)
+        conn = pool.acquire()
+        handle.attach(pool, conn)
+        stream = None
+        net_write_timeout = None
+        try:
+            # 流式读取按页返回，超过成本阈值时只拒绝，不自动添加 LIMIT
+            guarded = get_cost_guard(config["target"]).check(conn, statements[0], (config["target"], config["database"]),
+                                                             allow_limit=False)
+            if guarded.rejected:
+                return guarded.message
+
+            # 结果集在两次续读之间停留在服务端，net_write_timeout 需不小于续读令牌的空闲超时
+            net_write_timeout = extend_net_write_timeout(conn, registry.ttl)
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(statement)
+            if not cursor.description:
+                conn.commit()
+                cache = get_query_cache()
+                if cache is not None:
+                    cache.invalidate_statement(statement)
+                return f"查询执行成功。影响行数: {cursor.rowcount}"
+
+            stream = ResultStream(pool, conn, cursor, [desc[0] for desc in cursor.description], statement, fmt,
+                                  config["target"], handle.governor.max_rows, net_write_timeout)
+            return self.read_stream_page(registry, stream, None, page_rows, page_bytes)
+        except Error as e:
+            return f"执行语句 '{statement}' 出错: {str(e)}"
+        finally:
+            handle.detach()
+            if stream is None:
+                discard = handle.cancelled
+                if not discard and net_write_timeout is not None:
+                    discard = not restore_net_write_timeout(conn, net_write_timeout)
+                pool.release(conn, discard=discard)
+
+    def read_stream_page(self, registry, stream, token, page_rows: int, page_bytes: int, fmt: str = None) -> str:
+        """读取结果集的下一页；读完或累计返回的行数达到 max_rows 时关闭结果集，否则（重新）登记续读令牌
+
+        参数:
+            registry: 结果集注册表
+            stream (ResultStream): 结果集
+            token (str): 已有的续读令牌，首页时为 None
+            fmt (str): 本页的结果格式，默认沿用首页的格式
+
+        返回:
+            str: 当前页的结果文本
+        """
+        with stream.lock:
+            if stream.closed:
+                return "续读令牌不存在或已过期，请重新执行查询"
+            try:
+                rows = stream.read_page(page_rows, page_bytes)
+            except Exception:
+                if token:
+                    registry.close(token)
+                else:
+                    stream.close()
+                raise
+            text = self.format_rows(stream.columns, batched(rows), fmt or stream.fmt)
+
+            if stream.exhausted or stream.limited:
+                if token:
+                    registry.close(token)
+                else:
+                    stream.close()
+                if stream.limited:
+                    return (f"{text}\n---\n已返回 {stream.rows_read} 行，结果行数超过 {stream.max_rows} 行的限制，"
+                            f"剩余数据未返回，结果集已关闭")
+                return f"{text}\n---\n结果已全部返回，共 {stream.rows_read} 行"
+
+            token = token or registry.register(stream)
+            return (f"{text}\n---\n本页 {len(rows)} 行，已返回 {stream.rows_read} 行，结果未读完。"
+                    f"continuation_token: {token}")
+
+    def format_rows(self, columns: list, row_batches, fmt: str = "csv") -> str:
+        """按指定格式编码结果集，None 输出为 NULL
+
+        参数:
+            columns (list): 列名
+            row_batches: 按批提供的行数据
+            fmt (str): 结果格式
+        """
+        return get_encoder(fmt).encode(columns, row_batches)
+
+
+class QueryHandle:
+    """跨线程的查询句柄：记录执行 SQL 的连接，供事件循环侧在取消时中止查询
+
+    资源限制设置了执行超时时，连接登记后启动看门狗，超时后标记取消并中止正在执行的语句。
+    """
+
+    def __init__(self, governor: QueryGovernor = None):
+        self.governor = governor or QueryGovernor()
+        # 在事件循环中创建，记录发起调用的会话（线程池中读取不到 current_session）
+        self.session = current_session.get()
+        self.cancelled = False
+        self.timed_out = False
+        self._pool = None
+        self._connection_id = None
+        self._watchdog = None
+        self._lock = threading.Lock()
+
+    def attach(self, pool, conn):
+        with self._lock:
+            self._pool = pool
+            self._connection_id = conn.connection_id
+            if self.governor.timeout and self._watchdog is None:
+                self._watchdog = threading.Timer(self.governor.timeout, self._on_timeout)
+                self._watchdog.daemon = True
+                self._watchdog.start()
+
+    def detach(self):
+        with self._lock:
+            self._pool = None
+            self._connection_id = None
+            if self._watchdog is not None:
+                self._watchdog.cancel()
+
+    def _on_timeout(self):
+        self.timed_out = True
+        self.governor.hit(f"执行超过 {self.governor.timeout:g} 秒，已通过 KILL QUERY 中止，剩余语句未执行")
+        self.kill()
 
+    def kill(self):
+        """标记取消，并中止该连接上正在执行的语句"""
+        # 持锁执行 KILL，保证连接在被 detach 并归还连接池之前不会被复用，避免误杀其他查询
+        with self._lock:
+            self.cancelled = True
+            if self._connection_id is None:
+                return
+            try:
+                self._pool.kill_query(self._connection_id)
+            except Error as e:
+                log_event("kill_query_failed", level=logging.WARNING, connection_id=self._connection_id, error=str(e))
@@ -0,0 +1,110 @@
+from typing import Dict, Any, Sequence
+
+from mcp import Tool
+from mcp.types import TextContent
+from mysql.connector import Error
+
+from config import get_db_config, run_blocking
+from config.encoders import EncoderRegistry
+from config.governor import QueryGovernor
+from config.result_stream import get_stream_registry, page_limits
+from .base import BaseHandler, ToolRegistry
+from .execute_sql import QueryHandle
+
+
+class FetchMore(BaseHandler):
+    name = "fetch_more"
+    description = (
+        "根据 execute_sql 流式模式返回的续读令牌继续获取下一页结果，无需重新执行SQL"
+    )
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "token": {
+                        "type": "string",
+                        "description": "execute_sql 或上一次 fetch_more 返回的 continuation_token"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": EncoderRegistry.get_formats(),
+                        "description": "本页的结果格式，默认沿用首次查询时的格式"
+                    },
+                    "page_rows": {
+                        "type": "integer",
+                        "description": "本页最多返回的行数，需大于0"
+                    },
+                    "page_bytes": {
+                        "type": "integer",
+                        "description": "本页最多返回的字节数，需大于0"
+                    },
+                    "close": {
+                        "type": "boolean",
+                        "description": "为 true 时不再读取，直接关闭结果集并释放连接"
+                    }
+                },
+                "required": ["token"]
+            }
+        )
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
+        """读取未读完结果集的下一页
+
+        参数:
+            token (str): 续读令牌
+            page_rows (int): 本页最多返回的行数
+            page_bytes (int): 本页最多返回的字节数
+            format (str): 本页的结果格式
+            close (bool): 是否直接关闭结果集
+
+        返回:
+            list[TextContent]: 当前页结果；结果仍未读完时附带同一个续读令牌
+        """
+        governor = None
+        try:
+            if "token" not in arguments:
+                raise ValueError("缺少续读令牌")
+
+            token = arguments["token"]
+            registry = get_stream_registry()
+            stream = registry.get(token)
+            if stream is None:
+                return [TextContent(type="text", text="续读令牌不存在或已过期，请重新执行查询")]
+
+            if arguments.get("close"):
+                await run_blocking(registry.close, token)
+                return [TextContent(type="text", text=f"结果集已关闭，共读取 {stream.rows_read} 行")]
+
+            fmt = arguments.get("format")
+            if fmt and fmt not in EncoderRegistry.get_formats():
+                return [TextContent(type="text", text=f"未知的结果格式: {fmt}，可选: {', '.join(EncoderRegistry.get_formats())}")]
+
+            # 每页不超过结果集所属数据库目标及其角色的行数与字节数限制
+            config = get_db_config(stream.target)
+            governor = QueryGovernor.for_role(config["role"], config["target"])
+            page_rows, page_bytes = governor.clamp_page(*page_limits(arguments))
+
+            handle = QueryHandle(governor)
+            text = await run_blocking(self.read_page, registry, stream, token, page_rows, page_bytes, fmt, handle,
+                                      on_cancel=handle.kill)
+            return [TextContent(type="text", text=text)]
+
+        except Error as e:
+            text = f"读取结果时出错: {str(e)}"
+            if governor is not None and governor.limits_hit:
+                text += f"\n---\n{governor.report()}"
+            return [TextContent(type="text", text=text)]
+
+    def read_page(self, registry, stream, token: str, page_rows: int, page_bytes: int, fmt: str,
+                  handle: QueryHandle) -> str:
+        """在当前线程中读取下一页（由 run_tool 调度到数据库线程池），读取受角色执行超时的看门狗约束"""
+        handle.attach(stream.pool, stream.conn)
+        try:
+            execute_sql = ToolRegistry.get_tool("execute_sql")
+            return execute_sql.read_stream_page(registry, stream, token, page_rows, page_bytes, fmt)
+        finally:
+            handle.detach()
@@ -3,7 +3,7 @@ from typing import Dict, Any, Sequence
 from mcp import Tool
 from mcp.types import TextContent
 
-from .base import BaseHandler
+from .base import BaseHandler, target_property
 from config import get_db_config, get_schema
 from handles import (
     ExecuteSQL
@@ -27,7 +27,8 @@ class GetSchema(BaseHandler):
                     "user_question": {
                         "type": "string",
                         "description": "用户问题"
-                    }
+                    },
+                    "target": target_property()
                 },
                 "required": ["user_question"]
             }
@@ -38,6 +39,7 @@ class GetSchema(BaseHandler):
 
             参数:
                 user_question (str): 用户问题
+                target (str): 数据库目标，在该目标的 schema 中检索
 
             返回:
                 list[TextContent]: 包含数据库schema的TextContent列表
@@ -49,7 +51,7 @@ class GetSchema(BaseHandler):
 
                 user_question = arguments["user_question"]
 
-                return await get_schema(user_question)
+                return await get_schema(user_question, arguments.get("target"))
 
             except Exception as e:
                 return [TextContent(type="text", text=f"执行查询时出错: {str(e)}")]
\ No newline at end of file
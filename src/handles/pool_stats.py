@@ -0,0 +1,53 @@
+import json
+from typing import Dict, Any, Sequence
+
+from mcp import Tool
+from mcp.types import TextContent
+
+from config import get_pool, run_blocking
+from config.replica import get_router
+from .base import BaseHandler, target_property
+
+
+class GetPoolStats(BaseHandler):
+    name = "get_pool_stats"
+    description = (
+        "获取MySQL连接池的运行指标（连接数、等待时间、健康检查失败次数等）"
+    )
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "target": target_property()
+                }
+            }
+        )
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
+        """返回连接池指标
+
+        参数:
+            target (str): 数据库目标，每个目标使用独立的连接池
+
+        返回:
+            list[TextContent]: JSON 格式的连接池指标
+        """
+        try:
+            # 首次使用时创建连接池会建立连接，在数据库线程池中执行，不阻塞事件循环
+            stats = await run_blocking(self.collect, arguments.get("target"))
+            return [TextContent(type="text", text=json.dumps(stats, ensure_ascii=False))]
+        except Exception as e:
+            return [TextContent(type="text", text=f"获取连接池指标时出错: {str(e)}")]
+
+    def collect(self, target: str = None) -> dict:
+        """读取连接池指标（由 run_tool 调度到数据库线程池）"""
+        stats = get_pool(target).stats()
+        router = get_router(target)
+        if router is not None:
+            # 各从库的复制延迟与连接池指标
+            stats["replicas"] = router.stats()
+        return stats
@@ -0,0 +1,48 @@
+import json
+from typing import Dict, Any, Sequence
+
+from mcp import Tool
+from mcp.types import TextContent
+
+from config.query_cache import get_query_cache
+from .base import BaseHandler
+
+
+class GetQueryCacheStats(BaseHandler):
+    name = "get_query_cache_stats"
+    description = (
+        "获取只读语句结果缓存的运行指标（命中率、条目数、占用字节数等），可选清空缓存"
+    )
+
+    def get_tool_description(self) -> Tool:
+        return Tool(
+            name=self.name,
+            description=self.description,
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "clear": {
+                        "type": "boolean",
+                        "description": "返回指标后是否清空缓存"
+                    }
+                }
+            }
+        )
+
+    async def run_tool(self, arguments: Dict[str, Any]) -> Sequence[TextContent]:
+        """返回结果缓存指标
+
+        返回:
+            list[TextContent]: JSON 格式的缓存指标；未启用缓存时返回提示信息
+        """
+        try:
+            cache = get_query_cache()
+            if cache is None:
+                return [TextContent(type="text", text="结果缓存未启用（QUERY_CACHE_ENABLED=false）")]
+
+            stats = cache.stats()
+            if arguments.get("clear"):
+                cache.clear()
+            return [TextContent(type="text", text=json.dumps(stats, ensure_ascii=False))]
+        except Exception as e:
+            return [TextContent(type="text", text=f"获取结果缓存指标时出错: {str(e)}")]
@@ -1,25 +1,38 @@
 import asyncio
+import contextlib
+import logging
+import os
+import time
+
 import uvicorn
 
 from typing import Sequence
 from mcp.server.sse import SseServerTransport
 
 from mcp.server import Server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from mcp.types import  Tool, TextContent
 
 from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.routing import Route, Mount
 
 from handles.base import ToolRegistry
 
-from config.schema import init_neo4j_graph
-
-# 初始化NEO4j数据库
-init_neo4j_graph()
+from config.dbconfig import (get_http_config, get_import_config, get_schema_store_config, get_snapshot_config,
+                             get_target_names)
+from config.governor import current_session
+from config.logger import log_event
+from config.metrics import record_tool_call, render_metrics
+from config.result_stream import disable_streams
+from config.schema import get_schema_warmup, init_schema_graphs, start_schema_sync, start_schema_warmup
 
 # 初始化服务器
 app = Server("operateMysql")
 
+# 无状态 Streamable HTTP 模式：每个请求都会创建新的会话对象
+_stateless_http = False
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -44,7 +57,39 @@ async def call_tool(name: str, arguments: dict) -> Sequence[TextContent]:
     """
     tool = ToolRegistry.get_tool(name)
 
-    return await tool.run_tool(arguments)
+    # 记录当前会话，用于按会话限制并发查询数与读写分离的读己之写
+    token = current_session.set(session_key())
+    started = time.perf_counter()
+    try:
+        contents = await tool.run_tool(arguments)
+    except BaseException:
+        # 取消（客户端断开）也计入出错
+        record_tool_call(name, time.perf_counter() - started, failed=True)
+        raise
+    finally:
+        current_session.reset(token)
+    seconds = time.perf_counter() - started
+    record_tool_call(name, seconds, contents)
+    log_event("tool_call", sampled=True, tool=name, ms=round(seconds * 1000, 2))
+    return contents
+
+
+def session_key() -> str:
+    """当前调用所属会话的标识
+
+    stdio 与 SSE 模式下为会话对象；无状态 HTTP 模式下每个请求都是新的会话对象（且可能由不同的工作进程处理），
+    依次使用请求头 Mcp-Session-Id、X-Client-Id 或客户端地址标识会话。
+    """
+    context = app.request_context
+    request = context.request
+    if _stateless_http and request is not None:
+        for header in ("mcp-session-id", "x-client-id"):
+            value = request.headers.get(header)
+            if value:
+                return f"{header}:{value}"
+        if request.client is not None:
+            return f"client:{request.client.host}"
+    return str(id(context.session))
 
 
 async def run_stdio():
@@ -57,6 +102,9 @@ async def run_stdio():
     """
     from mcp.server.stdio import stdio_server
 
+    # 导入 schema、加载模型等耗时初始化在后台进行，不阻塞服务启动
+    start_schema_warmup()
+
     async with stdio_server() as (read_stream, write_stream):
         try:
             await app.run(
@@ -65,9 +113,25 @@ async def run_stdio():
                 app.create_initialization_options()
             )
         except Exception as e:
-            print(f"服务器错误: {str(e)}")
+            log_event("server_error", level=logging.ERROR, error=str(e))
             raise
 
+async def handle_health(request):
+    """存活检查：进程能够处理 HTTP 请求即返回 200"""
+    return JSONResponse({"status": "ok"})
+
+
+async def handle_ready(request):
+    """就绪检查：schema 预热全部完成时返回 200，否则返回 503 及各预热任务的状态"""
+    status = get_schema_warmup().status()
+    return JSONResponse(status, status_code=200 if status["state"] == "ready" else 503)
+
+
+async def handle_metrics(request):
+    """Prometheus 指标：各工具的耗时、出错次数与结果大小，以及 get_schema 各阶段耗时（多进程时为当前进程的指标）"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 def run_sse():
     """运行SSE(Server-Sent Events)模式的服务器
     
@@ -88,15 +152,94 @@ def run_sse():
             await app.run(streams[0], streams[1], app.create_initialization_options())
 
     starlette_app = Starlette(
-        debug=True,
+        debug=get_http_config()["debug"],
         routes=[
             Route("/sse", endpoint=handle_sse),
+            Route("/health", endpoint=handle_health),
+            Route("/ready", endpoint=handle_ready),
+            Route("/metrics", endpoint=handle_metrics),
             Mount("/messages/", app=sse.handle_post_message)
         ],
     )
+    # 导入 schema、加载模型等耗时初始化在后台进行，不阻塞服务启动
+    start_schema_warmup()
     uvicorn.run(starlette_app, host="0.0.0.0", port=9000)
 
 
+def create_http_app():
+    """创建无状态 Streamable HTTP 模式的应用（多进程时每个工作进程各调用一次）
+
+    每个请求独立处理，不在进程内保存会话，请求可以被分发到任意工作进程或副本。
+    多个工作进程时不支持流式读取：续读令牌只在打开结果集的进程中有效。
+    """
+    global _stateless_http
+    _stateless_http = True
+    if get_http_config()["workers"] > 1:
+        disable_streams("多进程 HTTP 模式（HTTP_WORKERS 大于 1）不支持流式读取：续读请求可能由其他工作进程处理，"
+                        "请去掉 stream 参数，或使用单进程、SSE 模式")
+    session_manager = StreamableHTTPSessionManager(
+        app=app,
+        json_response=get_http_config()["json_response"],
+        stateless=True,
+    )
+
+    async def handle_streamable_http(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(starlette_app):
+        # 每个工作进程在启动后于后台预热，从共享的 schema 图存储与向量文件加载
+        start_schema_warmup()
+        async with session_manager.run():
+            yield
+
+    return Starlette(
+        debug=get_http_config()["debug"],
+        routes=[
+            Mount("/mcp", app=handle_streamable_http),
+            Route("/health", endpoint=handle_health),
+            Route("/ready", endpoint=handle_ready),
+            Route("/metrics", endpoint=handle_metrics),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def prepare_shared_artifacts():
+    """多进程模式下由主进程同步 schema 并生成共享的 schema 图存储与注释向量文件，工作进程只加载
+
+    异常:
+        ValueError: embedded 存储未设置持久化路径时抛出（各进程的内存存储无法共享）
+    """
+    for target in get_target_names():
+        store_config = get_schema_store_config(target)
+        if store_config["backend"] == "embedded" and not store_config["path"]:
+            raise ValueError(f"多进程模式下使用 embedded 存储时必须设置 SCHEMA_STORE_PATH（数据库目标: {target}）")
+        if not get_snapshot_config(target)["embedding_cache"]:
+            log_event("embedding_cache_disabled", level=logging.WARNING, target=target,
+                      message="未设置 EMBEDDING_CACHE_PATH，每个工作进程都会重新编码注释向量")
+
+    init_schema_graphs()
+    # 周期性同步也只在主进程中进行，工作进程通过 schema 版本号感知变化
+    start_schema_sync(get_import_config()["sync_interval"])
+    os.environ["SCHEMA_WARMUP_SYNC"] = "false"
+
+
+def run_http():
+    """运行无状态 Streamable HTTP 模式的服务器（端点 /mcp）
+
+    HTTP_WORKERS 大于 1 时启动多个互不共享内存的工作进程，可以部署在负载均衡之后。
+    """
+    config = get_http_config()
+    if config["workers"] == 1:
+        uvicorn.run(create_http_app(), host=config["host"], port=config["port"])
+        return
+
+    prepare_shared_artifacts()
+    uvicorn.run("server:create_http_app", factory=True, host=config["host"], port=config["port"],
+                workers=config["workers"], timeout_worker_healthcheck=config["healthcheck_timeout"])
+
+
 if __name__ == "__main__":
     import sys
 
@@ -104,6 +247,9 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--stdio":
         # 标准输入输出模式
         asyncio.run(run_stdio())
+    elif len(sys.argv) > 1 and sys.argv[1] == "--http":
+        # 无状态 Streamable HTTP 模式，支持多进程
+        run_http()
     else:
         # 默认 SSE 模式
         run_sse()
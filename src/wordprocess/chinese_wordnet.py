@@ -1,34 +1,57 @@
-import nltk
-nltk.download('omw-1.4')
-
-from nltk.corpus import wordnet as wn
-
-# 获取中文词的同义词和词义
+import threading
+from functools import lru_cache
+
+# WordNet 语料与 Sentence-BERT 模型加载较慢（且首次需要联网下载），均在第一次使用时才加载，
+# 服务启动时由后台预热任务提前触发
+_wordnet = None
+_model = None
+_load_lock = threading.Lock()
+
+
+def get_wordnet():
+    """获取 WordNet 语料，本地缺少 omw-1.4 时才下载"""
+    global _wordnet
+    if _wordnet is None:
+        with _load_lock:
+            if _wordnet is None:
+                import nltk
+                try:
+                    nltk.data.find('corpora/omw-1.4')
+                except LookupError:
+                    nltk.download('omw-1.4')
+
+                from nltk.corpus import wordnet as wn
+                wn.ensure_loaded()
+                _wordnet = wn
+    return _wordnet
+
+
+# 获取中文词的同义词和词义（结果不可变，按词缓存，避免重复查询 WordNet）
+@lru_cache(maxsize=4096)
 def get_synonyms(word):
-    synsets = wn.synsets(word, lang='cmn')  # 使用中文代码'cmn'
+    synsets = get_wordnet().synsets(word, lang='cmn')  # 使用中文代码'cmn'
     synonyms = set()
     for syn in synsets:
         for lemma in syn.lemmas('cmn'):
             synonyms.add(lemma.name())
-    return synonyms
-
+    return frozenset(synonyms)
 
 
-from sentence_transformers import SentenceTransformer, util
+def get_model():
+    """获取预训练的 Sentence-BERT 模型"""
+    global _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
 
-# 加载预训练的 Sentence-BERT 模型
-model = SentenceTransformer('all-MiniLM-L6-v2')
+                # 加载预训练的 Sentence-BERT 模型
+                _model = SentenceTransformer('all-MiniLM-L6-v2')
+    return _model
 
-# 计算语义相似度
-def is_semantically_similar(keyword, text, threshold=0.7):
-    # 将 keyword 和 text 转换为向量
-    embeddings = model.encode([keyword.lower(), text.lower()])
-    # 计算余弦相似度
-    similarity = util.cos_sim(embeddings[0], embeddings[1])
-    return similarity.item() >= threshold
 
-# word = "收益"
-# synonyms = get_synonyms(word)
-# print(f"{word}的同义词：{synonyms}")
-#
-# print(is_semantically_similar('收益', '收入'))
\ No newline at end of file
+# 批量编码文本，返回 L2 归一化后的向量矩阵（每行一个文本），向量点积即余弦相似度
+def encode_texts(texts, batch_size=64):
+    return get_model().encode([text.lower() for text in texts], batch_size=batch_size,
+                              convert_to_numpy=True, normalize_embeddings=True,
+                              show_progress_bar=False).astype('float32', copy=False)
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+from wordprocess.chinese_wordnet import encode_texts
+
+
+class EmbeddingIndex:
+    """文本向量索引
+
+    构建时一次性将全部文本编码为归一化向量矩阵；查询时批量编码查询词，
+    通过一次矩阵乘法得到全部余弦相似度，再按阈值和 top-k 选出匹配文本。
+    """
+
+    def __init__(self, texts, previous=None):
+        """
+        :param texts: 需要建立索引的文本
+        :param previous: 之前构建的索引，其中已有的文本直接复用向量，只编码新增的文本
+        """
+        # 去重并保持顺序，文本统一小写
+        self.texts = list(dict.fromkeys(text.lower() for text in texts if text))
+        self.positions = {text: i for i, text in enumerate(self.texts)}
+
+        known = previous.positions if previous is not None and len(previous) else {}
+        reused = [i for i, text in enumerate(self.texts) if text in known]
+        missing = [i for i, text in enumerate(self.texts) if text not in known]
+        encoded = encode_texts([self.texts[i] for i in missing]) if missing else None
+        self.encoded_count = len(missing)  # 本次实际编码（未能复用）的文本数
+
+        if encoded is not None:
+            dim = encoded.shape[1]
+        elif reused:
+            dim = previous.matrix.shape[1]
+        else:
+            dim = 0
+        self.matrix = np.zeros((len(self.texts), dim), dtype='float32')
+        if reused:
+            self.matrix[reused] = previous.matrix[[known[self.texts[i]] for i in reused]]
+        if missing:
+            self.matrix[missing] = encoded
+
+    def __len__(self):
+        return len(self.texts)
+
+    def save(self, path):
+        """保存为 .npz 文件（先写临时文件再原子替换，其他进程不会读到写了一半的文件）"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, texts=np.array(self.texts, dtype=np.str_), matrix=self.matrix)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """从 save 保存的文件加载，文件不存在或无法读取时返回 None"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                texts, matrix = [str(text) for text in data["texts"]], data["matrix"]
+        except (OSError, ValueError, KeyError):
+            return None
+        index = cls.__new__(cls)
+        index.texts = texts
+        index.positions = {text: i for i, text in enumerate(texts)}
+        index.matrix = matrix
+        index.encoded_count = 0
+        return index
+
+    def search(self, queries, threshold=0.7, top_k=50):
+        """查找与每个查询词语义相似的文本
+
+        :param queries: 查询词列表
+        :param threshold: 余弦相似度阈值
+        :param top_k: 每个查询词最多返回的文本数
+        :return: 与 queries 一一对应的列表，每项为 [(文本, 相似度), ...]，按相似度降序
+        """
+        if not queries or not self.texts:
+            return [[] for _ in queries]
+
+        scores = encode_texts(queries) @ self.matrix.T  # (查询词数, 文本数)
+        k = min(top_k, len(self.texts))
+        if k < len(self.texts):
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(len(self.texts)), scores.shape)
+
+        results = []
+        for row, indexes in zip(scores, candidates):
+            indexes = indexes[row[indexes] >= threshold]
+            indexes = indexes[np.argsort(-row[indexes])]
+            results.append([(self.texts[i], float(row[i])) for i in indexes])
+        return results
@@ -0,0 +1,70 @@
+"""结果编码器吞吐量基准测试
+
+分别在宽表（列多行少）和长表（列少行多）上测试各结果格式的编码吞吐量，
+不需要连接数据库:
+
+    python test/bench_encoders.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config.encoders import EncoderRegistry, batched, get_encoder  # noqa: E402
+
+
+def make_rows(row_count, column_count, seed=42):
+    """生成混合类型的测试数据，其中部分列为低基数列，便于体现字典编码效果"""
+    rnd = random.Random(seed)
+    cities = ["北京", "上海", "广州", "深圳", "杭州", "成都"]
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(row_count):
+        row = []
+        for c in range(column_count):
+            kind = c % 5
+            if kind == 0:
+                row.append(i * column_count + c)
+            elif kind == 1:
+                row.append(rnd.choice(cities))
+            elif kind == 2:
+                row.append(Decimal(rnd.randint(0, 100000)) / 100)
+            elif kind == 3:
+                row.append(base + timedelta(seconds=rnd.randint(0, 10 ** 7)))
+            else:
+                row.append(None if rnd.random() < 0.1 else f"备注,{i}\n第{c}列")
+        rows.append(tuple(row))
+    return [f"col_{c}" for c in range(column_count)], rows
+
+
+def bench(columns, rows, fmt, repeat=3):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = get_encoder(fmt).encode(columns, batched(rows))
+        best = min(best, time.perf_counter() - started)
+        size = len(text.encode("utf-8"))
+    return best, size
+
+
+def main():
+    datasets = {
+        "wide (200 cols x 2,000 rows)": make_rows(2000, 200),
+        "long (5 cols x 200,000 rows)": make_rows(200000, 5),
+    }
+    for title, (columns, rows) in datasets.items():
+        print(f"\n{title}")
+        print(f"{'format':<10}{'seconds':>10}{'rows/s':>14}{'cells/s':>14}{'MB':>10}")
+        for fmt in EncoderRegistry.get_formats():
+            seconds, size = bench(columns, rows, fmt)
+            print(f"{fmt:<10}{seconds:>10.3f}{len(rows) / seconds:>14,.0f}"
+                  f"{len(rows) * len(columns) / seconds:>14,.0f}{size / 1024 / 1024:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""服务端到端基准测试
+
+通过内存中的 MCP 传输调用 get_schema 与 execute_sql，工具调用路径与线上一致（协议编解码、
+call_tool 指标、线程池调度、连接池、权限检查与结果编码），外部依赖替换为进程内的替身:
+
+- MySQL: 内存中的假连接/游标，按合成 schema 返回 INFORMATION_SCHEMA 查询结果，其他语句返回固定行数的结果集，
+  每次网络往返可以模拟固定延迟（--db-latency-ms）
+- schema 图存储: embedded 后端（不需要 Neo4j）
+- 语义模型: 字符 n-gram 哈希向量（--model real 时使用 SentenceTransformer）
+- WordNet: 没有同义词的空词库（--wordnet real 时使用 nltk）
+
+对每种规模的合成 schema（中文注释、外键）报告:
+
+- schema 导入与快照构建耗时
+- 单会话顺序调用的 p50/p99 延迟
+- N 个并发 MCP 会话下的吞吐量与 p50/p99 延迟
+- 进程峰值内存（RSS）
+
+结果保存为 JSON（默认在 test/bench_results/ 下），--compare 与之前的结果逐项对比:
+
+    python test/bench_server.py
+    python test/bench_server.py --scales 100,1000,10000 --sessions 1,8,32
+    python test/bench_server.py --compare test/bench_results/bench_xxx.json
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# 替身环境：必须在导入服务模块之前设置
+os.environ.update({
+    "MYSQL_USER": "bench",
+    "MYSQL_PASSWORD": "bench",
+    "MYSQL_DATABASE": "bench",
+    "SCHEMA_STORE": "embedded",
+    "SCHEMA_STORE_PATH": "",
+    "SCHEMA_SYNC_INTERVAL": "0",
+})
+os.environ.setdefault("MYSQL_ROLE", "writer")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import numpy as np  # noqa: E402
+import mysql.connector  # noqa: E402
+
+SUBJECTS = ["用户", "订单", "商品", "库存", "支付", "物流", "客户", "供应商", "合同", "发票",
+            "仓库", "门店", "会员", "优惠券", "退款", "评价", "账户", "渠道", "员工", "部门"]
+ATTRIBUTES = ["编号", "名称", "状态", "金额", "数量", "类型", "地址", "电话", "备注", "创建时间",
+              "更新时间", "负责人", "等级", "余额", "单价", "折扣", "来源", "编码"]
+ENGLISH = ["id", "name", "status", "amount", "qty", "type", "address", "phone", "remark", "created_at",
+           "updated_at", "owner", "level", "balance", "price", "discount", "source", "code"]
+FIELDS_PER_TABLE = 12
+
+
+# ==================== 合成 schema 与工作负载 ====================
+def make_schema(table_count, seed=42):
+    """生成合成 schema（INFORMATION_SCHEMA 查询结果的格式）：每张表 FIELDS_PER_TABLE 个字段，中文注释，约一半的表带一个外键"""
+    rnd = random.Random(seed)
+    tables, columns, foreign_keys = [], [], []
+    for t in range(table_count):
+        subject = SUBJECTS[t % len(SUBJECTS)]
+        table_name = f"t_{ENGLISH[t % len(ENGLISH)]}_{t}"
+        tables.append({"TABLE_NAME": table_name, "TABLE_COMMENT": f"{subject}{rnd.choice(ATTRIBUTES)}信息表"})
+        for f in rnd.sample(range(len(ATTRIBUTES)), FIELDS_PER_TABLE):
+            columns.append({"TABLE_NAME": table_name, "COLUMN_NAME": f"{ENGLISH[f]}_{t % 97}",
+                            "COLUMN_COMMENT": f"{subject}{ATTRIBUTES[f]},{ATTRIBUTES[f]}", "DATA_TYPE": "varchar"})
+        if t and rnd.random() < 0.5:
+            referenced = rnd.randrange(t)
+            foreign_keys.append({"TABLE_NAME": table_name, "COLUMN_NAME": "ref_id",
+                                 "REFERENCED_TABLE_NAME": tables[referenced]["TABLE_NAME"],
+                                 "REFERENCED_COLUMN_NAME": "id"})
+    return tables, columns, foreign_keys
+
+
+def make_questions(count, seed=7):
+    """生成自然语言问题"""
+    rnd = random.Random(seed)
+    templates = ["查询{s}的{a}和{b}", "统计每个{s}的{a}", "{s}{a}大于100的{s2}有哪些", "最近一周{s}{b}的变化"]
+    return [rnd.choice(templates).format(s=rnd.choice(SUBJECTS), s2=rnd.choice(SUBJECTS),
+                                         a=rnd.choice(ATTRIBUTES), b=rnd.choice(ATTRIBUTES))
+            for _ in range(count)]
+
+
+def make_statements(tables, count, seed=11):
+    """生成 execute_sql 的语句：单条查询为主，夹杂多语句与写语句"""
+    rnd = random.Random(seed)
+    statements = []
+    for _ in range(count):
+        table = rnd.choice(tables)["TABLE_NAME"]
+        roll = rnd.random()
+        if roll < 0.7:
+            statements.append(f"SELECT * FROM {table} WHERE id = {rnd.randrange(100000)}")
+        elif roll < 0.9:
+            statements.append(f"SELECT COUNT(*) FROM {table}; SHOW COLUMNS FROM {table}")
+        else:
+            statements.append(f"UPDATE {table} SET status = 'x' WHERE id = {rnd.randrange(100000)}")
+    return statements
+
+
+# ==================== 进程内替身 ====================
+class FakeDatabase:
+    """内存中的 MySQL 替身：INFORMATION_SCHEMA 查询返回合成 schema，其他查询返回固定行数的结果集"""
+
+    def __init__(self, result_rows=100, latency_ms=1.0):
+        self.schema = ([], [], [])
+        self.result_rows = result_rows
+        self.latency = latency_ms / 1000
+        self.ids = itertools.count(1)
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def connect(self, **kwargs):
+        return FakeConnection(self)
+
+    def round_trip(self):
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def result_for(self, statement):
+        """返回 (列名, 行) ；无结果集时列名为 None"""
+        tables, columns, foreign_keys = self.schema
+        upper = statement.upper()
+        if "INFORMATION_SCHEMA.TABLES" in upper:
+            return ["TABLE_NAME", "TABLE_COMMENT"], tables
+        if "INFORMATION_SCHEMA.COLUMNS" in upper:
+            return ["TABLE_NAME", "COLUMN_NAME", "COLUMN_COMMENT", "DATA_TYPE"], columns
+        if "INFORMATION_SCHEMA.KEY_COLUMN_USAGE" in upper:
+            return ["TABLE_NAME", "COLUMN_NAME", "REFERENCED_TABLE_NAME", "REFERENCED_COLUMN_NAME"], foreign_keys
+        if "@@SESSION.NET_WRITE_TIMEOUT" in upper:
+            return ["@@SESSION.net_write_timeout"], [(60,)]
+        if upper.lstrip().startswith(("SELECT", "SHOW", "DESC", "EXPLAIN", "WITH")):
+            names = ["id", "name", "status", "amount", "created_at"]
+            rows = [(i, f"名称{i}", "ok", i * 1.5, "2024-01-01 00:00:00") for i in range(self.result_rows)]
+            return names, rows
+        return None, []
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+        self.connection_id = next(database.ids)
+        self.unread_result = False
+        self.in_transaction = False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def reconnect(self, attempts=1, delay=0):
+        pass
+
+    def close(self):
+        pass
+
+    def cursor(self, dictionary=False, **kwargs):
+        return FakeCursor(self, dictionary)
+
+    def start_transaction(self):
+        self.in_transaction = True
+
+    def commit(self):
+        self.database.round_trip()
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def consume_results(self):
+        self.unread_result = False
+
+
+class FakeCursor:
+    def __init__(self, connection, dictionary):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.description = None
+        self.rowcount = -1
+        self._results = []
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params=None):
+        from config.sql_lexer import split_statements
+
+        self.connection.database.round_trip()
+        self._results = [self.connection.database.result_for(statement.text)
+                         for statement in split_statements(sql)] or [(None, [])]
+        self._load(0)
+
+    def executemany(self, sql, rows):
+        self.connection.database.round_trip()
+        self.description, self.rowcount, self._rows = None, len(rows), []
+
+    def _load(self, index):
+        self._index = index
+        names, rows = self._results[index]
+        self.description = [(name,) for name in names] if names else None
+        self.rowcount = len(rows) if names else 1
+        self._rows = list(rows)
+
+    def nextset(self):
+        if self._index + 1 >= len(self._results):
+            return None
+        self._load(self._index + 1)
+        return True
+
+    def _convert(self, rows):
+        if self.dictionary or not rows or not isinstance(rows[0], dict):
+            return rows
+        return [tuple(row.values()) for row in rows]
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return self._convert(rows)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return self._convert(rows)
+
+
+class HashingEmbedder:
+    """语义模型替身：字符 1/2-gram 哈希到固定维度并归一化，相同片段越多的文本越相似"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype="float32")
+        grams = list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+        for gram in grams:
+            digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % self.dim] += 1.0
+        return vector
+
+    def encode(self, texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=False,
+               show_progress_bar=False, **kwargs):
+        single = isinstance(texts, str)
+        matrix = np.stack([self._vector(text) for text in ([texts] if single else texts)]) if texts else \
+            np.zeros((0, self.dim), dtype="float32")
+        if normalize_embeddings and len(matrix):
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return matrix[0] if single else matrix
+
+
+class EmptyWordNet:
+    """WordNet 替身：没有同义词"""
+
+    def synsets(self, word, lang=None):
+        return []
+
+
+def install_stand_ins(database, model, wordnet):
+    from wordprocess import chinese_wordnet
+
+    mysql.connector.connect = database.connect
+    if model == "stub":
+        chinese_wordnet._model = HashingEmbedder()
+    if wordnet == "stub":
+        chinese_wordnet._wordnet = EmptyWordNet()
+
+
+# ==================== 测量 ====================
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, seconds=None):
+    summary = {
+        "calls": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }
+    if seconds is not None:
+        summary["throughput_per_s"] = round(len(latencies) / seconds, 1) if seconds else 0.0
+    return summary
+
+
+def peak_rss_mb():
+    # Linux 上 ru_maxrss 的单位为 KB，macOS 上为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def call(session, tool, arguments):
+    started = time.perf_counter()
+    result = await session.call_tool(tool, arguments)
+    elapsed = time.perf_counter() - started
+    if result.isError:
+        raise RuntimeError(f"{tool} 调用失败: {result.content[0].text}")
+    return elapsed
+
+
+def workload(questions, statements):
+    """get_schema 与 execute_sql 交替的调用序列"""
+    for question, statement in zip(itertools.cycle(questions), statements):
+        yield "get_schema", {"user_question": question}
+        yield "execute_sql", {"query": statement}
+
+
+async def run_scale(app, database, table_count, args):
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from config.schema import init_neo4j_graph
+    from config.schema_snapshot import get_schema_snapshot
+
+    database.schema = make_schema(table_count)
+    tables = database.schema[0]
+    result = {"tables": table_count, "fields": len(database.schema[1]), "foreign_keys": len(database.schema[2])}
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.to_thread(init_neo4j_graph, "full")
+    result["import_s"] = round(time.perf_counter() - started, 3)
+    started = time.perf_counter()
+    await asyncio.to_thread(get_schema_snapshot)
+    result["snapshot_s"] = round(time.perf_counter() - started, 3)
+    if args.trace_memory:
+        result["build_traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    questions = make_questions(args.requests)
+    statements = make_statements(tables, args.requests)
+
+    # 单会话顺序调用
+    result["sequential"] = {}
+    async with create_connected_server_and_client_session(app) as session:
+        for tool, arguments in (("get_schema", [{"user_question": q} for q in questions]),
+                                ("execute_sql", [{"query": s} for s in statements])):
+            await call(session, tool, arguments[0])  # 预热
+            latencies = [await call(session, tool, item) for item in arguments]
+            result["sequential"][tool] = summarize(latencies)
+
+    # N 个并发会话
+    result["concurrent"] = {}
+    for sessions in args.sessions:
+        latencies = {"get_schema": [], "execute_sql": []}
+        round_trips = database.round_trips
+        async with contextlib.AsyncExitStack() as stack:
+            clients = [await stack.enter_async_context(create_connected_server_and_client_session(app))
+                       for _ in range(sessions)]
+
+            async def client_loop(session, offset):
+                calls = list(itertools.islice(workload(questions[offset:] + questions[:offset], statements),
+                                              args.calls_per_session))
+                for tool, arguments in calls:
+                    latencies[tool].append(await call(session, tool, arguments))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client_loop(session, i % len(questions)) for i, session in enumerate(clients)))
+            seconds = time.perf_counter() - started
+
+        all_latencies = latencies["get_schema"] + latencies["execute_sql"]
+        result["concurrent"][str(sessions)] = {
+            **summarize(all_latencies, seconds),
+            "by_tool": {tool: summarize(values) for tool, values in latencies.items()},
+            "db_round_trips": database.round_trips - round_trips,
+        }
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def print_result(result):
+    print(f"\n== {result['tables']} 张表 / {result['fields']} 个字段 / {result['foreign_keys']} 个外键: "
+          f"导入 {result['import_s']}s，构建快照 {result['snapshot_s']}s，峰值 RSS {result['peak_rss_mb']} MB")
+    for tool, summary in result["sequential"].items():
+        print(f"  顺序 {tool:<12} p50 {summary['p50_ms']:>9.2f} ms  p99 {summary['p99_ms']:>9.2f} ms")
+    for sessions, summary in result["concurrent"].items():
+        print(f"  {sessions:>3} 个会话    p50 {summary['p50_ms']:>9.2f} ms  p99 {summary['p99_ms']:>9.2f} ms  "
+              f"{summary['throughput_per_s']:>8.1f} 次/秒")
+
+
+def compare(previous, current):
+    """逐项对比两次结果中的延迟与吞吐量"""
+    print(f"\n与 {previous['meta'].get('commit', '?')} ({previous['meta']['timestamp']}) 对比:")
+    old_scales = {scale["tables"]: scale for scale in previous["results"]}
+    for scale in current["results"]:
+        old = old_scales.get(scale["tables"])
+        if old is None:
+            continue
+        rows = [("import_s", old["import_s"], scale["import_s"])]
+        for tool, summary in scale["sequential"].items():
+            if tool in old["sequential"]:
+                rows.append((f"顺序 {tool} p50_ms", old["sequential"][tool]["p50_ms"], summary["p50_ms"]))
+                rows.append((f"顺序 {tool} p99_ms", old["sequential"][tool]["p99_ms"], summary["p99_ms"]))
+        for sessions, summary in scale["concurrent"].items():
+            if sessions in old["concurrent"]:
+                rows.append((f"{sessions} 会话 throughput", old["concurrent"][sessions]["throughput_per_s"],
+                             summary["throughput_per_s"]))
+        print(f"  {scale['tables']} 张表:")
+        for name, before, after in rows:
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"    {name:<28}{before:>12}{after:>12}{change:>+9.1f}%")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="get_schema / execute_sql 端到端基准测试")
+    parser.add_argument("--scales", default="100,1000,5000,10000", help="合成 schema 的表数量，逗号分隔")
+    parser.add_argument("--sessions", default="1,4,16", help="并发 MCP 会话数，逗号分隔")
+    parser.add_argument("--requests", type=int, default=100, help="顺序测量时每个工具的调用次数")
+    parser.add_argument("--calls-per-session", type=int, default=40, help="并发测量时每个会话的调用次数")
+    parser.add_argument("--result-rows", type=int, default=100, help="替身数据库每个查询返回的行数")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="替身数据库每次网络往返的模拟延迟")
+    parser.add_argument("--model", choices=("stub", "real"), default="stub", help="语义模型：哈希向量替身或真实模型")
+    parser.add_argument("--wordnet", choices=("stub", "real"), default="stub", help="WordNet：空词库替身或 nltk")
+    parser.add_argument("--trace-memory", action="store_true", help="用 tracemalloc 统计 schema 导入与快照构建的峰值内存（较慢）")
+    parser.add_argument("--output", help="结果文件路径，默认 test/bench_results/bench_<commit>_<时间>.json")
+    parser.add_argument("--compare", help="与之前保存的结果文件对比")
+    args = parser.parse_args()
+    args.scales = [int(value) for value in args.scales.split(",")]
+    args.sessions = [int(value) for value in args.sessions.split(",")]
+    return args
+
+
+async def main():
+    args = parse_args()
+    database = FakeDatabase(args.result_rows, args.db_latency_ms)
+    install_stand_ins(database, args.model, args.wordnet)
+
+    from server import app
+    from config.schema import get_schema_warmup
+
+    # 预热（连接池、分词词典、模型、首次 schema 导入）在第一个规模上完成
+    database.schema = make_schema(args.scales[0])
+    warmup = get_schema_warmup()
+    warmup.start()
+    await asyncio.to_thread(warmup.wait, None)
+
+    results = []
+    for table_count in args.scales:
+        result = await run_scale(app, database, table_count, args)
+        print_result(result)
+        results.append(result)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "warmup": warmup.status(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        ROOT, "test", "bench_results", f"bench_{commit or 'unknown'}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
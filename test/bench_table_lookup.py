@@ -0,0 +1,91 @@
+"""表/字段关键词查找基准测试
+
+在不同规模的合成 schema 上比较 generate_table_info 的两种查找方式，并校验结果一致:
+
+- scan: 逐行检查表名/字段名/注释是否包含关键词（原 CONTAINS 语义）
+- index: 字符 n-gram 倒排索引
+
+不需要连接数据库或 Neo4j:
+
+    python test/bench_table_lookup.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config.schema_index import NGramIndex  # noqa: E402
+
+SUBJECTS = ["用户", "订单", "商品", "库存", "支付", "物流", "客户", "供应商", "合同", "发票",
+            "仓库", "门店", "会员", "优惠券", "退款", "评价", "账户", "渠道", "员工", "部门"]
+ATTRIBUTES = ["编号", "名称", "状态", "金额", "数量", "类型", "地址", "电话", "备注", "创建时间",
+              "更新时间", "负责人", "等级", "余额", "单价", "折扣", "来源", "编码"]
+ENGLISH = ["id", "name", "status", "amount", "qty", "type", "address", "phone", "remark", "created_at",
+           "updated_at", "owner", "level", "balance", "price", "discount", "source", "code"]
+FIELDS_PER_TABLE = 12
+
+
+def make_schema(table_count, seed=42):
+    """生成合成 schema：每张表 FIELDS_PER_TABLE 个字段，中文注释，约一半的表带一个外键"""
+    rnd = random.Random(seed)
+    fields, foreign_keys = [], []
+    for t in range(table_count):
+        subject = SUBJECTS[t % len(SUBJECTS)]
+        table_name = f"t_{ENGLISH[t % len(ENGLISH)]}_{t}"
+        table_comment = f"{subject}{rnd.choice(ATTRIBUTES)}信息表"
+        for f in rnd.sample(range(len(ATTRIBUTES)), FIELDS_PER_TABLE):
+            fields.append((table_name, table_comment, f"{ENGLISH[f]}_{t % 97}",
+                           f"{subject}{ATTRIBUTES[f]},{ATTRIBUTES[f]}", "varchar"))
+        if t and rnd.random() < 0.5:
+            referenced = rnd.randrange(t)
+            foreign_keys.append((table_name, "ref_id", f"t_{ENGLISH[referenced % len(ENGLISH)]}_{referenced}", "id"))
+    return fields, foreign_keys
+
+
+def make_queries(count, seed=7):
+    """生成关键词组合，模拟 extract_keywords 的输出（中文词、英文字段名、单字与未命中的词）"""
+    rnd = random.Random(seed)
+    vocabulary = SUBJECTS + ATTRIBUTES + ENGLISH + ["额", "不存在的词", "zzz"]
+    return [rnd.sample(vocabulary, 5) for _ in range(count)]
+
+
+def scan(fields, foreign_keys, keywords):
+    lowered = [keyword.lower() for keyword in keywords]
+
+    def contains_keyword(*texts):
+        return any(keyword in text.lower() for text in texts for keyword in lowered)
+
+    matched_fields = {i for i, field in enumerate(fields) if contains_keyword(field[0], field[2], field[1], field[3])}
+    matched_foreign_keys = {i for i, fk in enumerate(foreign_keys) if contains_keyword(fk[0], fk[2])}
+    return matched_fields, matched_foreign_keys
+
+
+def main():
+    queries = make_queries(50)
+    print(f"{'tables':>8}{'fields':>9}{'build s':>10}{'scan ms':>10}{'index ms':>10}{'speedup':>9}{'hits':>9}")
+    for table_count in (100, 1000, 5000, 10000):
+        fields, foreign_keys = make_schema(table_count)
+
+        started = time.perf_counter()
+        field_index = NGramIndex((t, f, tc, fc) for t, tc, f, fc, _ in fields)
+        foreign_key_index = NGramIndex((ft, tt) for ft, _, tt, _ in foreign_keys)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = [scan(fields, foreign_keys, keywords) for keywords in queries]
+        scan_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        started = time.perf_counter()
+        actual = [(field_index.search_any(keywords), foreign_key_index.search_any(keywords)) for keywords in queries]
+        index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        assert actual == expected, "索引查找结果与逐行扫描不一致"
+        hits = sum(len(matched_fields) for matched_fields, _ in actual) / len(queries)
+        print(f"{table_count:>8}{len(fields):>9}{build_seconds:>10.3f}{scan_ms:>10.2f}{index_ms:>10.2f}"
+              f"{scan_ms / index_ms:>8.1f}x{hits:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""pytest 公共配置：服务代码以 src 为根目录导入（from config...），测试前将其加入 sys.path"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
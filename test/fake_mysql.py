@@ -0,0 +1,138 @@
+"""测试用的 MySQL 连接池、连接与游标替身：按语句文本返回脚本化的结果，并记录执行过的语句"""
+import contextlib
+import itertools
+import json
+
+from mysql.connector import ProgrammingError
+
+# 预估扫描 5000 行的全表扫描，以及按主键访问一行的执行计划
+BIG_PLAN = {"query_block": {"cost_info": {"query_cost": "999.5"}, "table": {
+    "table_name": "t_big", "access_type": "ALL", "rows_examined_per_scan": 5000}}}
+SMALL_PLAN = {"query_block": {"cost_info": {"query_cost": "1.0"}, "table": {
+    "table_name": "t_x", "access_type": "const", "rows_examined_per_scan": 1}}}
+
+
+def default_result(sql: str):
+    """默认的语句结果：含 fail 的语句出错，EXPLAIN 按表名返回执行计划，读取 net_write_timeout 返回 60，
+    SELECT 返回三行，其他语句影响一行
+
+    返回:
+        tuple: (列名, 行)；没有结果集的语句为 (None, 影响行数)
+    """
+    upper = sql.upper()
+    if "FAIL" in upper:
+        raise ProgrammingError(msg=f"statement failed: {sql}")
+    if upper.startswith("EXPLAIN FORMAT=JSON"):
+        return ["EXPLAIN"], [(json.dumps(BIG_PLAN if "t_big" in sql else SMALL_PLAN),)]
+    if "@@SESSION.NET_WRITE_TIMEOUT" in upper:
+        return ["@@SESSION.net_write_timeout"], [(60,)]
+    if upper.startswith("SELECT"):
+        return ["id"], [(1,), (2,), (3,)]
+    return None, 1
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        columns, rows = self.connection.results(sql)
+        if columns is None:
+            self.description, self._rows, self.rowcount = None, [], rows
+        else:
+            self.description = [(name,) for name in columns]
+            self._rows, self.rowcount = list(rows), len(rows)
+            self.connection.unread_result = True
+
+    def executemany(self, sql, seq_params):
+        self.connection.executed.append(sql)
+        self.connection.batches.append(list(seq_params))
+        self.description, self._rows, self.rowcount = None, [], len(seq_params)
+
+    def fetchmany(self, size=1):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        if not self._rows:
+            self.connection.unread_result = False
+        return batch
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        return self.fetchmany(len(self._rows))
+
+    def nextset(self):
+        return None
+
+    def close(self):
+        self.connection.unread_result = False
+
+
+class FakeConnection:
+    def __init__(self, results=default_result, connection_id=1):
+        self.results = results
+        self.connection_id = connection_id
+        self.executed = []
+        self.batches = []
+        self.in_transaction = False
+        self.unread_result = False
+
+    def cursor(self, buffered=None, dictionary=False):
+        return FakeCursor(self)
+
+    def start_transaction(self):
+        self.executed.append("START TRANSACTION")
+        self.in_transaction = True
+
+    def commit(self):
+        self.executed.append("COMMIT")
+        self.in_transaction = False
+
+    def rollback(self):
+        self.executed.append("ROLLBACK")
+        self.in_transaction = False
+
+    def consume_results(self):
+        self.unread_result = False
+
+
+class FakePool:
+    """每次借出新的 FakeConnection，记录归还情况与 KILL QUERY"""
+
+    def __init__(self, results=default_result):
+        self.results = results
+        self.ids = itertools.count(1)
+        self.connections = []
+        self.released = []  # (连接, 是否丢弃)
+        self.killed = []
+
+    def acquire(self, timeout=None):
+        conn = FakeConnection(self.results, next(self.ids))
+        self.connections.append(conn)
+        return conn
+
+    def release(self, conn, discard=False):
+        self.released.append((conn, discard))
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def kill_query(self, connection_id):
+        self.killed.append(connection_id)
@@ -0,0 +1,68 @@
+"""bulk_insert 的测试：CSV 的 NULL 转换、含 % 与占位文本的列名，使用假的连接池"""
+import asyncio
+
+import pytest
+from mysql.connector.conversion import MySQLConverter
+from mysql.connector.cursor import MySQLCursor
+
+from handles import bulk_insert
+from handles.bulk_insert import BulkInsert, values_clause
+from fake_mysql import FakePool
+
+CONFIG = {"target": "default", "database": "db", "role": "admin"}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(bulk_insert, "get_db_config", lambda target: CONFIG)
+    monkeypatch.setattr(bulk_insert, "get_pool", lambda target: pool)
+    monkeypatch.setattr(bulk_insert, "record_write", lambda target, session: None)
+    monkeypatch.setattr(bulk_insert, "get_role_permissions", lambda role: ["INSERT"])
+    monkeypatch.setattr(bulk_insert, "get_query_cache", lambda: None)
+    return pool
+
+
+def run(arguments):
+    return asyncio.run(BulkInsert().run_tool(arguments))[0].text
+
+
+def rewrite(sql, rows):
+    """用 mysql-connector 自身的多行 INSERT 改写得到实际发送的语句"""
+    class Connection:
+        python_charset = "utf8"
+        sql_mode = ""
+        converter = MySQLConverter("utf8")
+
+    cursor = MySQLCursor.__new__(MySQLCursor)
+    cursor._connection = Connection()
+    return cursor._batch_insert(sql, rows).decode()
+
+
+def test_csv_keeps_null_strings_by_default():
+    columns, rows = BulkInsert().parse_rows({"csv": 'a,b\nNULL,"NULL"\n,x\n'})
+    assert columns == ["a", "b"]
+    assert rows == [("NULL", "NULL"), ("", "x")]
+
+
+def test_csv_null_token():
+    handler = BulkInsert()
+    _, rows = handler.parse_rows({"csv": 'a,b\n\\N,"NULL"\n', "null_token": "\\N"})
+    assert rows == [(None, "NULL")]
+    _, rows = handler.parse_rows({"csv": "a,b\n,x\n", "null_token": ""})
+    assert rows == [(None, "x")]
+
+
+def test_column_names_with_percent(pool):
+    text = run({"table": "t", "columns": ["rate%", "a%sb"], "rows": [[1, "x"], [None, "y"]]})
+    assert text.startswith("已插入 2 行")
+    sql = pool.connections[-1].executed[1]
+    assert sql == "INSERT INTO `t` (`rate%`, `a%sb`) VALUES (%s, %s)"
+    assert rewrite(sql, [(1, "x"), (None, "y")]) == \
+        "INSERT INTO `t` (`rate%`, `a%sb`) VALUES (1, 'x'),(NULL, 'y')"
+
+
+def test_column_name_containing_placeholders():
+    prefix = "INSERT INTO `t` (`(%s, %s)`, `( %s, %s)`) VALUES "
+    sql = prefix + values_clause(2, prefix)
+    assert rewrite(sql, [(1, 2)]) == "INSERT INTO `t` (`(%s, %s)`, `( %s, %s)`) VALUES (  1, 2)"
@@ -0,0 +1,146 @@
+"""成本检查（CostGuard）的测试：以固定的 EXPLAIN FORMAT=JSON 结果模拟执行计划，不需要 MySQL"""
+import json
+
+import pytest
+from mysql.connector import ProgrammingError
+
+from config.cost_guard import GUARD_LIMIT, GUARD_OFF, GUARD_REJECT, CostGuard, PlanCache, summarize_plan
+from config.sql_lexer import split_statements
+
+# 5000 行的全表扫描连接 2 行的索引访问，预估扫描 5000 + 5000 * 2 行
+BIG_PLAN = {"query_block": {"cost_info": {"query_cost": "9999.5"}, "nested_loop": [
+    {"table": {"table_name": "t_big", "access_type": "ALL", "rows_examined_per_scan": 5000,
+               "rows_produced_per_join": 5000}},
+    {"table": {"table_name": "t_small", "access_type": "ref", "rows_examined_per_scan": 2,
+               "rows_produced_per_join": 10000}},
+]}}
+SORTED_PLAN = {"query_block": {"cost_info": {"query_cost": "9999.5"}, "ordering_operation": {
+    "using_filesort": True, "table": {"table_name": "t_big", "access_type": "ALL", "rows_examined_per_scan": 5000}}}}
+SMALL_PLAN = {"query_block": {"cost_info": {"query_cost": "1.0"}, "table": {
+    "table_name": "t_x", "access_type": "const", "rows_examined_per_scan": 1}}}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.explained.append(sql)
+        if "missing" in sql:
+            raise ProgrammingError(msg="Table 'missing' doesn't exist")
+        plan = SORTED_PLAN if "ORDER BY" in sql.upper() else BIG_PLAN if "t_big" in sql else SMALL_PLAN
+        self.row = (json.dumps(plan),)
+
+    def fetchone(self):
+        return self.row
+
+    def fetchall(self):
+        return []
+
+
+class FakeConnection:
+    def __init__(self):
+        self.explained = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def guard(mode=GUARD_REJECT, max_rows=1000, max_cost=0, auto_limit=50):
+    return CostGuard(mode, max_rows, max_cost, auto_limit, PlanCache(100, 60))
+
+
+def check(cost_guard, sql, conn=None, **kwargs):
+    return cost_guard.check(conn or FakeConnection(), split_statements(sql)[0], ("default", "db"), **kwargs)
+
+
+def test_summarize_nested_loop():
+    summary = summarize_plan(BIG_PLAN)
+    assert summary.rows_examined == 15000
+    assert summary.cost == 9999.5
+    assert summary.full_scans == ("t_big",)
+    assert summary.tables == ("t_big", "t_small")
+    assert not summary.materializes
+    assert summarize_plan(SORTED_PLAN).materializes
+
+
+def test_cheap_statement_passes():
+    result = check(guard(), "SELECT * FROM t_x WHERE id = 1")
+    assert not result.rejected and result.message == ""
+
+
+def test_expensive_statement_is_rejected():
+    result = check(guard(), "SELECT * FROM t_big JOIN t_small ON 1")
+    assert result.rejected
+    assert result.message.startswith("成本检查未通过")
+    assert "t_big" in result.message
+
+
+def test_max_cost_threshold():
+    assert check(guard(max_rows=0, max_cost=100), "SELECT * FROM t_big").rejected
+    assert not check(guard(max_rows=0, max_cost=100000), "SELECT * FROM t_big").rejected
+
+
+def test_limit_mode_appends_limit():
+    result = check(guard(GUARD_LIMIT), "SELECT * FROM t_big")
+    assert not result.rejected
+    assert result.statement == "SELECT * FROM t_big LIMIT 50"
+    assert "LIMIT 50" in result.message
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT a FROM t_big INTO @v",
+    "SELECT * FROM t_big FOR UPDATE",
+])
+def test_limit_mode_rejects_statements_that_cannot_take_a_limit(sql):
+    assert check(guard(GUARD_LIMIT), sql).rejected
+
+
+def test_limit_mode_does_not_rewrite_streamed_statements():
+    assert check(guard(GUARD_LIMIT), "SELECT * FROM t_big", allow_limit=False).rejected
+
+
+@pytest.mark.parametrize("sql, rejected", [
+    ("SELECT * FROM t_big LIMIT 10", False),
+    ("SELECT * FROM t_big LIMIT 10 OFFSET 40", False),
+    ("SELECT * FROM t_big LIMIT 10, 45", True),
+    ("SELECT * FROM t_big LIMIT 5000", True),
+    ("SELECT * FROM t_big ORDER BY a LIMIT 10", True),
+])
+def test_small_top_level_limit_passes(sql, rejected):
+    # 已有 LIMIT 的语句不会被改写，要么放行要么拒绝
+    for mode in (GUARD_REJECT, GUARD_LIMIT):
+        result = check(guard(mode), sql)
+        assert result.rejected is rejected
+        assert result.statement == sql
+
+
+def test_only_selects_are_checked_and_off_mode_skips_explain():
+    conn = FakeConnection()
+    assert not check(guard(), "DELETE FROM t_big", conn).rejected
+    assert not check(guard(GUARD_OFF), "SELECT * FROM t_big", conn).rejected
+    assert conn.explained == []
+
+
+def test_explain_failure_does_not_block():
+    result = check(guard(), "SELECT * FROM missing")
+    assert not result.rejected and result.message == ""
+
+
+def test_plan_cache_is_keyed_by_digest_and_limit():
+    cost_guard, conn = guard(), FakeConnection()
+    check(cost_guard, "SELECT * FROM t_big WHERE id = 1", conn)
+    check(cost_guard, "SELECT * FROM t_big WHERE id = 2", conn)
+    assert len(conn.explained) == 1
+
+    check(cost_guard, "SELECT * FROM t_big WHERE id = 1 LIMIT 10", conn)
+    check(cost_guard, "SELECT * FROM t_big WHERE id = 1 LIMIT 20", conn)
+    assert len(conn.explained) == 3
+    assert cost_guard.plan_cache.stats()["hits"] == 1
@@ -0,0 +1,74 @@
+"""结果编码器的测试：各格式的转义、NULL 与二进制值、按批编码与字典编码"""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from config.encoders import EncoderRegistry, batched, encode_result, get_encoder, unique_columns
+
+COLUMNS = ["id", "name", "note"]
+ROWS = [(1, "张三", None), (2, 'a,"b"', "line1\nline2"), (3, "x|y", b"\xff\x00")]
+
+
+def test_formats_are_registered():
+    assert {"csv", "jsonl", "columnar", "markdown"} <= set(EncoderRegistry.get_formats())
+    with pytest.raises(ValueError):
+        get_encoder("xml")
+
+
+def test_csv_round_trips_quotes_newlines_and_null():
+    text = encode_result(COLUMNS, ROWS, "csv")
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == COLUMNS
+    assert rows[1] == ["1", "张三", "NULL"]
+    assert rows[2] == ["2", 'a,"b"', "line1\nline2"]
+    # 不是 UTF-8 的二进制值以十六进制输出
+    assert rows[3][2] == "0xff00"
+
+
+def test_jsonl_keeps_numbers_and_null():
+    lines = encode_result(COLUMNS, ROWS[:1] + [(4, Decimal("1.50"), date(2024, 1, 2))], "jsonl").splitlines()
+    assert json.loads(lines[0]) == {"id": 1, "name": "张三", "note": None}
+    assert json.loads(lines[1]) == {"id": 4, "name": "1.50", "note": "2024-01-02"}
+
+
+def test_jsonl_keeps_duplicate_column_names():
+    # SELECT a.id, b.id, a.name ... 中重复的列名不能互相覆盖
+    line = encode_result(["id", "id", "name"], [(1, 2, "x")], "jsonl")
+    assert json.loads(line) == {"id": 1, "id_2": 2, "name": "x"}
+
+
+def test_unique_columns_skips_taken_suffixes():
+    assert unique_columns(["id", "id_2", "id", "id"]) == ["id", "id_2", "id_3", "id_4"]
+    assert unique_columns(["a", "b"]) == ["a", "b"]
+
+
+def test_columnar_uses_dictionary_for_repeated_values():
+    rows = [(i, "北京" if i % 2 else "上海") for i in range(10)]
+    data = json.loads(encode_result(["id", "city"], rows, "columnar"))
+    assert data["columns"] == ["id", "city"] and data["rows"] == 10
+    assert data["data"][0] == list(range(10))
+    city = data["data"][1]
+    assert [city["dict"][code] for code in city["codes"]] == [row[1] for row in rows]
+
+
+def test_markdown_escapes_pipes_and_newlines():
+    lines = encode_result(COLUMNS, ROWS, "markdown").splitlines()
+    assert lines[0] == "| id | name | note |"
+    assert lines[1] == "| --- | --- | --- |"
+    assert lines[3] == '| 2 | a,"b" | line1<br>line2 |'
+    assert lines[4].startswith("| 3 | x\\|y |")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "columnar", "markdown"])
+def test_batch_size_does_not_change_output(fmt):
+    rows = [(i, f"name{i % 3}", None) for i in range(25)]
+    assert get_encoder(fmt).encode(COLUMNS, batched(rows, 7)) == encode_result(COLUMNS, rows, fmt)
+
+
+def test_empty_result_has_header_only():
+    assert encode_result(COLUMNS, [], "csv") == "id,name,note"
+    assert encode_result(COLUMNS, [], "jsonl") == ""
@@ -0,0 +1,82 @@
+"""资源限制（QueryGovernor）的测试：行数与字节数截断、分页限制与按会话的并发限制"""
+from config.encoders import get_encoder
+from config.governor import QueryGovernor, current_session
+
+
+class FakeCursor:
+    """按 fetchmany 逐批返回行的游标"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+def read(governor, rows):
+    cursor = FakeCursor(rows)
+    text, truncated = governor.read_result(cursor, lambda batches: get_encoder("csv").encode(["id"], batches))
+    return text.splitlines()[1:], truncated, cursor
+
+
+def test_unlimited_reads_everything():
+    lines, truncated, _ = read(QueryGovernor(), [(i,) for i in range(2500)])
+    assert len(lines) == 2500 and not truncated
+
+
+def test_max_rows_truncates_and_drains_cursor():
+    governor = QueryGovernor({"max_rows": 1500})
+    lines, truncated, cursor = read(governor, [(i,) for i in range(2500)])
+    assert len(lines) == 1500 and truncated
+    # 剩余的行被读掉，连接上可以继续读取下一个结果集
+    assert cursor.rows == []
+    assert "1500" in governor.report()
+
+
+def test_max_bytes_is_shared_across_results():
+    governor = QueryGovernor({"max_bytes": 100})
+    first, truncated, _ = read(governor, [("x" * 10,)] * 5)
+    assert len(first) == 5 and not truncated
+    second, truncated, _ = read(governor, [("y" * 10,)] * 10)
+    assert truncated and len(second) < 10
+    assert "100" in governor.report()
+
+
+def test_clamp_page():
+    assert QueryGovernor().clamp_page(1000, 1 << 20) == (1000, 1 << 20)
+    assert QueryGovernor({"max_rows": 50, "max_bytes": 4096}).clamp_page(1000, 1 << 20) == (50, 4096)
+
+
+def test_session_concurrency_limit():
+    token = current_session.set("session-a")
+    try:
+        governor = QueryGovernor({"max_concurrent": 1}, "t")
+        release = governor.check_concurrency()
+        assert release is not None
+        assert QueryGovernor({"max_concurrent": 1}, "t").check_concurrency() is None
+
+        # 其他会话不受影响
+        current_session.set("session-b")
+        other = QueryGovernor({"max_concurrent": 1}, "t").check_concurrency()
+        assert other is not None
+        other()
+
+        current_session.set("session-a")
+        release()
+        again = QueryGovernor({"max_concurrent": 1}, "t").check_concurrency()
+        assert again is not None
+        again()
+    finally:
+        current_session.reset(token)
+
+
+def test_target_running_limit():
+    first = QueryGovernor({"max_running": 1}, "busy").check_concurrency()
+    blocked = QueryGovernor({"max_running": 1}, "busy")
+    assert blocked.check_concurrency() is None
+    assert "busy" in blocked.report()
+    first()
+    again = QueryGovernor({"max_running": 1}, "busy").check_concurrency()
+    assert again is not None
+    again()
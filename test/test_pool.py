@@ -0,0 +1,59 @@
+"""连接池创建（get_pool）的测试：一个目标连接缓慢时不阻塞其他目标，使用假的 connect"""
+import threading
+import time
+
+import pytest
+
+from config import pool as pool_module
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def targets(monkeypatch):
+    """slow 目标的连接要等到 release 被设置后才建立"""
+    release = threading.Event()
+
+    def connect(**kwargs):
+        if kwargs["host"] == "slow":
+            release.wait(5)
+        return FakeConnection()
+
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", connect)
+    monkeypatch.setattr(pool_module, "resolve_target", lambda target: target)
+    monkeypatch.setattr(pool_module, "get_db_config", lambda target: {
+        "host": target, "port": 3306, "user": "u", "password": "p", "database": "db"})
+    monkeypatch.setattr(pool_module, "get_pool_config", lambda target: {"min_size": 1, "max_size": 2})
+    monkeypatch.setattr(pool_module, "_pools", {})
+    monkeypatch.setattr(pool_module, "_target_locks", {})
+    yield release
+    release.set()
+
+
+def test_slow_target_does_not_block_other_targets(targets):
+    slow = threading.Thread(target=pool_module.get_pool, args=("slow",), daemon=True)
+    slow.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    fast = pool_module.get_pool("fast")
+    assert time.monotonic() - started < 1
+    assert fast.stats()["idle"] == 1
+
+    targets.set()
+    slow.join(5)
+    assert pool_module.get_pool("slow").stats()["idle"] == 1
+
+
+def test_pool_is_created_once_per_target(targets):
+    targets.set()
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(pool_module.get_pool("fast"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(pool) for pool in pools}) == 1
@@ -0,0 +1,91 @@
+"""只读语句结果缓存（QueryResultCache）的测试：缓存键、失效标签与按表失效"""
+import time
+
+from config.query_cache import QueryResultCache, cache_tags, is_cacheable, referenced_tables
+
+
+def make_cache(ttl=60, max_bytes=1 << 20, max_entry_bytes=1 << 20):
+    return QueryResultCache(ttl, max_bytes, max_entry_bytes)
+
+
+def put(cache, statement, text="result", target="default", database="db"):
+    key = QueryResultCache.make_key(target, database, "readonly", statement, "csv")
+    cache.put(key, text, cache_tags(statement))
+    return key
+
+
+def test_key_ignores_whitespace_and_trailing_semicolon():
+    assert (QueryResultCache.make_key("t", "db", "r", "SELECT  *\nFROM t;", "csv")
+            == QueryResultCache.make_key("t", "db", "r", " SELECT * FROM t", "csv"))
+    assert (QueryResultCache.make_key("t", "db", "r", "SELECT 'a  b'", "csv")
+            != QueryResultCache.make_key("t", "db", "r", "SELECT 'a b'", "csv"))
+
+
+def test_cacheable_statements():
+    assert is_cacheable("SELECT * FROM t")
+    assert not is_cacheable("UPDATE t SET a = 1")
+    assert not is_cacheable("SELECT NOW()")
+    assert is_cacheable("SELECT 'now()' FROM t")
+
+
+def test_referenced_tables_are_lowercase_without_schema():
+    # 粗略提取，可能多出非表名的单词（只会导致多失效），但不能漏掉引用的表
+    assert referenced_tables("SELECT * FROM db.`Orders` o JOIN users u ON o.uid = u.id") >= {"orders", "users"}
+    assert referenced_tables("SELECT * FROM db.`Orders`") == {"orders"}
+
+
+def test_write_invalidates_only_its_tables():
+    cache = make_cache()
+    orders = put(cache, "SELECT * FROM orders")
+    users = put(cache, "SELECT * FROM users")
+
+    cache.invalidate_statement("UPDATE orders SET status = 1")
+    assert cache.get(orders) is None
+    assert cache.get(users) == "result"
+
+
+def test_join_is_invalidated_by_either_table():
+    cache = make_cache()
+    joined = put(cache, "SELECT * FROM orders o JOIN users u ON o.uid = u.id")
+    cache.invalidate_statement("DELETE FROM users WHERE id = 1")
+    assert cache.get(joined) is None
+
+
+def test_ddl_invalidates_schema_listings():
+    cache = make_cache()
+    tables = put(cache, "SHOW TABLES")
+    users = put(cache, "SELECT * FROM users")
+
+    cache.invalidate_statement("INSERT INTO orders VALUES (1)")
+    assert cache.get(tables) == "result"
+
+    cache.invalidate_statement("CREATE TABLE items (id INT)")
+    assert cache.get(tables) is None
+    assert cache.get(users) == "result"
+
+
+def test_write_without_known_tables_clears_everything():
+    cache = make_cache()
+    users = put(cache, "SELECT * FROM users")
+    cache.invalidate_statement("CALL refresh_all()")
+    assert cache.get(users) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_misses():
+    cache = make_cache(ttl=0.01)
+    key = put(cache, "SELECT * FROM users")
+    time.sleep(0.02)
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction_and_entry_size_limit():
+    cache = make_cache(max_bytes=200, max_entry_bytes=150)
+    first = put(cache, "SELECT * FROM a", "x" * 100)
+    put(cache, "SELECT * FROM b", "y" * 100)
+    assert cache.get(first) is None
+    assert cache.stats()["evictions"] == 1
+
+    big = put(cache, "SELECT * FROM c", "z" * 160)
+    assert cache.get(big) is None
@@ -0,0 +1,154 @@
+"""读写分离路由（ReplicaRouter）的测试，使用假的连接池，不需要 MySQL"""
+import threading
+import time
+
+from config import replica as replica_module
+from config.replica import LoadBalancerRegistry, Replica, ReplicaRouter, is_replica_safe
+from config.sql_lexer import split_statements
+
+
+class FakePool:
+    def __init__(self, name, in_use=0):
+        self.name = name
+        self.in_use = in_use
+        self.connect_args = {"host": name}
+
+    def stats(self):
+        return {"in_use": self.in_use}
+
+
+def replica(name, lag, in_use=0):
+    """复制延迟已检查过的从库（refresh 在检查间隔内不会再连接数据库）"""
+    replica = Replica(name, FakePool(name, in_use))
+    replica.lag, replica.checked_at = lag, time.monotonic()
+    return replica
+
+
+def router(replicas, policy="round_robin", **kwargs):
+    return ReplicaRouter("test", FakePool("primary"), replicas, LoadBalancerRegistry.get_balancer(policy),
+                         max_lag=5, check_interval=60, **kwargs)
+
+
+def statement(sql):
+    return split_statements(sql)[0]
+
+
+def test_replica_safe_statements():
+    assert is_replica_safe(statement("SELECT * FROM t"))
+    assert is_replica_safe(statement("SHOW TABLES"))
+    assert not is_replica_safe(statement("SELECT * FROM t FOR UPDATE"))
+    assert not is_replica_safe(statement("UPDATE t SET a = 1"))
+
+
+def test_reads_go_to_replicas_round_robin_and_writes_to_primary():
+    r = router([replica("r1", 0), replica("r2", 1)])
+    assert [r.route("s", True).name for _ in range(4)] == ["r1", "r2", "r1", "r2"]
+    assert r.route("s", False).name == "primary"
+
+
+def test_lagging_or_failed_replicas_are_skipped():
+    failed = replica("r3", 0)
+    failed.error = "connection refused"
+    r = router([replica("r1", 10), replica("r2", None), failed, replica("r4", 2)])
+    assert {r.route("s", True).name for _ in range(3)} == {"r4"}
+
+
+def test_falls_back_to_primary_without_available_replicas():
+    assert router([replica("r1", 60)]).route("s", True).name == "primary"
+
+
+def test_read_your_writes_pins_the_writing_session():
+    r = router([replica("r1", 0)])
+    r.record_write("writer")
+    assert r.route("writer", True).name == "primary"
+    assert r.route("reader", True).name == "r1"
+
+    r.sticky_seconds = 0
+    assert r.route("writer", True).name == "r1"
+
+
+def test_read_your_writes_can_be_disabled():
+    r = router([replica("r1", 0)], read_your_writes=False)
+    r.record_write("writer")
+    assert r.route("writer", True).name == "r1"
+
+
+def test_least_connections_policy():
+    r = router([replica("busy", 0, in_use=5), replica("idle", 0, in_use=1)], policy="least_connections")
+    assert r.route("s", True).name == "idle"
+
+
+class StatusConnection:
+    """返回固定复制状态的假连接"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, dictionary=False):
+        return StatusCursor(self.rows)
+
+    def close(self):
+        pass
+
+
+class StatusCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+
+def check(replica):
+    """触发一次检查并等待后台线程完成"""
+    replica.refresh(0, timeout=1)
+    replica._checker.join(1)
+
+
+def test_lag_check_uses_a_single_short_connection(monkeypatch):
+    calls = []
+
+    def connect(**kwargs):
+        calls.append(kwargs)
+        return StatusConnection([{"Seconds_Behind_Source": 3}])
+
+    monkeypatch.setattr(replica_module.mysql.connector, "connect", connect)
+    r = Replica("r1", FakePool("r1"))
+    check(r)
+    assert calls == [{"host": "r1", "connection_timeout": 1}]
+    assert r.lag == 3 and r.available(5)
+
+
+def test_replica_without_replication_status_is_unavailable(monkeypatch):
+    monkeypatch.setattr(replica_module.mysql.connector, "connect", lambda **kwargs: StatusConnection([]))
+    r = Replica("r1", FakePool("r1"))
+    check(r)
+    assert r.lag is None and r.error is not None
+    assert router([r]).route("s", True).name == "primary"
+
+
+def test_lag_check_does_not_block_reads(monkeypatch):
+    release = threading.Event()
+
+    def connect(**kwargs):
+        release.wait(5)
+        return StatusConnection([{"Seconds_Behind_Source": 0}])
+
+    monkeypatch.setattr(replica_module.mysql.connector, "connect", connect)
+    r = Replica("r1", FakePool("r1"))
+    started = time.monotonic()
+    # 首次检查完成前发往主库，且不等待检查
+    assert router([r]).route("s", True).name == "primary"
+    assert time.monotonic() - started < 1
+    release.set()
+    r._checker.join(1)
+    assert router([r]).route("s", True).name == "r1"
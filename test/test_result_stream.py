@@ -0,0 +1,117 @@
+"""流式结果集（ResultStream / ResultStreamRegistry）的测试，使用假的连接池，不需要 MySQL"""
+import asyncio
+import time
+
+from config.governor import QueryGovernor
+from config.result_stream import ResultStream, ResultStreamRegistry, extend_net_write_timeout
+from fake_mysql import FakePool
+
+
+def rows_result(count):
+    def results(sql):
+        if "@@SESSION.net_write_timeout" in sql:
+            return ["@@SESSION.net_write_timeout"], [(60,)]
+        if sql.startswith("SET"):
+            return None, 0
+        return ["id"], [(i,) for i in range(count)]
+    return results
+
+
+def open_stream(count=10, max_rows=0, net_write_timeout=None):
+    pool = FakePool(rows_result(count))
+    conn = pool.acquire()
+    cursor = conn.cursor(buffered=False)
+    cursor.execute("SELECT id FROM t")
+    return ResultStream(pool, conn, cursor, ["id"], "SELECT id FROM t", "csv", "default", max_rows,
+                        net_write_timeout), pool
+
+
+def test_expired_stream_is_reaped_without_another_request():
+    registry = ResultStreamRegistry(ttl=0.05, max_open=4)
+    stream, pool = open_stream()
+    registry.register(stream)
+
+    deadline = time.monotonic() + 2
+    while registry.stats()["open_streams"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.stats()["open_streams"] == 0
+    # 未读完的结果集丢弃连接，不把剩余数据读回来
+    assert pool.released == [(stream.conn, True)]
+
+
+def test_get_refreshes_last_access():
+    registry = ResultStreamRegistry(ttl=60, max_open=4)
+    stream, _ = open_stream()
+    token = registry.register(stream)
+    stream.last_access -= 59.99
+    assert registry.get(token) is stream
+    assert time.monotonic() - stream.last_access < 1
+    registry.close(token)
+
+
+def test_streams_being_read_are_not_expired():
+    registry = ResultStreamRegistry(ttl=0, max_open=4)
+    stream, _ = open_stream()
+    token = registry.register(stream)
+    with stream.lock:
+        registry._expire()
+        assert not stream.closed
+    registry.close(token)
+    assert stream.closed
+
+
+def test_net_write_timeout_is_extended_and_restored():
+    stream, pool = open_stream(count=2)
+    conn = stream.conn
+    previous = extend_net_write_timeout(conn, 300)
+    assert previous == 60
+    assert "SET SESSION net_write_timeout = 330" in conn.executed
+
+    stream.net_write_timeout = previous
+    stream.read_page(10, 1 << 20)
+    assert stream.exhausted
+    stream.close()
+    assert conn.executed[-1] == "SET SESSION net_write_timeout = 60"
+    assert pool.released == [(conn, False)]
+
+
+def test_net_write_timeout_is_not_lowered():
+    stream, _ = open_stream()
+    assert extend_net_write_timeout(stream.conn, 1) == 60
+    assert not any(sql.startswith("SET") for sql in stream.conn.executed)
+
+
+def fetch(monkeypatch, registry, arguments, max_rows=0):
+    """经 fetch_more 工具读取下一页，角色的单次返回行数限制为 max_rows"""
+    from handles import fetch_more
+    from handles.fetch_more import FetchMore
+
+    monkeypatch.setattr(fetch_more, "get_stream_registry", lambda: registry)
+    monkeypatch.setattr(fetch_more, "get_db_config", lambda target: {"role": "readonly", "target": "default"})
+    monkeypatch.setattr(QueryGovernor, "for_role",
+                        classmethod(lambda cls, role, target=None: cls({"max_rows": max_rows}, "default")))
+    return asyncio.run(FetchMore().run_tool(arguments))[0].text
+
+
+def test_fetch_more_clamps_page_to_role_limit(monkeypatch):
+    registry = ResultStreamRegistry(ttl=60, max_open=4)
+    stream, _ = open_stream(10)
+    token = registry.register(stream)
+
+    text = fetch(monkeypatch, registry, {"token": token, "page_rows": 100}, max_rows=3)
+    assert text.splitlines()[1:4] == ["0", "1", "2"]
+    assert stream.rows_read == 3 and not stream.closed
+    assert token in text
+    registry.close(token)
+
+
+def test_fetch_more_rejects_expired_token(monkeypatch):
+    registry = ResultStreamRegistry(ttl=0.05, max_open=4)
+    stream, pool = open_stream(10)
+    token = registry.register(stream)
+    time.sleep(0.1)
+
+    assert registry.get(token) is None
+    assert fetch(monkeypatch, registry, {"token": token}) == "续读令牌不存在或已过期，请重新执行查询"
+    assert stream.closed
+    assert pool.released == [(stream.conn, True)]
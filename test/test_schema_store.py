@@ -0,0 +1,219 @@
+"""schema 图存储的测试：内嵌存储使用临时 SQLite 文件，Neo4j 存储使用记录语句的假会话，不需要 MySQL 与 Neo4j:
+
+    python -m pytest -q test/test_schema_store.py
+"""
+import pytest
+
+from config import schema_store as schema_store_module
+from config import schema_sync
+from config.dbconfig import get_schema_store_config
+from config.schema_index import NGramIndex
+from config.schema_store import EmbeddedSchemaStore, Neo4jSchemaStore
+
+
+def table(name, comment=""):
+    return {"TABLE_NAME": name, "TABLE_COMMENT": comment}
+
+
+def column(table_name, name, comment="", data_type="int"):
+    return {"TABLE_NAME": table_name, "COLUMN_NAME": name, "COLUMN_COMMENT": comment, "DATA_TYPE": data_type}
+
+
+def foreign_key(table_name, column_name, referenced_table, referenced_column):
+    return {"TABLE_NAME": table_name, "COLUMN_NAME": column_name,
+            "REFERENCED_TABLE_NAME": referenced_table, "REFERENCED_COLUMN_NAME": referenced_column}
+
+
+def schema():
+    """用户、订单两张表，订单通过 user_id 引用用户"""
+    tables = [table("users", "用户表"), table("orders", "订单表")]
+    columns = [
+        column("users", "id", "用户ID"),
+        column("users", "name", "用户名", "varchar"),
+        column("orders", "id", "订单ID"),
+        column("orders", "user_id", "下单用户"),
+        column("orders", "amount", "订单金额", "decimal"),
+    ]
+    foreign_keys = [foreign_key("orders", "user_id", "users", "id")]
+    return tables, columns, foreign_keys
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "schema.db")
+
+
+def test_sync_into_empty_store_adds_all_tables(path):
+    store = EmbeddedSchemaStore(path)
+    result = store.sync(*schema())
+
+    assert result["added"] == ["orders", "users"]
+    assert result["updated"] == [] and result["removed"] == [] and result["unchanged"] == 0
+    version, fields, foreign_keys = store.load()
+    assert version == 1
+    assert ("users", "用户表", "name", "用户名", "varchar") in fields
+    assert ("orders", "订单表", "amount", "订单金额", "decimal") in fields
+    assert foreign_keys == [("orders", "user_id", "users", "id")]
+
+
+def test_sync_without_changes_keeps_version(path):
+    store = EmbeddedSchemaStore(path)
+    store.sync(*schema())
+    result = store.sync(*schema())
+
+    assert result["added"] == result["updated"] == result["removed"] == []
+    assert result["unchanged"] == 2
+    assert store.read_version() == 1
+
+
+def test_sync_updates_changed_and_removes_dropped_tables(path):
+    store = EmbeddedSchemaStore(path)
+    store.sync(*schema())
+
+    tables, columns, _ = schema()
+    tables = [table("orders", "订单主表")]
+    columns = [c for c in columns if c["TABLE_NAME"] == "orders" and c["COLUMN_NAME"] != "amount"]
+    result = store.sync(tables, columns, [])
+
+    assert result["updated"] == ["orders"] and result["removed"] == ["users"]
+    version, fields, foreign_keys = store.load()
+    assert version == 2
+    assert {(t, f) for t, _, f, _, _ in fields} == {("orders", "id"), ("orders", "user_id")}
+    assert all(comment == "订单主表" for _, comment, _, _, _ in fields)
+    # 指向已删除表的外键一并删除
+    assert foreign_keys == []
+
+
+def test_build_keeps_existing_comments(path):
+    store = EmbeddedSchemaStore(path)
+    store.build(*schema())
+    tables, columns, foreign_keys = schema()
+    tables[0] = table("users", "新的注释")
+    store.build(tables, columns, foreign_keys)
+
+    version, fields, _ = store.load()
+    assert version == 2
+    assert {comment for t, comment, _, _, _ in fields if t == "users"} == {"用户表"}
+
+
+def test_load_restores_from_file(path):
+    EmbeddedSchemaStore(path).sync(*schema())
+
+    restored = EmbeddedSchemaStore(path)
+    version, fields, foreign_keys = restored.load()
+    assert version == 1
+    assert len(fields) == 5
+    assert foreign_keys == [("orders", "user_id", "users", "id")]
+
+
+def test_reloads_when_another_process_writes_newer_version(path):
+    reader = EmbeddedSchemaStore(path)
+    writer = EmbeddedSchemaStore(path)
+    writer.sync(*schema())
+    assert reader.read_version() == 1
+    assert len(reader.load()[1]) == 5
+
+    tables, columns, foreign_keys = schema()
+    writer.sync(tables + [table("items", "商品表")], columns + [column("items", "sku", "商品编码", "varchar")],
+                foreign_keys)
+    assert reader.read_version() == 2
+    version, fields, _ = reader.load()
+    assert version == 2
+    assert ("items", "商品表", "sku", "商品编码", "varchar") in fields
+
+
+def test_store_without_path_stays_in_memory(tmp_path):
+    store = EmbeddedSchemaStore()
+    assert store.read_version() is None
+    store.sync(*schema())
+    assert store.read_version() == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_lookup_tables_and_fields_by_keyword(path):
+    store = EmbeddedSchemaStore(path)
+    store.sync(*schema())
+    _, fields, foreign_keys = store.load()
+
+    # 与 schema 快照相同的方式建立索引，按表名、字段名或注释查找
+    field_index = NGramIndex((t, f, tc, fc) for t, tc, f, fc, _ in fields)
+    matched = {(fields[i][0], fields[i][2]) for i in field_index.search_any(["金额"])}
+    assert matched == {("orders", "amount")}
+    assert {fields[i][0] for i in field_index.search_any(["user"])} == {"users", "orders"}
+
+    foreign_key_index = NGramIndex((from_table, to_table) for from_table, _, to_table, _ in foreign_keys)
+    assert foreign_key_index.search_any(["users"]) == {0}
+
+
+class FakeNeo4jSession:
+    """记录执行的 Cypher 语句与参数，读取语句返回空结果"""
+
+    def __init__(self, driver, database):
+        self.driver = driver
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        self.driver.runs.append((self.database, query, dict(parameters or {}, **kwargs)))
+        return FakeNeo4jResult()
+
+    def execute_write(self, func, *args, **kwargs):
+        return func(self, *args, **kwargs)
+
+
+class FakeNeo4jResult:
+    def __iter__(self):
+        return iter([])
+
+    def consume(self):
+        pass
+
+    def single(self):
+        return None
+
+
+class FakeNeo4jDriver:
+    def __init__(self):
+        self.runs = []
+
+    def session(self, database=None):
+        return FakeNeo4jSession(self, database)
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    driver = FakeNeo4jDriver()
+    monkeypatch.setattr(schema_sync, "get_neo4j_driver", lambda: driver)
+    monkeypatch.setattr(schema_store_module, "get_neo4j_driver", lambda: driver)
+    return driver
+
+
+def test_neo4j_targets_share_the_default_database(monkeypatch):
+    monkeypatch.delenv("NEO4J_DATABASE", raising=False)
+    monkeypatch.delenv("MYSQL_ORDERS_NEO4J_DATABASE", raising=False)
+    config = get_schema_store_config("orders")
+    assert config["neo4j_database"] is None and not config["neo4j_dedicated"]
+
+    monkeypatch.setenv("MYSQL_ORDERS_NEO4J_DATABASE", "orders")
+    config = get_schema_store_config("orders")
+    assert config["neo4j_database"] == "orders" and config["neo4j_dedicated"]
+
+
+def test_neo4j_sync_scopes_nodes_by_target(driver):
+    result = Neo4jSchemaStore(target="orders").sync(*schema())
+    assert result["added"] == ["orders", "users"]
+
+    assert {database for database, _, _ in driver.runs} == {None}
+    writes = [(query, params) for _, query, params in driver.runs if "MERGE" in query or "MATCH" in query]
+    assert writes and all(params.get("target") == "orders" for _, params in writes)
+    assert all("{target: $target" in query for query, _ in writes)
+    # 没有 legacy_target 时不迁移旧节点
+    assert not any("n.target IS NULL" in query for _, query, _ in driver.runs)
+
+    Neo4jSchemaStore(target="orders").read_version()
+    assert driver.runs[-1][2] == {"target": "orders"}
@@ -0,0 +1,73 @@
+"""SQL 词法分析（sql_lexer）的测试：语句切分、语句类型、摘要文本与最外层 LIMIT"""
+from config.sql_lexer import (digest_text, has_top_level_into, is_locking_read, split_statements,
+                              statement_digest, statement_type, top_level_limit)
+
+
+def texts(sql, **kwargs):
+    return [statement.text for statement in split_statements(sql, **kwargs)]
+
+
+def test_split_ignores_semicolons_in_strings_identifiers_and_comments():
+    sql = "SELECT 'a;b', `c;d` FROM t; -- x;y\nUPDATE t SET a = \"e;f\" /* ; */; # tail;"
+    # 语句首尾的注释被去掉
+    assert texts(sql) == ["SELECT 'a;b', `c;d` FROM t", "UPDATE t SET a = \"e;f\""]
+
+
+def test_split_drops_empty_and_comment_only_fragments():
+    assert texts(";;  /* only */ ; -- nothing\n") == []
+
+
+def test_split_treats_executable_comments_as_code():
+    statements = split_statements("/*!40101 DROP TABLE t */; SELECT 1")
+    assert [statement.operation for statement in statements] == ["DROP", "SELECT"]
+
+
+def test_statement_types():
+    assert statement_type("  select 1") == "SELECT"
+    assert statement_type("(SELECT 1) UNION (SELECT 2)") == "SELECT"
+    assert statement_type("WITH x AS (SELECT 1) DELETE FROM t WHERE id IN (SELECT * FROM x)") == "DELETE"
+    assert statement_type("DESC t") == statement_type("DESCRIBE t")
+    assert statement_type("-- comment") == ""
+
+
+def test_backslash_escape_modes_split_differently():
+    # 默认模式下 \' 是转义的引号；NO_BACKSLASH_ESCAPES 模式下字符串在反斜杠后结束，分号成为分隔符
+    sql = r"SELECT 'a\'; DROP TABLE t; -- '"
+    assert len(split_statements(sql)) == 1
+    assert [s.operation for s in split_statements(sql, backslash_escapes=False)] == ["SELECT", "DROP"]
+
+
+def test_locking_read_ignores_strings():
+    assert is_locking_read("SELECT * FROM t FOR UPDATE")
+    assert is_locking_read("SELECT * FROM t LOCK IN SHARE MODE")
+    assert not is_locking_read("SELECT 'for update' FROM t")
+
+
+def test_digest_replaces_constants_and_collapses_lists():
+    assert digest_text("SELECT * FROM t WHERE id = 42 AND name = 'x'") == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert digest_text("select a from t where id in (1, 2,3)") == "select a from t where id in (?, ...)"
+    assert digest_text("SELECT  1 /* c */\n FROM t;") == "SELECT ? FROM t"
+
+
+def test_statements_differing_only_in_constants_share_digest():
+    assert statement_digest("SELECT * FROM t WHERE id = 1") == statement_digest("SELECT * FROM t WHERE id = 999")
+    assert statement_digest("SELECT * FROM t WHERE id = 1") != statement_digest("SELECT * FROM u WHERE id = 1")
+
+
+def test_top_level_limit_forms():
+    assert top_level_limit("SELECT * FROM t") is None
+    assert top_level_limit("SELECT * FROM t LIMIT 10") == (10, 0)
+    assert top_level_limit("SELECT * FROM t LIMIT 5, 10") == (10, 5)
+    assert top_level_limit("SELECT * FROM t LIMIT 10 OFFSET 5") == (10, 5)
+    assert top_level_limit("SELECT * FROM t LIMIT 10 FOR UPDATE") == (10, 0)
+    assert top_level_limit("SELECT * FROM t LIMIT ?") == (None, 0)
+
+
+def test_top_level_limit_ignores_subqueries_and_strings():
+    assert top_level_limit("SELECT * FROM (SELECT * FROM t LIMIT 5) x") is None
+    assert top_level_limit("SELECT 'LIMIT 5' FROM t") is None
+
+
+def test_top_level_into():
+    assert has_top_level_into("SELECT a INTO @v FROM t")
+    assert not has_top_level_into("SELECT * FROM t WHERE a IN (SELECT b FROM u)")
@@ -0,0 +1,95 @@
+"""execute_sql 事务模式（execute_transaction）的测试：提交、出错回滚、保存点与成本检查，使用假的连接池"""
+import pytest
+
+from config.cost_guard import GUARD_LIMIT, GUARD_OFF, GUARD_REJECT, CostGuard, PlanCache
+from handles import execute_sql
+from handles.execute_sql import ExecuteSQL, QueryHandle
+from fake_mysql import FakePool
+
+CONFIG = {"target": "default", "database": "db", "role": "admin"}
+OPERATIONS = ["SELECT", "INSERT", "UPDATE", "DELETE", "DROP"]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(execute_sql, "route_pool", lambda target, session, read_only: pool)
+    monkeypatch.setattr(execute_sql, "record_write", lambda target, session: None)
+    monkeypatch.setattr(execute_sql, "get_role_permissions", lambda role: OPERATIONS)
+    monkeypatch.setattr(execute_sql, "get_query_cache", lambda: None)
+    monkeypatch.setattr(execute_sql, "get_workload_log", lambda: None)
+    use_guard(monkeypatch, GUARD_OFF)
+    return pool
+
+
+def use_guard(monkeypatch, mode):
+    guard = CostGuard(mode, 1000, 0, 50, PlanCache(100, 60))
+    monkeypatch.setattr(execute_sql, "get_cost_guard", lambda target: guard)
+
+
+def run(query, savepoints=False):
+    return ExecuteSQL().execute_transaction(query, CONFIG, QueryHandle(), "csv", savepoints)
+
+
+def executed(pool):
+    return [sql for sql in pool.connections[-1].executed if not sql.startswith("EXPLAIN")]
+
+
+def test_commits_once_after_all_statements(pool):
+    text = run("INSERT INTO t VALUES (1); UPDATE t SET a = 2; SELECT id FROM t")
+    assert executed(pool) == ["START TRANSACTION", "INSERT INTO t VALUES (1)", "UPDATE t SET a = 2",
+                              "SELECT id FROM t", "COMMIT"]
+    assert "事务已提交，共 3 条语句" in text
+
+
+def test_failure_rolls_back_whole_transaction(pool):
+    text = run("INSERT INTO t VALUES (1); UPDATE fail SET a = 2; DELETE FROM t")
+    assert executed(pool) == ["START TRANSACTION", "INSERT INTO t VALUES (1)", "UPDATE fail SET a = 2", "ROLLBACK"]
+    assert "事务已回滚，第 2 条语句出错" in text
+    assert "COMMIT" not in executed(pool)
+
+
+def test_savepoints_roll_back_only_the_failed_statement(pool):
+    text = run("INSERT INTO t VALUES (1); UPDATE fail SET a = 2; DELETE FROM t", savepoints=True)
+    assert executed(pool) == [
+        "START TRANSACTION",
+        "SAVEPOINT sp_1", "INSERT INTO t VALUES (1)", "RELEASE SAVEPOINT sp_1",
+        "SAVEPOINT sp_2", "UPDATE fail SET a = 2", "ROLLBACK TO SAVEPOINT sp_2", "RELEASE SAVEPOINT sp_2",
+        "SAVEPOINT sp_3", "DELETE FROM t", "RELEASE SAVEPOINT sp_3",
+        "COMMIT",
+    ]
+    assert "已回滚到该语句之前" in text
+    assert "其中 1 条出错并已回滚到保存点" in text
+
+
+def test_savepoints_are_released_after_reading_results(pool):
+    run("SELECT id FROM t; INSERT INTO t VALUES (4)", savepoints=True)
+    assert executed(pool) == [
+        "START TRANSACTION",
+        "SAVEPOINT sp_1", "SELECT id FROM t", "RELEASE SAVEPOINT sp_1",
+        "SAVEPOINT sp_2", "INSERT INTO t VALUES (4)", "RELEASE SAVEPOINT sp_2",
+        "COMMIT",
+    ]
+    assert not pool.connections[-1].unread_result
+
+
+def test_ddl_and_forbidden_statements_are_not_executed(pool):
+    assert "不支持 DDL" in run("INSERT INTO t VALUES (1); DROP TABLE t")
+    assert "权限不足" in run("INSERT INTO t VALUES (1); GRANT ALL ON *.* TO x")
+    assert pool.connections == []
+
+
+def test_cost_guard_rejects_transaction(pool, monkeypatch):
+    use_guard(monkeypatch, GUARD_REJECT)
+    text = run("UPDATE t SET a = 1; SELECT * FROM t_big")
+    assert text.startswith("成本检查未通过")
+    assert text.endswith("事务未执行")
+    assert executed(pool) == []
+
+
+def test_cost_guard_adds_limit_in_transaction(pool, monkeypatch):
+    use_guard(monkeypatch, GUARD_LIMIT)
+    text = run("UPDATE t SET a = 1; SELECT * FROM t_big; SELECT * FROM t_x WHERE id = 1")
+    assert executed(pool) == ["START TRANSACTION", "UPDATE t SET a = 1", "SELECT * FROM t_big LIMIT 50",
+                              "SELECT * FROM t_x WHERE id = 1", "COMMIT"]
+    assert "已自动添加 LIMIT 50" in text